@@ -2,6 +2,12 @@ import os
 import httpx
 import json
 import logging
+from typing import Any
+from metrics import AI_LATENCY
+from ai_text import (
+    MAX_COMPLETION_TOKENS, MAX_INPUT_TOKENS, EXPERIENCE_CHUNK_TOKENS,
+    compact_text, estimate_tokens, experience_chunks, merge_experience_results, truncate_to_tokens
+)
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +23,14 @@ async def call_groq(prompt: str, system_prompt: str) -> str:
             {"role": "user", "content": prompt}
         ],
         "temperature": 0.3, # Keep it deterministic for JSON extraction
-        "max_tokens": 1024,
+        "max_tokens": MAX_COMPLETION_TOKENS,
         "response_format": {"type": "json_object"}
     }
-    async with httpx.AsyncClient(timeout=15.0) as client_http:
-        resp = await client_http.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"]
+    with AI_LATENCY.time(provider="groq"):
+        async with httpx.AsyncClient(timeout=15.0) as client_http:
+            resp = await client_http.post("https://api.groq.com/openai/v1/chat/completions", headers=headers, json=data)
+            resp.raise_for_status()
+            return resp.json()["choices"][0]["message"]["content"]
 
 async def call_mistral(prompt: str, system_prompt: str) -> str:
     api_key = os.environ.get("MISTRAL_API_KEY")
@@ -42,10 +49,11 @@ async def call_mistral(prompt: str, system_prompt: str) -> str:
         "temperature": 0.3,
         "response_format": {"type": "json_object"}
     }
-    async with httpx.AsyncClient(timeout=15.0) as client_http:
-        resp = await client_http.post("https://api.mistral.ai/v1/chat/completions", headers=headers, json=data)
-        resp.raise_for_status()
-        return resp.json()["choices"][0]["message"]["content"]
+    with AI_LATENCY.time(provider="mistral"):
+        async with httpx.AsyncClient(timeout=15.0) as client_http:
+            resp = await client_http.post("https://api.mistral.ai/v1/chat/completions", headers=headers, json=data)
+            resp.raise_for_status()
+            return resp.json()["choices"][0]["message"]["content"]
 
 async def process_ai_request(block_type: str, raw_text: str, target_role: str = None) -> dict:
     """Routes the text to the appropriate AI and returns the polished JSON object."""
@@ -61,17 +69,35 @@ async def process_ai_request(block_type: str, raw_text: str, target_role: str =
     if target_role:
         sys_prompt += f"\n\nCRITICAL CONTEXT: The user is specifically targeting a {target_role} role. You MUST deeply optimize all keywords, action verbs, industry jargon, and phrasing specifically for top-tier {target_role} ATS systems. Make them sound like an expert {target_role}."
     
+    text = compact_text(raw_text)
+    if block_type == "experience" and estimate_tokens(text) > EXPERIENCE_CHUNK_TOKENS:
+        chunks, dropped = experience_chunks(text)
+        logger.info(f"Experience input split into {len(chunks)} chunks ({estimate_tokens(text)} est. tokens)")
+        if dropped:
+            logger.warning(f"Experience input too long: dropped the last {dropped} of {len(chunks) + dropped} chunks")
+        # One at a time: the request holds a single scheduler slot, which was charged
+        # for every chunk (see estimate_request_tokens)
+        results = [await _complete_json(chunk, sys_prompt) for chunk in chunks]
+        sources = sorted({source for source, _ in results})
+        merged = merge_experience_results([data for _, data in results])
+        return {"source": "+".join(sources), "data": merged, "truncated": bool(dropped)}
+
+    source, data = await _complete_json(truncate_to_tokens(text, MAX_INPUT_TOKENS), sys_prompt)
+    return {"source": source, "data": data}
+
+async def _complete_json(prompt: str, sys_prompt: str) -> tuple[str, Any]:
+    """Run one prompt through the free-tier cascade and parse the JSON reply."""
     # Try Groq Free API first (High Speed, Strict Rate Limit)
     try:
-        result_text = await call_groq(raw_text, sys_prompt)
-        return {"source": "groq", "data": json.loads(result_text)}
+        result_text = await call_groq(prompt, sys_prompt)
+        return "groq", json.loads(result_text)
     except Exception as e:
         logger.warning(f"Groq failed ({type(e).__name__}: {e}), cascading to Mistral...")
         
         # Fallback to Mistral Free API
         try:
-            result_text = await call_mistral(raw_text, sys_prompt)
-            return {"source": "mistral", "data": json.loads(result_text)}
+            result_text = await call_mistral(prompt, sys_prompt)
+            return "mistral", json.loads(result_text)
         except Exception as mistral_err:
             logger.error(f"Mistral fallback failed: {mistral_err}")
             raise RuntimeError("AI processing failed on all free-tier fallbacks.")
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, TypeVar
+
+from ai_text import estimate_request_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AISchedulerRejected(Exception):
+    """Base class for requests the scheduler refuses to run."""
+
+
+class AIQueueFull(AISchedulerRejected):
+    pass
+
+
+class AIQueueTimeout(AISchedulerRejected):
+    pass
+
+
+class AIQuotaExceeded(AISchedulerRejected):
+    pass
+
+
+class _Ticket:
+    __slots__ = ("user_id", "cost", "ready", "usage")
+
+    def __init__(self, user_id: str, cost: int, ready: asyncio.Future, usage: tuple):
+        self.user_id = user_id
+        self.cost = cost
+        self.ready = ready
+        self.usage = usage  # this request's entry in the per-user usage window
+
+
+class AIRequestScheduler:
+    """Bounded, fair gate in front of the outbound LLM calls.
+
+    - At most `max_concurrency` AI requests are in flight across all users.
+    - Waiting requests are queued per user and dispatched with deficit round-robin,
+      where a request's cost is its estimated token count. A user with one huge
+      paste gets the same token share as a user with many short ones.
+    - Each user may have at most `max_pending_per_user` requests queued or running,
+      and at most `user_tokens_per_minute` estimated tokens admitted per minute.
+    - A request that waits longer than `queue_timeout` seconds is rejected. Requests
+      that never reach the LLM (timed out or cancelled in the queue) are refunded.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_pending_per_user: int = 3,
+        user_tokens_per_minute: int = 12000,
+        queue_timeout: float = 20.0,
+        quantum: int = 1024,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_pending_per_user = max_pending_per_user
+        self.user_tokens_per_minute = user_tokens_per_minute
+        self.queue_timeout = queue_timeout
+        self.quantum = quantum
+
+        self._in_flight = 0
+        self._queues: dict[str, deque] = {}
+        self._deficit: dict[str, int] = {}
+        self._active: deque = deque()  # round-robin order of users with queued tickets
+        self._pending: dict[str, int] = {}  # queued + running per user
+        self._usage: dict[str, deque] = {}  # (timestamp, tokens) admitted per user
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "waiting_users": len(self._active),
+        }
+
+    async def run(self, user_id: str, raw_text: str, call: Callable[[], Awaitable[T]], block_type: str = "") -> T:
+        """Wait for a fair slot, then await `call()` while holding it."""
+        cost = estimate_request_tokens(raw_text, block_type)
+        usage = self._admit(user_id, cost)
+
+        loop = asyncio.get_running_loop()
+        ticket = _Ticket(user_id, cost, loop.create_future(), usage)
+        self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        self._queues.setdefault(user_id, deque()).append(ticket)
+        if user_id not in self._deficit:
+            self._deficit[user_id] = 0
+            self._active.append(user_id)
+        self._dispatch()
+
+        try:
+            try:
+                await asyncio.wait_for(ticket.ready, timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._drop(ticket)
+                logger.warning(f"AI request from {user_id} timed out in queue after {self.queue_timeout}s")
+                raise AIQueueTimeout("AI service is busy. Please try again in a moment.")
+            except asyncio.CancelledError:
+                # Client went away while waiting; hand the slot on if we already got one
+                if ticket.ready.done() and not ticket.ready.cancelled():
+                    self._release()
+                else:
+                    self._drop(ticket)
+                raise
+
+            try:
+                return await call()
+            finally:
+                self._release()
+        finally:
+            self._pending[user_id] -= 1
+            if self._pending[user_id] <= 0:
+                self._pending.pop(user_id, None)
+
+    def _admit(self, user_id: str, cost: int) -> tuple:
+        """Per-user quotas, checked before a request joins the queue. Reserves `cost`
+        in the usage window and returns the entry, so _drop can refund it."""
+        if self._pending.get(user_id, 0) >= self.max_pending_per_user:
+            raise AIQueueFull("Too many AI requests in progress. Wait for the current ones to finish.")
+
+        now = time.monotonic()
+        usage = self._usage.setdefault(user_id, deque())
+        while usage and now - usage[0][0] > 60:
+            usage.popleft()
+        used = sum(tokens for _, tokens in usage)
+        # Always let a single request through, even if it alone exceeds the budget
+        if usage and used + cost > self.user_tokens_per_minute:
+            raise AIQuotaExceeded("AI usage limit reached. Please try again in a minute.")
+        entry = (now, cost)
+        usage.append(entry)
+        return entry
+
+    def _drop(self, ticket: _Ticket):
+        """Take a ticket that was never dispatched out of the queue and refund its tokens."""
+        queue = self._queues.get(ticket.user_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+        usage = self._usage.get(ticket.user_id)
+        if usage:
+            for i, entry in enumerate(usage):
+                if entry is ticket.usage:
+                    del usage[i]
+                    break
+        self._dispatch()
+
+    def _release(self):
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to queued tickets using deficit round-robin."""
+        while self._in_flight < self.max_concurrency and self._active:
+            user_id = self._active[0]
+            queue = self._queues.get(user_id)
+            while queue and queue[0].ready.done():
+                queue.popleft()  # timed out or cancelled while waiting
+            if not queue:
+                self._active.popleft()
+                self._queues.pop(user_id, None)
+                self._deficit.pop(user_id, None)
+                continue
+
+            ticket = queue[0]
+            if self._deficit[user_id] < ticket.cost:
+                self._deficit[user_id] += self.quantum
+                self._active.rotate(-1)
+                continue
+
+            queue.popleft()
+            self._deficit[user_id] -= ticket.cost
+            self._in_flight += 1
+            ticket.ready.set_result(None)
+            self._active.rotate(-1)
@@ -0,0 +1,147 @@
+"""Token estimates and input compaction for the AI resume builder.
+
+Standard library only: the request scheduler imports this at startup, while
+ai_engine (httpx, provider calls) is loaded on the first AI request.
+"""
+import re
+import unicodedata
+
+# Rough chars-per-token ratio for English text on llama/mistral tokenizers
+CHARS_PER_TOKEN = 4
+# System prompt + chat template overhead added to every request
+PROMPT_OVERHEAD_TOKENS = 200
+# Completion budget we ask the providers for
+MAX_COMPLETION_TOKENS = 1024
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate for a piece of user text (no tokenizer round-trip)."""
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+def estimate_request_tokens(raw_text: str, block_type: str = "") -> int:
+    """Estimated total token cost (prompt + completion) of one AI request, counting
+    every provider call when a long experience block is split into chunks."""
+    calls = 1
+    if block_type == "experience":
+        calls = len(experience_chunks(compact_text(raw_text))[0]) or 1
+    return estimate_tokens(raw_text) + calls * (PROMPT_OVERHEAD_TOKENS + MAX_COMPLETION_TOKENS)
+
+# ---- Input Compaction ----
+# llama3-8b-8192 has an 8192-token context; leave room for the system prompt,
+# the completion and estimation error.
+MODEL_CONTEXT_TOKENS = 8192
+MAX_INPUT_TOKENS = MODEL_CONTEXT_TOKENS - MAX_COMPLETION_TOKENS - PROMPT_OVERHEAD_TOKENS - 1000
+# Experience blocks above this size are split and processed one chunk at a time
+EXPERIENCE_CHUNK_TOKENS = 1500
+MAX_EXPERIENCE_CHUNKS = MAX_INPUT_TOKENS // EXPERIENCE_CHUNK_TOKENS
+
+# Numbered markers are 1-2 digits followed by a space: "2.5M users" and "2019) Led" aren't bullets
+_BULLET_RE = re.compile(r"^(?:[-*\u2022\u25aa\u25cf\u2023\u2043>]+|\d{1,2}[.)]\s)\s*")
+_INVISIBLE_RE = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+_SPACES_RE = re.compile(r"[ \t\f\v\xa0]+")
+
+def _dedupe_key(line: str) -> str:
+    return _BULLET_RE.sub("", line).strip(" .;,").casefold()
+
+def compact_text(raw_text: str) -> str:
+    """Normalize pasted text: unify unicode/whitespace, normalize bullet markers,
+    collapse blank-line runs and drop duplicated bullets (first occurrence wins).
+    Other lines are kept as they are: headings, dates and "Present" legitimately
+    repeat across roles."""
+    text = unicodedata.normalize("NFKC", raw_text or "")
+    text = _INVISIBLE_RE.sub("", text).replace("\r\n", "\n").replace("\r", "\n")
+
+    lines = []
+    seen = set()
+    for line in text.split("\n"):
+        line = _SPACES_RE.sub(" ", line).strip()
+        if not line:
+            if lines and lines[-1] != "":
+                lines.append("")
+            continue
+        if _BULLET_RE.match(line):
+            line = "- " + _BULLET_RE.sub("", line)
+            key = _dedupe_key(line)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+        lines.append(line)
+
+    while lines and lines[-1] == "":
+        lines.pop()
+    return "\n".join(lines)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to a token budget, preferring a line boundary."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    newline = cut.rfind("\n")
+    if newline > max_chars // 2:
+        cut = cut[:newline]
+    return cut.rstrip()
+
+def split_into_chunks(text: str, max_tokens: int) -> list[str]:
+    """Greedily pack whole lines into chunks of at most `max_tokens` (estimated).
+    Paragraph breaks are preferred split points; over-long lines are hard-split."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        body = "\n".join(current).strip()
+        if body:
+            chunks.append(body)
+        current, size = [], 0
+
+    for line in text.split("\n"):
+        while len(line) > max_chars:
+            flush()
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) + 1 > max_chars:
+            flush()
+        if line == "" and size > max_chars * 3 // 4:
+            flush()  # close a nearly-full chunk at a paragraph boundary
+            continue
+        current.append(line)
+        size += len(line) + 1
+    flush()
+    return chunks
+
+def experience_chunks(text: str) -> tuple[list[str], int]:
+    """Chunks to send for a compacted experience block (one, if it fits) and how
+    many were dropped past MAX_EXPERIENCE_CHUNKS."""
+    if estimate_tokens(text) <= EXPERIENCE_CHUNK_TOKENS:
+        return [text], 0
+    chunks = split_into_chunks(text, EXPERIENCE_CHUNK_TOKENS)
+    return chunks[:MAX_EXPERIENCE_CHUNKS], max(0, len(chunks) - MAX_EXPERIENCE_CHUNKS)
+
+def merge_experience_results(results: list[dict]) -> dict:
+    """Merge per-chunk experience JSON in chunk order: header fields come from the
+    first chunk that has them, bullets are concatenated with duplicates removed."""
+    merged = {"title": "", "company": "", "dates": "", "bullets": []}
+    seen = set()
+    for data in results:
+        if not isinstance(data, dict):
+            continue
+        for key in ("title", "company", "dates"):
+            value = data.get(key)
+            if not merged[key] and isinstance(value, str) and value.strip():
+                merged[key] = value.strip()
+        bullets = data.get("bullets") or []
+        if isinstance(bullets, str):
+            bullets = [bullets]
+        for bullet in bullets:
+            if not isinstance(bullet, str) or not bullet.strip():
+                continue
+            key = _dedupe_key(bullet)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged["bullets"].append(bullet.strip())
+    return merged
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Hashable, Iterable, Optional
+
+MAX_BATCH = 1000  # keys per $in query
+
+
+class BatchLoader:
+    """DataLoader-style batching of lookups by one field of one collection.
+
+    `load(key)` returns a future right away. Every key requested during the same
+    event-loop tick is resolved by a single `find({field: {"$in": keys}})` (chunked
+    at MAX_BATCH), and results are memoized, so each key is fetched at most once
+    for the lifetime of the loader. Create one per request or job run: the cache is
+    never invalidated. Missing keys resolve to None.
+    """
+
+    def __init__(self, collection, field: str, projection: Optional[dict] = None):
+        self.collection = collection
+        self.field = field
+        if projection is None:
+            projection = {"_id": 0}
+        elif any(v for k, v in projection.items() if k != "_id"):
+            projection = {**projection, field: 1}  # inclusion projection: the key is needed to map results back
+        self.projection = projection
+        self._cache: dict[Hashable, asyncio.Future] = {}
+        self._pending: list[Hashable] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def load(self, key: Hashable) -> "asyncio.Future[Optional[dict]]":
+        future = self._cache.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._cache[key] = loop.create_future()
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending.append(key)
+        return future
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list[Optional[dict]]:
+        return list(await asyncio.gather(*(self.load(k) for k in keys)))
+
+    def _dispatch(self):
+        keys, self._pending = self._pending, []
+        for i in range(0, len(keys), MAX_BATCH):
+            task = asyncio.get_running_loop().create_task(self._fetch(keys[i:i + MAX_BATCH]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, keys: list[Hashable]):
+        try:
+            found: dict[Any, dict] = {}
+            async for doc in self.collection.find({self.field: {"$in": keys}}, self.projection):
+                found.setdefault(doc.get(self.field), doc)
+        except Exception as e:
+            for key in keys:
+                if not self._cache[key].done():
+                    self._cache[key].set_exception(e)
+                self._cache.pop(key, None)  # let a later load retry
+            return
+        for key in keys:
+            if not self._cache[key].done():
+                self._cache[key].set_result(found.get(key))
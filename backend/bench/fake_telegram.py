@@ -0,0 +1,185 @@
+"""A local stand-in for the Telegram Bot API.
+
+Implements sendMessage, sendPhoto, editMessageText, answerCallbackQuery and
+getFile (plus file downloads) with injectable latency, 429s carrying
+`retry_after`, and 5xx errors. Every call is recorded so a simulator can work
+out delivery rate, retries and upload volume. Uploaded photos get a file_id
+that can be sent again instead of the bytes, as with the real API.
+
+Standalone, from backend/:
+
+    python -m bench.fake_telegram --port 8081 --latency-ms 40 --error-429 0.02
+    TELEGRAM_API_URL=http://127.0.0.1:8081 TELEGRAM_BOT_TOKEN=test uvicorn server:app
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from collections import Counter
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+SEND_METHODS = {"sendMessage", "sendPhoto"}
+METHODS = SEND_METHODS | {"editMessageText", "answerCallbackQuery", "getFile"}
+# Smallest valid JPEG-ish payload; the backend only base64-encodes it
+FAKE_PHOTO = b"\xff\xd8\xff\xe0" + b"\x00" * 256 + b"\xff\xd9"
+
+
+class FakeTelegram:
+    def __init__(self, latency_ms: float = 30, jitter_ms: float = 10, error_429: float = 0.0,
+                 retry_after: int = 1, error_5xx: float = 0.0, rate_limit: float = 0.0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_429 = error_429
+        self.retry_after = retry_after
+        self.error_5xx = error_5xx
+        self.rate_limit = rate_limit  # sends/second across the bot, like Telegram's ~30/s; 0 = off
+        self.rng = random.Random(seed)
+        self.app = Starlette(routes=[
+            Route("/bot{token}/{method}", self.handle, methods=["GET", "POST"]),
+            Route("/file/bot{token}/{path:path}", self.download, methods=["GET"]),
+        ])
+        self.reset()
+
+    def reset(self):
+        self.calls: Counter = Counter()
+        self.outcomes: Counter = Counter()
+        self.failed: Counter = Counter()  # (method, chat_id, payload digest) -> unretried failures
+        self.retries = 0
+        self.upload_bytes = 0
+        self.delivered: list[tuple[float, str, str]] = []  # (time, method, chat_id)
+        self.last_request_at = time.perf_counter()
+        self._message_id = 0
+        self._bucket = self.rate_limit
+        self._bucket_at = time.perf_counter()
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.perf_counter()
+        self._bucket = min(self.rate_limit, self._bucket + (now - self._bucket_at) * self.rate_limit)
+        self._bucket_at = now
+        if self._bucket < 1:
+            return False
+        self._bucket -= 1
+        return True
+
+    async def _params(self, request: Request) -> dict:
+        if request.method == "GET":
+            return dict(request.query_params)
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("application/json"):
+            return await request.json()
+        form = await request.form()
+        params = {}
+        for key, value in form.items():
+            if isinstance(value, str):
+                params[key] = value
+            else:
+                content = await value.read()
+                self.upload_bytes += len(content)
+                params[key] = "upload:" + hashlib.sha1(content).hexdigest()[:16]
+        return params
+
+    async def handle(self, request: Request) -> Response:
+        method = request.path_params["method"]
+        params = await self._params(request)
+        self.last_request_at = time.perf_counter()
+        self.calls[method] += 1
+        if method not in METHODS:
+            self.outcomes["not_found"] += 1
+            return JSONResponse({"ok": False, "error_code": 404, "description": "Not Found"}, status_code=404)
+
+        chat_id = str(params.get("chat_id", ""))
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:12]
+        key = (method, chat_id, digest)
+        if self.failed[key]:
+            # Same payload again after we failed it: the backend is retrying
+            self.failed[key] -= 1
+            self.retries += 1
+
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+        if self.rng.random() < self.error_5xx:
+            self.outcomes["server_error"] += 1
+            self.failed[key] += 1
+            return JSONResponse({"ok": False, "error_code": 502, "description": "Bad Gateway"}, status_code=502)
+        if self.rng.random() < self.error_429 or (method in SEND_METHODS and not self._take_token()):
+            self.outcomes["rate_limited"] += 1
+            self.failed[key] += 1
+            return JSONResponse({
+                "ok": False, "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after}
+            }, status_code=429)
+
+        self.outcomes["ok"] += 1
+        if method in SEND_METHODS:
+            self.delivered.append((time.perf_counter(), method, chat_id))
+        if method == "getFile":
+            file_id = params.get("file_id", "")
+            return JSONResponse({"ok": True, "result": {"file_id": file_id, "file_path": f"photos/{file_id}.jpg"}})
+        if method == "answerCallbackQuery":
+            return JSONResponse({"ok": True, "result": True})
+        self._message_id += 1
+        result = {"message_id": self._message_id, "date": int(time.time()), "chat": {"id": chat_id}}
+        if method == "sendPhoto":
+            photo = str(params.get("photo", ""))
+            file_id = "AgAC" + photo.removeprefix("upload:")
+            result["photo"] = [{"file_id": f"{file_id}-s", "width": 90}, {"file_id": file_id, "width": 1280}]
+        return JSONResponse({"ok": True, "result": result})
+
+    async def download(self, request: Request) -> Response:
+        self.last_request_at = time.perf_counter()
+        self.calls["download"] += 1
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+        return Response(FAKE_PHOTO, media_type="image/jpeg")
+
+    def report(self, started: float) -> dict:
+        """Delivery numbers for everything recorded since `started` (perf_counter)."""
+        delivered = [d for d in self.delivered if d[0] >= started]
+        last = max((d[0] for d in delivered), default=started)
+        span = last - started
+        return {
+            "delivered": len(delivered),
+            "recipients": len({d[2] for d in delivered}),
+            "msgs_per_s": round(len(delivered) / span, 2) if span else 0.0,
+            "time_to_last_recipient_s": round(span, 3),
+            "retries": self.retries,
+            "rate_limited": self.outcomes["rate_limited"],
+            "server_errors": self.outcomes["server_error"],
+            "upload_bytes": self.upload_bytes,
+            "calls": dict(self.calls),
+        }
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=30, help="Mean Bot API latency")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Latency standard deviation")
+    parser.add_argument("--error-429", type=float, default=0.0, help="Probability of a random 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after seconds sent with 429s")
+    parser.add_argument("--error-5xx", type=float, default=0.0, help="Probability of a 502")
+    parser.add_argument("--rate-limit", type=float, default=30.0, help="Sends/second before 429s, 0 = unlimited")
+
+
+def fake_from_args(args) -> FakeTelegram:
+    return FakeTelegram(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_429=args.error_429,
+        retry_after=args.retry_after, error_5xx=args.error_5xx, rate_limit=args.rate_limit
+    )
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    add_fault_arguments(parser)
+    cli_args = parser.parse_args()
+    uvicorn.run(fake_from_args(cli_args).app, host=cli_args.host, port=cli_args.port, log_level="warning")
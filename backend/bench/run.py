@@ -0,0 +1,253 @@
+"""API load test for the hot endpoints.
+
+Boots the FastAPI app in-process (ASGI transport, no sockets) against either a
+local mongod or an in-memory fake, seeds a production-sized data set, drives
+each scenario with N concurrent clients and prints latency percentiles and
+throughput as JSON.
+
+Run from backend/:
+
+    python -m bench.run                                  # in-memory fake (pip install mongomock-motor)
+    python -m bench.run --mongo-url mongodb://localhost:27017
+    python -m bench.run --scale 0.1 --output before.json
+    python -m bench.run --scale 0.1 --compare before.json   # exits 1 on p95 regressions
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+from bench.seed import BENCH_PASSWORD, seed
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_VOLUMES = {"users": 5_000, "jobs": 10_000, "events": 1_000_000, "responses": 50_000}
+SCENARIOS = ["jobs", "rankings", "bot_analytics", "rcjo_bulk", "login"]
+
+
+def load_app(mongo_url: str, db_name: str, telegram_api_url: str = ""):
+    """Import server with its database swapped for the benchmark one.
+
+    Telegram stays disabled unless `telegram_api_url` points at a fake Bot API.
+    """
+    os.environ["MONGO_URL"] = mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = db_name
+    os.environ["TELEGRAM_BOT_TOKEN"] = "bench-token" if telegram_api_url else ""
+    os.environ["TELEGRAM_API_URL"] = telegram_api_url or "https://api.telegram.org"
+    sys.path.insert(0, str(BACKEND_DIR))
+    import server
+    from leader_scheduler import LeasedScheduler
+
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from metrics import MongoCommandMetrics
+        client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[MongoCommandMetrics()])
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("The in-memory backend needs mongomock-motor (pip install mongomock-motor), or pass --mongo-url")
+        client = AsyncMongoMockClient(tz_aware=True)
+    server.client = client
+    server.db = client[db_name]
+    server.scheduler = LeasedScheduler(server.db)
+    return server
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: list[float], elapsed: float, statuses: Counter) -> dict:
+    values = sorted(latencies)
+    ms = lambda s: round(s * 1000, 2)
+    return {
+        "requests": len(values),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "max_ms": ms(values[-1]) if values else 0.0,
+        "mean_ms": ms(sum(values) / len(values)) if values else 0.0,
+    }
+
+
+def build_scenarios(friend_headers: dict, admin_headers: dict, login_email: str, rng: random.Random) -> dict:
+    rcjo_headers = {"x-api-key": os.environ.get("RCJO_API_KEY", "default_secret_key")}
+
+    def rcjo_batch():
+        # A pool of 2000 links: early batches insert, later ones mostly update
+        return [
+            {
+                "company_name": f"RCJO Co {n % 50}",
+                "role": "Software Engineer",
+                "location": "Remote",
+                "apply_link": f"https://rcjo.bench.local/{n}",
+                "deadline": "2030-12-31",
+                "source": "bench",
+            }
+            for n in (rng.randrange(2000) for _ in range(50))
+        ]
+
+    return {
+        "jobs": lambda: ("GET", "/api/jobs", {"headers": friend_headers}),
+        "rankings": lambda: ("GET", "/api/rankings", {"headers": friend_headers}),
+        "bot_analytics": lambda: ("GET", "/api/admin/bot-analytics", {"headers": admin_headers}),
+        "rcjo_bulk": lambda: ("POST", "/api/rcjo-jobs/bulk", {"headers": rcjo_headers, "json": rcjo_batch()}),
+        "login": lambda: ("POST", "/api/auth/login", {"json": {"email": login_email, "password": BENCH_PASSWORD}}),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, concurrency: int, total: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        method, url, kwargs = make_request()
+        await client.request(method, url, **kwargs)
+
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = make_request()
+            start = time.perf_counter()
+            resp = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[resp.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, statuses)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Print a per-scenario diff against a previous run; returns the regressions."""
+    regressions = []
+    print(f"{'scenario':<15}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'rps':>18}", file=sys.stderr)
+    for name, current in results.items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+            old, new = before[key], current[key]
+            change = (new - old) / old * 100 if old else 0.0
+            cells.append(f"{old:>7} -> {new:<7}{change:+.0f}%".rjust(18))
+        print(f"{name:<15}" + "".join(cells), file=sys.stderr)
+        if before["p95_ms"] and (current["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 > threshold:
+            regressions.append(name)
+    return regressions
+
+
+async def main(args) -> int:
+    db_name = args.db_name or f"bench_{os.getpid()}"
+    server = load_app(args.mongo_url, db_name)
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    volumes = {k: int(v * args.scale) for k, v in DEFAULT_VOLUMES.items()}
+    rng = random.Random(args.seed)
+    selected = args.scenarios.split(",") if args.scenarios else SCENARIOS
+
+    async with server.app.router.lifespan_context(server.app):
+        seed_started = time.perf_counter()
+        seeded = await seed(server.db, volumes["users"], volumes["jobs"], volumes["events"], volumes["responses"], args.seed)
+        seed_seconds = round(time.perf_counter() - seed_started, 2)
+
+        admin = await server.db.users.find_one({"role": "admin"}, {"_id": 0, "id": 1})
+        friend = await server.db.users.find_one({"role": "friend"}, {"_id": 0, "id": 1, "email": 1})
+        admin_headers = {"Authorization": f"Bearer {server.create_token(admin['id'], 'admin')}"}
+        friend_headers = {"Authorization": f"Bearer {server.create_token(friend['id'], 'friend')}"} if friend else admin_headers
+        scenarios = build_scenarios(friend_headers, admin_headers, friend["email"] if friend else "", rng)
+
+        results = {}
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name in selected:
+                if name not in scenarios:
+                    sys.exit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+                print(f"Running {name}...", file=sys.stderr)
+                results[name] = await run_scenario(client, scenarios[name], args.concurrency, args.requests, args.warmup)
+
+        if args.mongo_url and not args.keep:
+            await server.client.drop_database(db_name)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "backend": "mongod" if args.mongo_url else "in-memory",
+            "seeded": seeded,
+            "seed_seconds": seed_seconds,
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+
+    if args.compare:
+        regressions = compare(results, json.loads(Path(args.compare).read_text()), args.threshold)
+        if regressions:
+            print(f"p95 regressed more than {args.threshold}%: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the hot API endpoints")
+    parser.add_argument("--mongo-url", default="", help="Use this mongod instead of the in-memory fake")
+    parser.add_argument("--db-name", default="", help="Database to seed (default: a throwaway bench_<pid>)")
+    parser.add_argument("--keep", action="store_true", help="Do not drop the seeded mongod database")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the seeded volumes (1.0 = 5k users, 10k jobs, 1M events)")
+    parser.add_argument("--scenarios", default="", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per scenario")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed for data and payloads")
+    parser.add_argument("--output", default="", help="Also write the JSON report to this file")
+    parser.add_argument("--compare", default="", help="Previous JSON report to diff against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Allowed p95 regression in percent")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    cli_args = parse_args()
+    cli_args.output = cli_args.output and str(Path(cli_args.output).resolve())
+    cli_args.compare = cli_args.compare and str(Path(cli_args.compare).resolve())
+    # Auth writes debug_auth.log to the working directory; keep it out of the repo
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    sys.exit(asyncio.run(main(cli_args)))
@@ -0,0 +1,115 @@
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import bcrypt
+
+IST_OFFSET = timedelta(hours=5, minutes=30)
+BENCH_PASSWORD = "bench-password"
+
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Cyberdyne", "Soylent"]
+ROLES = ["Software Engineer", "Data Analyst", "Product Manager", "SDE Intern", "ML Engineer", "DevOps Engineer"]
+LOCATIONS = ["Remote", "Onsite", "Hybrid"]
+SOURCES = ["linkedin", "glassdoor", "company_website", "startup"]
+EVENT_TYPES = (
+    ["job_notification_sent"] * 70 + ["button_click"] * 15 + ["reminder_sent"] * 8
+    + ["broadcast_sent"] * 4 + ["command_start", "link_success", "link_failed"]
+)
+RESPONSES = ["applied", "not_interested", "remind"]
+BATCH_SIZE = 10_000
+
+
+def _ist(dt: datetime) -> str:
+    return (dt + IST_OFFSET).replace(tzinfo=None).isoformat() + "+05:30"
+
+
+async def _insert_batched(collection, docs_iter):
+    batch = []
+    for doc in docs_iter:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def seed(db, users: int, jobs: int, events: int, responses: int, seed_value: int = 42) -> dict:
+    """Insert a deterministic data set shaped like production.
+
+    Every seeded user shares one bcrypt hash of BENCH_PASSWORD (5k real hashes
+    would take minutes). Two thirds of users have Telegram linked.
+    """
+    rng = random.Random(seed_value)
+    now = datetime.now(timezone.utc)
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt()).decode()
+
+    user_docs = []
+    for i in range(users):
+        user_docs.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "email": f"user{i}@bench.local",
+            "name": f"Bench User {i}",
+            "password_hash": password_hash,
+            "role": "friend",
+            "telegram_chat_id": str(100000 + i) if i % 3 else None,
+            "is_hidden": i % 25 == 0,
+            "created_at": _ist(now - timedelta(days=rng.randint(0, 365))),
+        })
+    await _insert_batched(db.users, user_docs)
+    chat_ids = [u["telegram_chat_id"] for u in user_docs if u["telegram_chat_id"]] or ["100000"]
+
+    job_docs = []
+    for i in range(jobs):
+        poster = user_docs[rng.randrange(users)] if users else {"id": "", "name": ""}
+        company, role = rng.choice(COMPANIES), rng.choice(ROLES)
+        job_docs.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "company_name": f"{company} {i % 97}",
+            "role": role,
+            "job_type": rng.choice(["Job", "Internship"]),
+            "location": rng.choice(LOCATIONS),
+            "apply_link": f"https://jobs.bench.local/{i}",
+            # ~1 in 10 jobs still open, like a board that has been running a while
+            "deadline": now + timedelta(days=rng.randint(1, 30)) if i % 10 == 0 else now - timedelta(days=rng.randint(1, 365)),
+            "posted_by": poster["id"],
+            "posted_by_name": poster["name"],
+            "created_at": _ist(now - timedelta(minutes=jobs - i)),
+            "source": rng.choice(SOURCES),
+        })
+    await _insert_batched(db.jobs, job_docs)
+    job_ids = [j["id"] for j in job_docs] or [""]
+
+    def event_docs():
+        for _ in range(events):
+            yield {
+                "id": str(uuid.UUID(int=rng.getrandbits(128))),
+                "event_type": rng.choice(EVENT_TYPES),
+                "chat_id": rng.choice(chat_ids),
+                "user_email": "",
+                "user_name": "",
+                "job_id": rng.choice(job_ids),
+                "job_title": "",
+                "action": "",
+                "metadata": {},
+                "created_at": _ist(now - timedelta(seconds=rng.randint(0, 30 * 86400))),
+            }
+    await _insert_batched(db.bot_events, event_docs())
+
+    seen = set()
+    def response_docs():
+        for _ in range(responses):
+            key = (rng.choice(chat_ids), rng.choice(job_ids))
+            if key in seen:
+                continue
+            seen.add(key)
+            yield {
+                "chat_id": key[0],
+                "job_id": key[1],
+                "response": rng.choice(RESPONSES),
+                "job_title": "",
+                "responded_at": _ist(now - timedelta(seconds=rng.randint(0, 30 * 86400))),
+            }
+    await _insert_batched(db.job_responses, response_docs())
+
+    return {"users": users, "jobs": jobs, "bot_events": events, "job_responses": len(seen)}
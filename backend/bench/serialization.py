@@ -0,0 +1,117 @@
+"""Micro-benchmark of the response encoding paths for large list payloads.
+
+Compares FastAPI's default path for a returned dict/list (jsonable_encoder,
+then json.dumps) with FastJSONResponse and with stream-encoding a cursor. The
+payloads have the shape of /api/jobs (1000 jobs) and /api/admin/bot-analytics.
+
+Run from backend/:
+
+    python -m bench.serialization
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fast_json import FastJSONResponse, _encode_array, orjson  # noqa: E402
+
+
+def job_docs(count: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [{
+        "id": str(uuid.uuid4()),
+        "company_name": f"Company {i}",
+        "role": "Software Engineer",
+        "job_type": "Job",
+        "location": "Remote",
+        "apply_link": f"https://jobs.example.com/{i}",
+        "deadline": now + timedelta(days=i % 30),
+        "posted_by": str(uuid.uuid4()),
+        "posted_by_name": f"User {i % 50}",
+        "created_at": (now - timedelta(minutes=i)).isoformat(),
+        "source": "linkedin",
+    } for i in range(count)]
+
+
+def analytics_payload() -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "overview": {f"total_{k}": 1000 + i for i, k in enumerate(["users", "events", "clicks", "jobs", "broadcasts"])},
+        "response_breakdown": {"applied": 120, "not_interested": 80, "remind": 40},
+        "per_job_responses": [{
+            "job_id": str(uuid.uuid4()), "job_title": f"Role {i}", "company": f"Co {i}", "total_notified": 500,
+            "applied": 20, "not_interested": 10, "remind": 5, "no_response": 465, "response_rate": 7.0,
+        } for i in range(10)],
+        "per_user_activity": [{
+            "chat_id": str(100000 + i), "name": f"User {i}", "email": f"user{i}@example.com", "total_clicks": i,
+            "applied": i // 2, "not_interested": i // 3, "remind": i // 4, "last_active": (now - timedelta(hours=i)).isoformat(),
+        } for i in range(100)],
+        "recent_events": [{
+            "id": str(uuid.uuid4()), "event_type": "button_click", "chat_id": str(100000 + i), "user_email": "",
+            "user_name": "", "job_id": str(uuid.uuid4()), "job_title": "", "action": "applied", "metadata": {},
+            "created_at": (now - timedelta(minutes=i)).isoformat(),
+        } for i in range(50)],
+        "daily_activity": [{"date": f"2026-01-{d:02d}", "count": d * 10} for d in range(1, 31)],
+    }
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+
+async def _stream(docs) -> bytes:
+    return b"".join([chunk async for chunk in _encode_array(_Cursor(docs))])
+
+
+def timeit(func, repeat: int) -> float:
+    func()  # warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare JSON response encoding paths")
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    jobs = job_docs(args.jobs)
+    analytics = analytics_payload()
+    loop = asyncio.new_event_loop()
+
+    results = {}
+    for name, payload in (("jobs", jobs), ("bot_analytics", analytics)):
+        baseline = JSONResponse(jsonable_encoder(payload)).body
+        assert json.loads(FastJSONResponse(payload).body) == json.loads(baseline)
+        paths = {
+            "default (jsonable_encoder + json)": lambda: JSONResponse(jsonable_encoder(payload)).body,
+            "FastJSONResponse default class (jsonable_encoder + fast encode)": lambda: FastJSONResponse(jsonable_encoder(payload)).body,
+            "FastJSONResponse returned directly": lambda: FastJSONResponse(payload).body,
+        }
+        if isinstance(payload, list):
+            paths["stream_json_array"] = lambda: loop.run_until_complete(_stream(payload))
+        results[name] = {label: round(timeit(fn, args.repeat), 3) for label, fn in paths.items()}
+
+    print(json.dumps({"encoder": "orjson" if orjson else "json", "ms_per_response": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Notification pipeline throughput simulator.
+
+Runs the app in-process with TELEGRAM_API_URL pointed at bench/fake_telegram.py,
+then drives the fan-outs (new-job notify, broadcast with and without a photo,
+deadline reminders, force push) and a burst of webhook updates. Reports
+delivered msgs/s, time-to-last-recipient, retry counts and uploaded bytes per
+scenario as JSON.
+
+Run from backend/:
+
+    python -m bench.telegram_sim --users 200
+    python -m bench.telegram_sim --users 500 --error-429 0.05 --error-5xx 0.01 --scenarios notify,webhook
+"""
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from bench.fake_telegram import add_fault_arguments, fake_from_args
+from bench.run import git_commit, load_app, percentile
+from bench.seed import seed
+
+SCENARIOS = ["notify", "broadcast", "broadcast_photo", "check_deadlines", "force_push", "webhook"]
+BROADCAST_PHOTO_DIMENSIONS = (600, 450)  # noise at q85: ~200 KB, under the server's 1280px / 300 KB targets
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_deliveries(fake, started: float, expected: int, idle: float, timeout: float):
+    """For fire-and-forget fan-outs: wait until everything arrived or the fake went quiet."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if fake.report(started)["delivered"] >= expected:
+            return
+        if time.perf_counter() - fake.last_request_at > idle:
+            return
+        await asyncio.sleep(0.1)
+
+
+def sim_photo(rng: random.Random) -> bytes:
+    """A real JPEG of random noise: the broadcast endpoint rejects anything that isn't an image."""
+    from PIL import Image
+
+    width, height = BROADCAST_PHOTO_DIMENSIONS
+    out = io.BytesIO()
+    Image.frombytes("RGB", (width, height), rng.randbytes(width * height * 3)).save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+def webhook_updates(chat_ids: list[str], emails: list[str], job_ids: list[str], count: int, rng: random.Random) -> list[dict]:
+    updates = []
+    for update_id in range(1, count + 1):
+        chat_id = rng.choice(chat_ids)
+        kind = rng.random()
+        if kind < 0.4:
+            updates.append({"update_id": update_id, "callback_query": {
+                "id": str(update_id), "from": {"id": int(chat_id)},
+                "message": {"message_id": update_id, "chat": {"id": int(chat_id)}},
+                "data": f"{rng.choice(['applied', 'not_interested', 'remind'])}:{rng.choice(job_ids)}",
+            }})
+            continue
+        if kind < 0.6:
+            text = "/status"
+        elif kind < 0.7:
+            text = f"/start {rng.choice(emails)}"
+        elif kind < 0.9:
+            text = "Is this role still open?"
+        else:
+            updates.append({"update_id": update_id, "message": {
+                "message_id": update_id, "chat": {"id": int(chat_id)},
+                "photo": [{"file_id": f"small{update_id}"}, {"file_id": f"large{update_id}"}], "caption": "screenshot",
+            }})
+            continue
+        updates.append({"update_id": update_id, "message": {
+            "message_id": update_id, "chat": {"id": int(chat_id)}, "text": text,
+        }})
+    return updates
+
+
+async def main(args) -> int:
+    fake = fake_from_args(args)
+    port = free_port()
+    fake_server = uvicorn.Server(uvicorn.Config(fake.app, host="127.0.0.1", port=port, log_level="warning"))
+    fake_task = asyncio.create_task(fake_server.serve())
+    while not fake_server.started:
+        await asyncio.sleep(0.05)
+
+    db_name = args.db_name or f"telegram_sim_{os.getpid()}"
+    server = load_app(args.mongo_url, db_name, f"http://127.0.0.1:{port}")
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    rng = random.Random(args.seed)
+    selected = args.scenarios.split(",") if args.scenarios else SCENARIOS
+    results = {}
+
+    async with server.app.router.lifespan_context(server.app):
+        await seed(server.db, args.users, 0, 0, 0, args.seed)
+        users = await server.db.users.find(
+            {"telegram_chat_id": {"$ne": None}}, {"_id": 0, "telegram_chat_id": 1, "email": 1}
+        ).to_list(None)
+        chat_ids = [u["telegram_chat_id"] for u in users]
+        now = datetime.now(timezone.utc)
+        jobs = [{
+            "id": str(uuid.uuid4()), "company_name": f"Sim Co {i}", "role": "Software Engineer",
+            "job_type": "Job", "location": "Remote", "apply_link": f"https://jobs.sim.local/{i}",
+            "deadline": now + timedelta(hours=12 + i), "posted_by": "", "posted_by_name": "Sim",
+            "created_at": (now - timedelta(minutes=i)).isoformat(), "source": "startup",
+        } for i in range(args.jobs)]
+        if jobs:
+            await server.db.jobs.insert_many(jobs)
+        job_ids = [j["id"] for j in jobs] or ["none"]
+
+        admin = await server.db.users.find_one({"role": "admin"}, {"_id": 0, "id": 1})
+        admin_headers = {"Authorization": f"Bearer {server.create_token(admin['id'], 'admin')}"}
+        idle = max(3.0, args.retry_after + 2.0)
+
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://sim", timeout=None) as client:
+            for name in selected:
+                if name not in SCENARIOS:
+                    sys.exit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+                print(f"Running {name}...", file=sys.stderr)
+                fake.reset()
+                started = time.perf_counter()
+                expected = len(chat_ids)
+                extra = {}
+
+                if name == "notify":
+                    await server.notify_all_users_new_job("<b>Sim job</b>", job_ids[0], job_title="Sim job")
+                elif name == "broadcast":
+                    resp = await client.post("/api/admin/broadcast", data={"message": "Sim broadcast"}, headers=admin_headers)
+                    extra["response"] = resp.json()
+                    await wait_for_deliveries(fake, started, expected, idle, args.timeout)
+                elif name == "broadcast_photo":
+                    photo = sim_photo(rng)
+                    resp = await client.post(
+                        "/api/admin/broadcast", data={"message": "Sim photo broadcast"},
+                        files={"photo": ("sim.jpg", photo, "image/jpeg")}, headers=admin_headers
+                    )
+                    extra["response"] = resp.json()
+                    extra["photo_bytes"] = len(photo)
+                    await wait_for_deliveries(fake, started, expected, idle, args.timeout)
+                elif name == "check_deadlines":
+                    await server.db.reminder_log.delete_many({})
+                    await server.check_deadlines()
+                    expected = len(chat_ids) * len(jobs)
+                elif name == "force_push":
+                    resp = await client.post("/api/admin/force-push-jobs", headers=admin_headers)
+                    body = resp.json()
+                    expected = body.get("messages_per_user", 0) * body.get("users_count", 0)
+                    await wait_for_deliveries(fake, started, expected, idle, args.timeout)
+                elif name == "webhook":
+                    updates = webhook_updates(chat_ids or ["1"], [u["email"] for u in users] or [""], job_ids, args.webhook_updates, rng)
+                    redelivered = rng.sample(updates, int(len(updates) * args.redeliver))
+                    updates += redelivered
+                    latencies = []
+                    duplicates = 0
+                    pending = iter(updates)
+
+                    async def worker():
+                        nonlocal duplicates
+                        for update in pending:
+                            t0 = time.perf_counter()
+                            resp = await client.post("/api/telegram/webhook", json=update)
+                            latencies.append(time.perf_counter() - t0)
+                            duplicates += bool((resp.json() or {}).get("duplicate"))
+
+                    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+                    elapsed = time.perf_counter() - started
+                    latencies.sort()
+                    expected = None
+                    extra = {
+                        "updates": len(updates),
+                        "redelivered": len(redelivered),
+                        "duplicates_skipped": duplicates,
+                        "updates_per_s": round(len(updates) / elapsed, 2) if elapsed else 0.0,
+                        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                    }
+
+                results[name] = {
+                    "expected": expected,
+                    "elapsed_s": round(time.perf_counter() - started, 3),
+                    **fake.report(started),
+                    **extra,
+                }
+
+        if args.mongo_url and not args.db_name:
+            await server.client.drop_database(db_name)
+
+    fake_server.should_exit = True
+    await fake_task
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "linked_users": len(chat_ids),
+            "active_jobs": len(jobs),
+            "fake": {
+                "latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms, "error_429": args.error_429,
+                "retry_after": args.retry_after, "error_5xx": args.error_5xx, "rate_limit": args.rate_limit,
+            },
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate Telegram fan-outs against a fake Bot API")
+    parser.add_argument("--mongo-url", default="", help="Use this mongod instead of the in-memory fake")
+    parser.add_argument("--db-name", default="")
+    parser.add_argument("--users", type=int, default=200, help="Seeded users (two thirds get Telegram linked)")
+    parser.add_argument("--jobs", type=int, default=3, help="Active jobs, for deadline reminders and force push")
+    parser.add_argument("--webhook-updates", type=int, default=500)
+    parser.add_argument("--redeliver", type=float, default=0.1, help="Fraction of webhook updates delivered twice, as Telegram retries do")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent webhook deliveries")
+    parser.add_argument("--timeout", type=float, default=600, help="Max wait for background fan-outs")
+    parser.add_argument("--scenarios", default="", help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="")
+    add_fault_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    cli_args = parse_args()
+    cli_args.output = cli_args.output and str(Path(cli_args.output).resolve())
+    os.chdir(tempfile.mkdtemp(prefix="telegram-sim-"))
+    sys.exit(asyncio.run(main(cli_args)))
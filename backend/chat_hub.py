@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ChatHubFull(Exception):
+    pass
+
+
+TAIL_MAX_BACKOFF = 60.0  # seconds between tail retries while Mongo is failing
+
+
+def message_cursor(message: dict) -> str:
+    """Resume cursor for a message: created_at alone isn't unique, so the id breaks ties."""
+    return f"{message.get('created_at', '')}|{message.get('id', '')}"
+
+def after_cursor(cursor: str) -> dict:
+    """Query for messages strictly after `cursor`, in (created_at, id) order. A bare
+    created_at (cursors issued before ids were added) is treated as (created_at, "")."""
+    created_at, _, msg_id = cursor.partition("|")
+    return {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "id": {"$gt": msg_id}},
+    ]}
+
+
+class ChatSubscription:
+    def __init__(self, chat_id: Optional[str], queue_size: int):
+        self.chat_id = chat_id  # None = all chats (chat list view)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.lagged = False
+        self.replayed: set[str] = set()  # ids sent from the reconnect replay
+
+    def wants(self, message: dict) -> bool:
+        return self.chat_id is None or message.get("chat_id") == self.chat_id
+
+    def is_replayed(self, message: dict) -> bool:
+        """True for a live message the replay already sent (published while it ran)."""
+        return bool(self.replayed) and message.get("id") in self.replayed
+
+
+class ChatHub:
+    """In-process fan-out of newly stored chat messages to connected admin streams.
+
+    Messages written by other worker processes are picked up by a tail loop that
+    only runs while someone is subscribed. It is one indexed `(created_at, id) > cursor`
+    query per process, not per admin, and it retries with backoff if Mongo is
+    unavailable. Message ids are de-duplicated so a message seen via both paths is
+    delivered once.
+    """
+
+    def __init__(self, max_connections: int = 20, queue_size: int = 200, tail_interval: float = 3.0):
+        self.max_connections = max_connections
+        self.queue_size = queue_size
+        self.tail_interval = tail_interval
+        self._subs: set[ChatSubscription] = set()
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._tail_task: Optional[asyncio.Task] = None
+        self._tail_cursor: Optional[str] = None
+
+    @property
+    def connections(self) -> int:
+        return len(self._subs)
+
+    def subscribe(self, db, chat_id: Optional[str] = None) -> ChatSubscription:
+        if len(self._subs) >= self.max_connections:
+            raise ChatHubFull("Too many live chat connections")
+        sub = ChatSubscription(chat_id, self.queue_size)
+        self._subs.add(sub)
+        if self._tail_task is None or self._tail_task.done():
+            self._tail_task = asyncio.create_task(self._tail(db))
+        return sub
+
+    def unsubscribe(self, sub: ChatSubscription):
+        self._subs.discard(sub)
+        if not self._subs and self._tail_task:
+            self._tail_task.cancel()
+            self._tail_task = None
+            self._tail_cursor = None
+
+    def publish(self, message: dict):
+        msg_id = message.get("id")
+        if msg_id:
+            if msg_id in self._seen:
+                return
+            self._seen[msg_id] = None
+            while len(self._seen) > 5000:
+                self._seen.popitem(last=False)
+        for sub in list(self._subs):
+            if not sub.wants(message) or sub.lagged:
+                continue
+            try:
+                sub.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow consumer: end its stream; the client resumes from its cursor
+                sub.lagged = True
+                logger.warning("Chat stream subscriber lagged; closing it")
+
+    async def _tail(self, db):
+        """Pick up messages stored by other processes."""
+        failures = 0
+        while True:
+            try:
+                if self._tail_cursor is None:
+                    latest = await db.chat_messages.find_one(
+                        {}, {"_id": 0, "created_at": 1, "id": 1}, sort=[("created_at", -1), ("id", -1)]
+                    )
+                    self._tail_cursor = message_cursor(latest) if latest else ""
+                await asyncio.sleep(self.tail_interval)
+                new = await db.chat_messages.find(
+                    after_cursor(self._tail_cursor), {"_id": 0}
+                ).sort([("created_at", 1), ("id", 1)]).to_list(500)
+                for message in new:
+                    self.publish(message)
+                    self._tail_cursor = message_cursor(message)
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                delay = min(self.tail_interval * 2 ** failures, TAIL_MAX_BACKOFF)
+                logger.error(f"Chat tail query failed ({failures} in a row), retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+
+
+def sse_event(message: dict) -> str:
+    """Format one chat message as a Server-Sent Event. The id is the resume cursor."""
+    return f"id: {message_cursor(message)}\nevent: message\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,108 @@
+import importlib.util
+import io
+import logging
+import os
+from functools import cache
+from typing import Optional
+
+from cpu_pool import run_in_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_DIMENSION = int(os.environ.get("IMAGE_MAX_DIMENSION", "1280"))  # Telegram shows photos at up to 1280px
+TARGET_BYTES = int(os.environ.get("IMAGE_TARGET_BYTES", str(300 * 1024)))
+THUMBNAIL_DIMENSION = 160
+JPEG_QUALITIES = (85, 78, 70, 62, 55)
+THUMBNAIL_QUALITY = 70
+
+# What Telegram's sendPhoto accepts; anything else (BMP, HEIC, AVIF...) must be
+# converted first, which needs Pillow (and a plugin, for HEIC / AVIF)
+SENDABLE_MIME_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+
+# (magic prefix, offset, mime)
+_SIGNATURES = [
+    (b"\xff\xd8\xff", 0, "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png"),
+    (b"GIF87a", 0, "image/gif"),
+    (b"GIF89a", 0, "image/gif"),
+    (b"WEBP", 8, "image/webp"),
+    (b"BM", 0, "image/bmp"),
+    (b"ftypheic", 4, "image/heic"),
+    (b"ftypavif", 4, "image/avif"),
+]
+
+
+@cache
+def pillow_available() -> bool:
+    """Whether Pillow is installed, without importing it: only the pool's worker
+    processes load it. Optional; without it images are stored and sent as received."""
+    return importlib.util.find_spec("PIL") is not None
+
+
+def sniff_mime(data: bytes) -> Optional[str]:
+    """MIME type from the file signature, or None if it isn't a known image format."""
+    for magic, offset, mime in _SIGNATURES:
+        if data[offset:offset + len(magic)] == magic:
+            return mime
+    return None
+
+
+def _encode(image, fmt: str, **options) -> bytes:
+    out = io.BytesIO()
+    image.save(out, fmt, **options)
+    return out.getvalue()
+
+
+def _recompress(image, has_alpha: bool) -> tuple[bytes, str]:
+    """Smallest acceptable encoding: PNG for transparency, otherwise JPEG at the
+    highest quality that fits TARGET_BYTES (or the lowest quality tried)."""
+    if has_alpha:
+        return _encode(image, "PNG", optimize=True), "image/png"
+    data = b""
+    for quality in JPEG_QUALITIES:
+        data = _encode(image, "JPEG", quality=quality, optimize=True, progressive=True)
+        if len(data) <= TARGET_BYTES:
+            break
+    return data, "image/jpeg"
+
+
+def process_image(data: bytes) -> dict:
+    """Normalize one image (runs in the pool): apply EXIF orientation, strip all
+    metadata, downscale to MAX_DIMENSION, recompress towards TARGET_BYTES and make a
+    THUMBNAIL_DIMENSION JPEG thumbnail.
+
+    Returns {data, mime, width, height, thumbnail, thumbnail_mime}. Animated images,
+    unknown formats and anything Pillow can't open are returned unchanged without a
+    thumbnail."""
+    mime = sniff_mime(data) or "application/octet-stream"
+    result = {"data": data, "mime": mime, "width": None, "height": None, "thumbnail": None, "thumbnail_mime": None}
+    if not pillow_available() or not mime.startswith("image/"):
+        return result
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            if getattr(source, "n_frames", 1) > 1:
+                return result
+            image = ImageOps.exif_transpose(source)
+            has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+            image = image.convert("RGBA" if has_alpha else "RGB")
+            # Re-encoding from pixels drops EXIF, GPS, ICC and text chunks
+            image.info = {}
+            image.thumbnail((MAX_DIMENSION, MAX_DIMENSION), Image.LANCZOS)
+            encoded, encoded_mime = _recompress(image, has_alpha)
+            result.update(data=encoded, mime=encoded_mime, width=image.width, height=image.height)
+
+            thumb = image.convert("RGB")
+            thumb.thumbnail((THUMBNAIL_DIMENSION, THUMBNAIL_DIMENSION), Image.LANCZOS)
+            result.update(thumbnail=_encode(thumb, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True), thumbnail_mime="image/jpeg")
+    except Exception as e:
+        logger.warning(f"Image processing failed ({mime}, {len(data)} bytes): {e}")
+    return result
+
+
+async def normalize_image(data: bytes) -> dict:
+    """process_image in the CPU pool, off the event loop."""
+    if not pillow_available():
+        return process_image(data)  # signature sniffing only; cheap
+    return await run_in_pool(process_image, data)
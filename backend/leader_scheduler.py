@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from metrics import SCHEDULER_JOB_LATENCY
+
+logger = logging.getLogger(__name__)
+
+LEASE_TTL = timedelta(seconds=int(os.environ.get("SCHEDULER_LEASE_TTL", "30")))
+HEARTBEAT_INTERVAL = LEASE_TTL.total_seconds() / 3
+
+
+def make_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class MongoLease:
+    """A named, expiring lock in the `scheduler_leases` collection.
+
+    Each takeover increments `token`. The owner+token pair is checked against the
+    database before each run (`validate`) and on every renewal, which stops a
+    process that lost its lease (GC pause, network partition) from *starting* work.
+    It is not a fencing token on the jobs' own writes: a run already under way when
+    the lease is lost keeps going, so for up to one run the old and new holder can
+    overlap. Leased jobs must therefore be idempotent or claim their work atomically
+    (e.g. find_one_and_delete on a queue document).
+    """
+
+    def __init__(self, db, name: str, owner: str, ttl: timedelta = LEASE_TTL):
+        self.coll = db.scheduler_leases
+        self.name = name
+        self.owner = owner
+        self.ttl = ttl
+        self.token: Optional[int] = None
+        self.expires_at: Optional[datetime] = None
+
+    @property
+    def held(self) -> bool:
+        return self.token is not None and self.expires_at is not None and datetime.now(timezone.utc) < self.expires_at
+
+    async def acquire_or_renew(self) -> bool:
+        now = datetime.now(timezone.utc)
+        expires_at = now + self.ttl
+
+        # Renew if we still own it
+        if self.token is not None:
+            result = await self.coll.update_one(
+                {"_id": self.name, "owner": self.owner, "token": self.token},
+                {"$set": {"expires_at": expires_at}}
+            )
+            if result.matched_count:
+                self.expires_at = expires_at
+                return True
+            logger.warning(f"Lost scheduler lease '{self.name}' (token {self.token})")
+            self.token = None
+
+        # Take over an expired (or released) lease
+        doc = await self.coll.find_one_and_update(
+            {"_id": self.name, "expires_at": {"$lt": now}},
+            {"$set": {"owner": self.owner, "expires_at": expires_at, "acquired_at": now}, "$inc": {"token": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if doc is None:
+            try:
+                await self.coll.insert_one({"_id": self.name, "owner": self.owner, "token": 1, "expires_at": expires_at, "acquired_at": now})
+                doc = {"token": 1}
+            except DuplicateKeyError:
+                self.expires_at = None
+                return False  # someone else holds it
+
+        self.token = doc["token"]
+        self.expires_at = expires_at
+        logger.info(f"Acquired scheduler lease '{self.name}' (token {self.token})")
+        return True
+
+    async def validate(self) -> bool:
+        """Check against the database that we still hold the lease, right before
+        starting guarded work. Says nothing about work already running."""
+        if not self.held:
+            return False
+        found = await self.coll.count_documents(
+            {"_id": self.name, "owner": self.owner, "token": self.token, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+            limit=1
+        )
+        return found == 1
+
+    async def release(self):
+        if self.token is None:
+            return
+        # Expire immediately so a standby takes over on its next heartbeat
+        await self.coll.update_one(
+            {"_id": self.name, "owner": self.owner, "token": self.token},
+            {"$set": {"expires_at": datetime(1970, 1, 1, tzinfo=timezone.utc)}}
+        )
+        self.token = None
+        self.expires_at = None
+
+
+class LeasedScheduler:
+    """The backend's only scheduler. Safe under `uvicorn --workers N`: every process
+    registers the same jobs, but each job only runs in the process holding its lease.
+
+    - interval jobs run on APScheduler; the wrapper skips the run unless the lease validates
+    - long-running tasks (e.g. the reminder worker) are started when the lease is acquired
+      and cancelled when a heartbeat finds it lost
+
+    Leadership is exclusive at the start of each run, not for its whole duration (see
+    MongoLease), so jobs must tolerate a brief overlap with a new leader.
+    """
+
+    def __init__(self, db, owner: Optional[str] = None):
+        self.db = db
+        self.owner = owner or make_owner_id()
+        self.scheduler = None  # APScheduler is imported and built in start()
+        self._interval_jobs: list[tuple[Callable, str, dict]] = []
+        self.leases: dict[str, MongoLease] = {}
+        self.tasks: dict[str, Callable[[], Awaitable[None]]] = {}
+        self._running: dict[str, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def _lease(self, name: str) -> MongoLease:
+        if name not in self.leases:
+            self.leases[name] = MongoLease(self.db, name, self.owner)
+        return self.leases[name]
+
+    def add_interval_job(self, func: Callable[[], Awaitable[None]], name: Optional[str] = None, **interval):
+        name = name or func.__name__
+        lease = self._lease(name)
+
+        async def run_if_leader():
+            if not await lease.validate():
+                return
+            try:
+                with SCHEDULER_JOB_LATENCY.time(job=name):
+                    await func()
+            except Exception as e:
+                logger.error(f"Scheduled job '{name}' failed: {e}")
+
+        self._interval_jobs.append((run_if_leader, name, interval))
+
+    def add_leased_task(self, name: str, factory: Callable[[], Awaitable[None]]):
+        self._lease(name)
+        self.tasks[name] = factory
+
+    async def _tick(self):
+        for name, lease in self.leases.items():
+            try:
+                await lease.acquire_or_renew()
+            except Exception as e:
+                logger.error(f"Lease heartbeat for '{name}' failed: {e}")
+
+            if name not in self.tasks:
+                continue
+            task = self._running.get(name)
+            if lease.held and (task is None or task.done()):
+                self._running[name] = asyncio.create_task(self.tasks[name]())
+            elif not lease.held and task and not task.done():
+                logger.warning(f"Stopping '{name}': lease lost")
+                task.cancel()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            await self._tick()
+
+    async def start(self):
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+        await self._tick()
+        self.scheduler = AsyncIOScheduler()
+        for func, name, interval in self._interval_jobs:
+            self.scheduler.add_job(func, 'interval', id=name, name=name, **interval)
+        self.scheduler.start()
+        self._heartbeat = asyncio.create_task(self._heartbeat_loop())
+        owned = [name for name, lease in self.leases.items() if lease.held]
+        logger.info(f"Scheduler started as {self.owner}; leading: {', '.join(owned) or 'none'}")
+
+    async def shutdown(self):
+        if self._heartbeat:
+            self._heartbeat.cancel()
+        for task in self._running.values():
+            task.cancel()
+        if self.scheduler:
+            self.scheduler.shutdown(wait=False)
+        for lease in self.leases.values():
+            try:
+                await lease.release()
+            except Exception as e:
+                logger.error(f"Failed to release lease '{lease.name}': {e}")
+
+    def status(self) -> dict:
+        return {
+            "owner": self.owner,
+            "leases": {
+                name: {"held": lease.held, "token": lease.token}
+                for name, lease in self.leases.items()
+            }
+        }
@@ -0,0 +1,231 @@
+import asyncio
+import bisect
+import threading
+import time
+from typing import Callable
+
+from pymongo import monitoring
+
+# Latency buckets in seconds, shared by every histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # pymongo listeners call in from driver threads
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def time(self, **labels) -> "_Timer":
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = super().render()
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = _labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {state[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {state[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {state[-1]}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Gauge whose value is computed at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name, doc, callback: Callable[[], float]):
+        super().__init__(name, doc)
+        self.callback = callback
+
+    def render(self):
+        lines = super().render()
+        try:
+            lines.append(f"{self.name} {float(self.callback())}")
+        except Exception:
+            pass
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        labels = dict(self.labels)
+        if "outcome" in self.histogram.labelnames and "outcome" not in labels:
+            labels["outcome"] = "error" if exc_type else "ok"
+        self.histogram.observe(time.perf_counter() - self.start, **labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric):
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---- Metric definitions ----
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+MONGO_LATENCY = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ("collection", "command", "outcome"))
+TELEGRAM_LATENCY = Histogram("telegram_api_duration_seconds", "Telegram Bot API call latency", ("method", "status"))
+TELEGRAM_RETRIES = Counter("telegram_api_retries_total", "Telegram Bot API call retries", ("method",))
+TELEGRAM_RATE_LIMITED = Counter("telegram_api_rate_limited_total", "Telegram 429 responses", ("method",))
+WEBHOOK_DUPLICATES = Counter("telegram_webhook_duplicates_total", "Redelivered webhook updates skipped, by where they were caught", ("layer",))
+AI_LATENCY = Histogram("ai_provider_duration_seconds", "LLM provider call latency", ("provider", "outcome"))
+SCHEDULER_JOB_LATENCY = Histogram("scheduler_job_duration_seconds", "Scheduled job run time", ("job", "outcome"),
+                                  buckets=(0.1, 0.5, 1, 5, 15, 60, 300, 900, 3600))
+SUBSCRIPTION_MATCH_LATENCY = Histogram("subscription_match_duration_seconds", "Matching a new job against saved subscriptions",
+                                       buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01, 0.05))
+ASYNCIO_TASKS = Gauge("asyncio_tasks", "Live asyncio tasks in this process", lambda: len(asyncio.all_tasks()))
+
+
+# ---- Mongo command monitoring ----
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records every driver command; pass to the client via event_listeners."""
+
+    _SKIP = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions"}
+
+    def __init__(self):
+        self._collections: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in self._SKIP:
+            return
+        target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        if event.command_name == "getMore":
+            collection = event.command.get("collection", "")
+        with self._lock:
+            self._collections[event.request_id] = collection
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            collection = self._collections.pop(event.request_id, None)
+        if collection is None:
+            return
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, collection=collection, command=event.command_name, outcome=outcome)
+
+    def succeeded(self, event):
+        self._finish(event, "ok")
+
+    def failed(self, event):
+        self._finish(event, "error")
+
+
+# ---- HTTP middleware ----
+class MetricsMiddleware:
+    """Pure ASGI middleware (does not buffer streaming responses) recording latency
+    and status per route template, e.g. /api/jobs/{job_id} rather than raw paths."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "other"
+            labels = {"method": scope.get("method", ""), "route": path, "status": str(status["code"])}
+            HTTP_LATENCY.observe(time.perf_counter() - start, **labels)
+            HTTP_REQUESTS.inc(**labels)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,217 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "x-profile"
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+PROFILE_BUFFER_SIZE = int(os.environ.get("PROFILE_BUFFER_SIZE", "20"))
+MAX_STACK_DEPTH = 128
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _coro_frame(coro):
+    return getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+
+
+def _coro_awaiting(coro):
+    return getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+
+
+class ActiveProfile:
+    def __init__(self, task: asyncio.Task, root_frame, thread_id: int, method: str, path: str, trigger: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.root_frame = root_frame
+        self.thread_id = thread_id
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.route = ""
+        self.status = 0
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def sample(self, thread_frames: dict):
+        """Record the request's current stack, root at this middleware.
+
+        A running task is read from the loop thread's frames. A suspended one is
+        walked through its coroutines (cr_await), so time spent waiting on Mongo or
+        HTTP shows up under the line that awaits it.
+        """
+        coro = self.task.get_coro()
+        if getattr(coro, "cr_running", False):
+            stack = self._running_stack(thread_frames.get(self.thread_id))
+        else:
+            stack = self._awaiting_stack(coro)
+        if not stack:
+            return
+        self.stacks[";".join(stack)] += 1
+        self.samples += 1
+
+    def _running_stack(self, frame) -> list[str]:
+        labels = []
+        while frame is not None and len(labels) < MAX_STACK_DEPTH:
+            labels.append(_frame_label(frame))
+            if frame is self.root_frame:
+                return labels[::-1]
+            frame = frame.f_back
+        return []  # another task is on the loop thread
+
+    def _awaiting_stack(self, coro) -> list[str]:
+        stack = []
+        recording = False
+        while coro is not None and len(stack) < MAX_STACK_DEPTH:
+            frame = _coro_frame(coro)
+            if frame is None:
+                if recording:
+                    stack.append(f"<await {type(coro).__name__}>")
+                break
+            if frame is self.root_frame:
+                recording = True  # skip server/framework frames above the middleware
+            if recording:
+                stack.append(_frame_label(frame))
+            coro = _coro_awaiting(coro)
+        return stack
+
+    def finish(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - self.start) * 1000, 2),
+            "samples": self.samples,
+            "interval_ms": PROFILE_INTERVAL_MS,
+            "stacks": dict(self.stacks),
+        }
+
+
+class Profiler:
+    """Wall-clock stack sampler for individual requests.
+
+    A single daemon thread samples every active profile at PROFILE_INTERVAL_MS and
+    only runs while at least one request is being profiled. Finished profiles are
+    kept in a ring buffer of the last PROFILE_BUFFER_SIZE requests.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, buffer_size: int = PROFILE_BUFFER_SIZE):
+        self.interval = interval_ms / 1000
+        self.profiles: deque[dict] = deque(maxlen=buffer_size)
+        self._active: set[ActiveProfile] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, profile: ActiveProfile):
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def end(self, profile: ActiveProfile):
+        with self._lock:
+            self._active.discard(profile)
+        self.profiles.append(profile.finish())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in active:
+                try:
+                    profile.sample(frames)
+                except Exception:
+                    # The loop thread mutates coroutine state under us; drop the sample
+                    pass
+            del frames
+            time.sleep(self.interval)
+
+    def summaries(self) -> list[dict]:
+        return [{k: v for k, v in p.items() if k != "stacks"} for p in reversed(self.profiles)]
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return next((p for p in self.profiles if p["id"] == profile_id), None)
+
+
+def collapsed_stacks(profile: dict) -> str:
+    """Brendan Gregg's collapsed format, accepted by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(profile["stacks"].items()))
+
+
+profiler = Profiler()
+
+
+class ProfilerMiddleware:
+    """Profiles a request when an admin sends `X-Profile: 1`, or at random with
+    PROFILE_SAMPLE_RATE. Anything else goes straight through to the app.
+
+    `authorize` receives the Authorization header and returns whether it belongs
+    to an admin.
+    """
+
+    def __init__(self, app, authorize: Callable[[str], Awaitable[bool]], sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.authorize = authorize
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trigger = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            trigger = "sampled"
+        else:
+            headers = dict(scope.get("headers") or [])
+            if headers.get(PROFILE_HEADER.encode()) == b"1":
+                auth = headers.get(b"authorization", b"").decode("latin-1")
+                if await self.authorize(auth):
+                    trigger = "header"
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = ActiveProfile(
+            asyncio.current_task(), sys._getframe(), threading.get_ident(),
+            scope.get("method", ""), scope.get("path", ""), trigger
+        )
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        profiler.begin(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.route = getattr(scope.get("route"), "path", "") or ""
+            profiler.end(profile)
@@ -0,0 +1,543 @@
+import hashlib
+import html
+import io
+import json
+import logging
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+from cpu_pool import run_in_pool
+
+try:
+    from fontTools import subset as font_subset
+except ImportError:  # optional: embedded PDF fonts are shipped whole
+    font_subset = None
+
+logger = logging.getLogger(__name__)
+logging.getLogger("fontTools.subset").setLevel(logging.ERROR)  # per-table "not subset" chatter
+
+# Layout settings per template. HTML and PDF output share the same section order.
+TEMPLATES = {
+    "classic": {"name_size": 22, "heading_size": 12, "body_size": 10, "accent": "#1f2937", "accent_rgb": (0.12, 0.16, 0.22), "line_gap": 1.35},
+    "modern": {"name_size": 24, "heading_size": 12, "body_size": 10, "accent": "#2563eb", "accent_rgb": (0.15, 0.39, 0.92), "line_gap": 1.4},
+    "compact": {"name_size": 18, "heading_size": 11, "body_size": 9, "accent": "#111827", "accent_rgb": (0.07, 0.09, 0.15), "line_gap": 1.25},
+}
+FORMATS = {"pdf": "application/pdf", "html": "text/html; charset=utf-8"}
+
+
+class RenderCache:
+    """Byte-bounded LRU of rendered output keyed by content hash."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._items.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._items.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        if key in self._items:
+            self._size -= len(self._items.pop(key))
+        self._items[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted)
+
+
+render_cache = RenderCache(int(os.environ.get("RENDER_CACHE_MB", "64")) * 1024 * 1024)
+
+
+def render_key(content: dict, template: str, fmt: str) -> str:
+    """Stable hash of everything that affects the rendered bytes."""
+    canonical = json.dumps(content, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{fmt}\0{template}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+# ---- Content helpers ----
+def _text(value) -> str:
+    return str(value).strip() if value is not None else ""
+
+def _contact_line(content: dict) -> str:
+    fields = ("email", "phone", "location", "linkedin", "github")
+    return "  |  ".join(_text(content.get(f)) for f in fields if _text(content.get(f)))
+
+def _sections(content: dict) -> list[tuple[str, list]]:
+    """Normalize resume content into (heading, entries) pairs, skipping empty sections.
+    Each entry is (title, subtitle, bullets)."""
+    sections = []
+    summary = _text(content.get("summary"))
+    if summary:
+        sections.append(("Summary", [("", "", [summary])]))
+
+    experience = []
+    for exp in content.get("experience") or []:
+        if not isinstance(exp, dict):
+            continue
+        title = " - ".join(p for p in (_text(exp.get("title")), _text(exp.get("company"))) if p)
+        bullets = [_text(b) for b in exp.get("bullets") or [] if _text(b)]
+        experience.append((title, _text(exp.get("dates")), bullets))
+    if experience:
+        sections.append(("Experience", experience))
+
+    education = []
+    for edu in content.get("education") or []:
+        if not isinstance(edu, dict):
+            continue
+        title = " - ".join(p for p in (_text(edu.get("degree")), _text(edu.get("school"))) if p)
+        education.append((title, _text(edu.get("year")), []))
+    if education:
+        sections.append(("Education", education))
+
+    skills = [_text(s) for s in content.get("skills") or [] if _text(s)]
+    if skills:
+        sections.append(("Skills", [("", "", [", ".join(skills)])]))
+    return sections
+
+
+# ---- HTML ----
+def render_html(content: dict, template: str = "classic") -> str:
+    style = TEMPLATES[template]
+    e = html.escape
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">",
+        f"<title>{e(_text(content.get('name')) or 'Resume')}</title>",
+        "<style>",
+        f"body{{font-family:Helvetica,Arial,sans-serif;font-size:{style['body_size'] + 1}pt;line-height:{style['line_gap']};color:#111;max-width:800px;margin:24px auto;padding:0 24px}}",
+        f"h1{{font-size:{style['name_size']}pt;margin:0;color:{style['accent']}}}",
+        f"h2{{font-size:{style['heading_size'] + 1}pt;color:{style['accent']};border-bottom:1px solid {style['accent']};margin:18px 0 6px;text-transform:uppercase}}",
+        ".position{font-size:12pt;color:#444}.contact{color:#555;margin-top:4px}",
+        ".entry{margin-bottom:8px}.entry-head{display:flex;justify-content:space-between;font-weight:bold}",
+        ".dates{font-weight:normal;color:#555}ul{margin:4px 0 0 18px;padding:0}p{margin:0}",
+        "</style></head><body>",
+        f"<h1>{e(_text(content.get('name')))}</h1>",
+    ]
+    if _text(content.get("position")):
+        parts.append(f"<div class=\"position\">{e(_text(content.get('position')))}</div>")
+    contact = _contact_line(content)
+    if contact:
+        parts.append(f"<div class=\"contact\">{e(contact)}</div>")
+
+    for heading, entries in _sections(content):
+        parts.append(f"<h2>{e(heading)}</h2>")
+        for title, subtitle, bullets in entries:
+            parts.append("<div class=\"entry\">")
+            if title or subtitle:
+                parts.append(f"<div class=\"entry-head\"><span>{e(title)}</span><span class=\"dates\">{e(subtitle)}</span></div>")
+            if title or subtitle or len(bullets) > 1:
+                if bullets:
+                    parts.append("<ul>" + "".join(f"<li>{e(b)}</li>" for b in bullets) + "</ul>")
+            else:
+                parts.extend(f"<p>{e(b)}</p>" for b in bullets)
+            parts.append("</div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+# ---- PDF ----
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 595, 842, 50  # A4 in points
+
+# Text outside cp1252 (Devanagari, Telugu, CJK, ...) can't be drawn with the built-in
+# Helvetica, so such resumes embed a TrueType font instead. First existing file wins.
+UNICODE_FONT_CANDIDATES = [
+    (os.environ.get("RESUME_FONT"), os.environ.get("RESUME_FONT_BOLD")),
+    ("/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf", "/usr/share/fonts/truetype/noto/NotoSans-Bold.ttf"),
+    ("/usr/share/fonts/noto/NotoSans-Regular.ttf", "/usr/share/fonts/noto/NotoSans-Bold.ttf"),
+    ("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"),
+]
+
+
+class UnsupportedTextError(ValueError):
+    """The resume contains characters no available PDF font can draw."""
+
+
+class _Type1Font:
+    """Built-in Helvetica with WinAnsi (cp1252) encoding; nothing to embed."""
+    # Approximate Helvetica advance widths (per 1000 units) for line wrapping
+    _NARROW = set("ijl.,:;'!|I ")
+    _WIDE = set("mwMW@")
+    object_count = 1
+
+    def __init__(self, base_font: str, bold: bool = False):
+        self.base_font = base_font
+        self.bold = bold
+
+    def width(self, text: str, size: float) -> float:
+        units = 0
+        for ch in text:
+            if ch in self._NARROW:
+                units += 278
+            elif ch in self._WIDE:
+                units += 833
+            elif ch.isupper() or ch.isdigit():
+                units += 667 if ch.isupper() else 556
+            else:
+                units += 520
+        return units * size / 1000 * (1.06 if self.bold else 1.0)
+
+    def encode(self, text: str) -> bytes:
+        raw = text.encode("cp1252")
+        return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+    def pdf_objects(self, first_num: int) -> list[bytes]:
+        return [b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % self.base_font.encode()]
+
+
+class _TrueTypeFont:
+    """A TrueType file embedded whole as a CIDFontType2 with Identity-H encoding,
+    so strings are glyph ids and a ToUnicode map keeps the text copyable/searchable.
+    Glyphs are mapped one-to-one from the cmap: there is no shaping, so conjuncts in
+    scripts like Devanagari come out as their unjoined component glyphs."""
+    object_count = 5
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.path = path
+        tables = {}
+        num_tables = struct.unpack_from(">H", self.data, 4)[0]
+        for i in range(num_tables):
+            tag, _, offset, length = struct.unpack_from(">4sIII", self.data, 12 + 16 * i)
+            tables[tag.decode("latin-1")] = (offset, length)
+        missing = {"head", "hhea", "hmtx", "cmap", "glyf"} - tables.keys()
+        if missing:
+            raise ValueError(f"{path} is not a TrueType font (missing {', '.join(sorted(missing))})")
+
+        head = tables["head"][0]
+        self.units_per_em = struct.unpack_from(">H", self.data, head + 18)[0]
+        self.bbox = struct.unpack_from(">hhhh", self.data, head + 36)
+        hhea = tables["hhea"][0]
+        self.ascent, self.descent = struct.unpack_from(">hh", self.data, hhea + 4)
+        num_metrics = struct.unpack_from(">H", self.data, hhea + 34)[0]
+        hmtx = tables["hmtx"][0]
+        self.advances = [struct.unpack_from(">H", self.data, hmtx + 4 * i)[0] for i in range(num_metrics)]
+        self.cap_height = self.ascent
+        if "OS/2" in tables:
+            os2, length = tables["OS/2"]
+            if struct.unpack_from(">H", self.data, os2)[0] >= 2 and length >= 90:
+                self.cap_height = struct.unpack_from(">h", self.data, os2 + 88)[0]
+        self.cmap = self._read_cmap(tables["cmap"][0])
+        stem = os.path.splitext(os.path.basename(path))[0]
+        self.base_font = "".join(c for c in stem if c.isascii() and c.isalnum() or c == "-") or "Embedded"
+        self.used: dict[int, str] = {}  # glyph id -> first character drawn with it
+
+    def _read_cmap(self, cmap: int) -> dict[int, int]:
+        subtables = {}
+        for i in range(struct.unpack_from(">H", self.data, cmap + 2)[0]):
+            platform, encoding, offset = struct.unpack_from(">HHI", self.data, cmap + 4 + 8 * i)
+            subtables[(platform, encoding)] = cmap + offset
+        # Prefer full-repertoire (format 12) Unicode tables over BMP-only ones
+        for key in ((3, 10), (0, 4), (0, 6), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0)):
+            if key not in subtables:
+                continue
+            offset = subtables[key]
+            fmt = struct.unpack_from(">H", self.data, offset)[0]
+            if fmt == 12:
+                return self._read_cmap12(offset)
+            if fmt == 4:
+                return self._read_cmap4(offset)
+        raise ValueError(f"{self.path} has no Unicode cmap")
+
+    def _read_cmap4(self, offset: int) -> dict[int, int]:
+        seg_count = struct.unpack_from(">H", self.data, offset + 6)[0] // 2
+        ends = struct.unpack_from(f">{seg_count}H", self.data, offset + 14)
+        starts_at = offset + 16 + 2 * seg_count
+        starts = struct.unpack_from(f">{seg_count}H", self.data, starts_at)
+        deltas = struct.unpack_from(f">{seg_count}h", self.data, starts_at + 2 * seg_count)
+        range_at = starts_at + 4 * seg_count
+        range_offsets = struct.unpack_from(f">{seg_count}H", self.data, range_at)
+        cmap = {}
+        for i in range(seg_count):
+            for code in range(starts[i], ends[i] + 1):
+                if code == 0xFFFF:
+                    continue
+                if range_offsets[i] == 0:
+                    glyph = (code + deltas[i]) & 0xFFFF
+                else:
+                    at = range_at + 2 * i + range_offsets[i] + 2 * (code - starts[i])
+                    glyph = struct.unpack_from(">H", self.data, at)[0]
+                    if glyph:
+                        glyph = (glyph + deltas[i]) & 0xFFFF
+                if glyph:
+                    cmap[code] = glyph
+        return cmap
+
+    def _read_cmap12(self, offset: int) -> dict[int, int]:
+        groups = struct.unpack_from(">I", self.data, offset + 12)[0]
+        cmap = {}
+        for i in range(groups):
+            start, end, glyph = struct.unpack_from(">III", self.data, offset + 16 + 12 * i)
+            for code in range(start, end + 1):
+                cmap[code] = glyph + code - start
+        return cmap
+
+    def _subset(self) -> bytes:
+        """The font cut down to the glyphs this document used, keeping glyph ids
+        (the content streams and /W refer to them). Whole font without fontTools."""
+        if font_subset is None:
+            return self.data
+        options = font_subset.Options()
+        options.retain_gids = True
+        options.notdef_outline = True
+        options.layout_features = []
+        options.name_IDs = ["*"]
+        try:
+            font = font_subset.load_font(io.BytesIO(self.data), options)
+            subsetter = font_subset.Subsetter(options)
+            subsetter.populate(gids=sorted({0, *self.used}))
+            subsetter.subset(font)
+            out = io.BytesIO()
+            font_subset.save_font(font, out, options)
+            return out.getvalue()
+        except Exception as e:
+            logger.warning(f"Font subsetting failed for {self.path}, embedding it whole: {e}")
+            return self.data
+
+    def _advance(self, glyph: int) -> int:
+        return self.advances[min(glyph, len(self.advances) - 1)]
+
+    def missing(self, text: str) -> set[str]:
+        return {ch for ch in text if ord(ch) not in self.cmap and not ch.isspace()}
+
+    def width(self, text: str, size: float) -> float:
+        units = sum(self._advance(self.cmap.get(ord(ch), 0)) for ch in text)
+        return units * size / self.units_per_em
+
+    def encode(self, text: str) -> bytes:
+        glyphs = []
+        for ch in text:
+            glyph = self.cmap.get(ord(ch), 0)
+            self.used.setdefault(glyph, ch)
+            glyphs.append(glyph)
+        return b"<" + b"".join(b"%04X" % g for g in glyphs) + b">"
+
+    def pdf_objects(self, first_num: int) -> list[bytes]:
+        """Type0 font at `first_num`, then its CIDFont, descriptor, font file and ToUnicode CMap."""
+        scale = 1000 / self.units_per_em
+        name = self.base_font.encode()
+        widths = b" ".join(b"%d [%d]" % (g, round(self._advance(g) * scale)) for g in sorted(self.used))
+        cid_font, descriptor, font_file, to_unicode = range(first_num + 1, first_num + 5)
+        font_data = self._subset()
+        file_stream = zlib.compress(font_data, 6)
+        mappings = sorted((g, ch) for g, ch in self.used.items() if g)
+        cmap_lines = [
+            b"/CIDInit /ProcSet findresource begin 12 dict begin begincmap",
+            b"/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def",
+            b"/CMapName /Adobe-Identity-UCS def /CMapType 2 def",
+            b"1 begincodespacerange <0000> <FFFF> endcodespacerange",
+        ]
+        for i in range(0, len(mappings), 100):  # bfchar blocks hold at most 100 entries
+            block = mappings[i:i + 100]
+            cmap_lines.append(b"%d beginbfchar" % len(block))
+            cmap_lines.extend(b"<%04X> <%s>" % (g, ch.encode("utf-16-be").hex().upper().encode()) for g, ch in block)
+            cmap_lines.append(b"endbfchar")
+        cmap_lines.append(b"endcmap CMapName currentdict /CMap defineresource pop end end")
+        cmap_stream = b"\n".join(cmap_lines)
+        x_min, y_min, x_max, y_max = (round(v * scale) for v in self.bbox)
+        return [
+            b"<< /Type /Font /Subtype /Type0 /BaseFont /%s /Encoding /Identity-H /DescendantFonts [%d 0 R] /ToUnicode %d 0 R >>"
+            % (name, cid_font, to_unicode),
+            b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /%s /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >>"
+            b" /FontDescriptor %d 0 R /W [%s] /CIDToGIDMap /Identity >>" % (name, descriptor, widths),
+            b"<< /Type /FontDescriptor /FontName /%s /Flags 32 /FontBBox [%d %d %d %d] /ItalicAngle 0 /Ascent %d /Descent %d"
+            b" /CapHeight %d /StemV 80 /FontFile2 %d 0 R >>"
+            % (name, x_min, y_min, x_max, y_max, round(self.ascent * scale), round(self.descent * scale),
+               round(self.cap_height * scale), font_file),
+            b"<< /Length %d /Length1 %d /Filter /FlateDecode >>\nstream\n" % (len(file_stream), len(font_data))
+            + file_stream + b"\nendstream",
+            b"<< /Length %d >>\nstream\n" % len(cmap_stream) + cmap_stream + b"\nendstream",
+        ]
+
+
+def _fits_cp1252(text: str) -> bool:
+    try:
+        text.encode("cp1252")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+def _pick_fonts(texts: list[str]) -> tuple:
+    """(regular, bold) fonts able to draw every string in `texts`."""
+    if all(_fits_cp1252(t) for t in texts):
+        return _Type1Font("Helvetica"), _Type1Font("Helvetica-Bold", bold=True)
+    for regular_path, bold_path in UNICODE_FONT_CANDIDATES:
+        if not regular_path or not os.path.isfile(regular_path):
+            continue
+        # Parsed per render: the instances track which glyphs this document used
+        regular = _TrueTypeFont(regular_path)
+        bold = _TrueTypeFont(bold_path) if bold_path and os.path.isfile(bold_path) else regular
+        missing = set().union(*(regular.missing(t) | bold.missing(t) for t in texts))
+        if missing:
+            raise UnsupportedTextError(
+                f"The PDF font ({os.path.basename(regular_path)}) has no glyphs for: {''.join(sorted(missing))}. "
+                "Set RESUME_FONT/RESUME_FONT_BOLD to a font covering these characters, or download as HTML."
+            )
+        return regular, bold
+    raise UnsupportedTextError(
+        "This resume contains characters the built-in PDF font can't draw and no Unicode font is installed. "
+        "Set RESUME_FONT to a TrueType font (e.g. Noto Sans), or download as HTML."
+    )
+
+def _wrap(text: str, size: float, width: float, font) -> list[str]:
+    lines, current = [], ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and font.width(candidate, size) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines or [""]
+
+class _PdfLayout:
+    def __init__(self, style: dict, regular, bold):
+        self.style = style
+        self.fonts = {b"F1": regular, b"F2": bold}
+        self.pages: list[list[bytes]] = []
+        self._new_page()
+
+    def _new_page(self):
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def space(self, amount: float):
+        self.y -= amount
+
+    def text(self, text: str, size: float, bold: bool = False, x: float = MARGIN, color=None, right: bool = False):
+        self.ensure(size * self.style["line_gap"])
+        self.y -= size
+        name = b"F2" if bold else b"F1"
+        font = self.fonts[name]
+        if right:
+            x = PAGE_WIDTH - MARGIN - font.width(text, size)
+        r, g, b = color or (0, 0, 0)
+        self.ops.append(
+            b"BT /%s %.1f Tf %.3f %.3f %.3f rg %.2f %.2f Td " % (name, size, r, g, b, x, self.y)
+            + font.encode(text) + b" Tj ET"
+        )
+        self.y -= size * (self.style["line_gap"] - 1)
+
+    def paragraph(self, text: str, size: float, indent: float = 0, bullet: bool = False):
+        width = PAGE_WIDTH - 2 * MARGIN - indent
+        for i, line in enumerate(_wrap(text, size, width, self.fonts[b"F1"])):
+            if bullet and i == 0:
+                self.ensure(size * self.style["line_gap"])
+                self.ops.append(b"BT /F1 %.1f Tf 0 0 0 rg %.2f %.2f Td " % (size, MARGIN + indent - 10, self.y - size) + self.fonts[b"F1"].encode("•") + b" Tj ET")
+            self.text(line, size, x=MARGIN + indent)
+
+    def rule(self, color):
+        r, g, b = color
+        self.ops.append(b"%.3f %.3f %.3f RG 0.7 w %d %.2f m %d %.2f l S" % (r, g, b, MARGIN, self.y, PAGE_WIDTH - MARGIN, self.y))
+
+    def ensure(self, height: float):
+        if self.y - height < MARGIN:
+            self._new_page()
+
+def render_pdf(content: dict, template: str = "classic") -> bytes:
+    """Lay the resume out on A4 pages: built-in Helvetica when every character is in
+    cp1252, otherwise an embedded TrueType font (see UNICODE_FONT_CANDIDATES)."""
+    style = TEMPLATES[template]
+    body, accent = style["body_size"], style["accent_rgb"]
+    sections = _sections(content)
+    texts = [_text(content.get("name")), _text(content.get("position")), _contact_line(content), "•"]
+    for heading, entries in sections:
+        texts.append(heading.upper())
+        for title, subtitle, bullets in entries:
+            texts.extend((title, subtitle, *bullets))
+    regular, bold = _pick_fonts(texts)
+    layout = _PdfLayout(style, regular, bold)
+
+    layout.text(_text(content.get("name")) or "Resume", style["name_size"], bold=True, color=accent)
+    if _text(content.get("position")):
+        layout.text(_text(content.get("position")), body + 2)
+    contact = _contact_line(content)
+    if contact:
+        layout.paragraph(contact, body - 1)
+
+    for heading, entries in sections:
+        layout.ensure(style["heading_size"] * 4)
+        layout.space(body)
+        layout.text(heading.upper(), style["heading_size"], bold=True, color=accent)
+        layout.rule(accent)
+        layout.space(4)
+        for title, subtitle, bullets in entries:
+            if title or subtitle:
+                layout.ensure(body * 3)
+                if subtitle:
+                    layout.text(subtitle, body, right=True)
+                    layout.space(-body * style["line_gap"])
+                layout.text(title, body, bold=True)
+                for bullet in bullets:
+                    layout.paragraph(bullet, body, indent=14, bullet=True)
+                layout.space(3)
+            else:
+                for text in bullets:
+                    layout.paragraph(text, body)
+
+    # Assemble objects: 1 catalog, 2 pages, (page, stream) pairs, then the fonts
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None]
+    font_nums = {}
+    first_font = 3 + 2 * len(layout.pages)
+    for font in dict.fromkeys(layout.fonts.values()):
+        font_nums[id(font)] = first_font
+        first_font += font.object_count
+    font_refs = b" ".join(b"/%s %d 0 R" % (name, font_nums[id(font)]) for name, font in layout.fonts.items())
+    kids = []
+    for ops in layout.pages:
+        stream = zlib.compress(b"\n".join(ops), 6)
+        page_num = len(objects) + 1
+        kids.append(b"%d 0 R" % page_num)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (PAGE_WIDTH, PAGE_HEIGHT, font_refs, page_num + 1)
+        )
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % len(kids)
+    for font in dict.fromkeys(layout.fonts.values()):
+        objects.extend(font.pdf_objects(len(objects) + 1))
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def render_resume(content: dict, template: str, fmt: str) -> bytes:
+    """Process-pool entry point."""
+    if fmt == "pdf":
+        return render_pdf(content, template)
+    return render_html(content, template).encode("utf-8")
+
+
+# ---- Async entry points ----
+async def render_cached(content: dict, template: str, fmt: str) -> tuple[str, bytes]:
+    """Return (etag_key, bytes), rendering in the process pool on a cache miss."""
+    key = render_key(content, template, fmt)
+    data = render_cache.get(key)
+    if data is None:
+        data = await run_in_pool(render_resume, content, template, fmt)
+        render_cache.put(key, data)
+    return key, data
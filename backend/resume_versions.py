@@ -0,0 +1,241 @@
+import copy
+import json
+import logging
+from datetime import datetime
+from typing import Any, Optional
+from zoneinfo import ZoneInfo
+
+IST = ZoneInfo('Asia/Kolkata')
+logger = logging.getLogger(__name__)
+
+# Store a full snapshot every N versions so reconstruction replays at most N-1 patches
+SNAPSHOT_INTERVAL = 20
+
+
+class JsonPatchError(ValueError):
+    """Raised when an RFC 6902 patch is malformed or does not apply."""
+
+
+# ---- JSON Pointer (RFC 6901) ----
+def _parse_pointer(pointer: str) -> list[str]:
+    if pointer == "":
+        return []
+    if not isinstance(pointer, str) or not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer!r}")
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def _list_index(container: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (len(token) > 1 and token[0] == "0"):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    limit = len(container) if allow_end else len(container) - 1
+    if index > limit:
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+def _resolve_parent(doc: Any, parts: list[str]) -> Any:
+    node = doc
+    for token in parts[:-1]:
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError(f"Path segment not found: {token!r}")
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_list_index(node, token, allow_end=False)]
+        else:
+            raise JsonPatchError(f"Cannot traverse into {type(node).__name__}")
+    return node
+
+def _get(doc: Any, pointer: str) -> Any:
+    parts = _parse_pointer(pointer)
+    if not parts:
+        return doc
+    parent = _resolve_parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        return parent[token]
+    if isinstance(parent, list):
+        return parent[_list_index(parent, token, allow_end=False)]
+    raise JsonPatchError(f"Path not found: {pointer}")
+
+def _add(doc: Any, pointer: str, value: Any) -> Any:
+    parts = _parse_pointer(pointer)
+    if not parts:
+        return value
+    parent = _resolve_parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        parent[token] = value
+    elif isinstance(parent, list):
+        parent.insert(_list_index(parent, token, allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to {type(parent).__name__}")
+    return doc
+
+def _remove(doc: Any, pointer: str) -> Any:
+    parts = _parse_pointer(pointer)
+    if not parts:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _resolve_parent(doc, parts)
+    token = parts[-1]
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise JsonPatchError(f"Path not found: {pointer}")
+        del parent[token]
+    elif isinstance(parent, list):
+        del parent[_list_index(parent, token, allow_end=False)]
+    else:
+        raise JsonPatchError(f"Path not found: {pointer}")
+    return doc
+
+
+# ---- JSON Patch (RFC 6902) ----
+def _json_equal(a: Any, b: Any) -> bool:
+    """Equality of JSON values per RFC 6902 4.6. Unlike Python's ==, booleans never
+    equal numbers (true != 1); numbers compare by value (1 == 1.0)."""
+    if isinstance(a, bool) or isinstance(b, bool):
+        return type(a) is type(b) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return type(a) is type(b) and a == b
+
+def apply_patch(doc: Any, patch: list[dict]) -> Any:
+    """Apply an RFC 6902 patch and return the new document. The input is not mutated;
+    the whole patch is rejected if any operation fails."""
+    if not isinstance(patch, list):
+        raise JsonPatchError("Patch must be a list of operations")
+    result = copy.deepcopy(doc)
+    for op in patch:
+        if not isinstance(op, dict) or "op" not in op or "path" not in op:
+            raise JsonPatchError(f"Invalid patch operation: {op!r}")
+        kind, path = op["op"], op["path"]
+        if kind in ("add", "replace", "test") and "value" not in op:
+            raise JsonPatchError(f"'{kind}' operation requires a value")
+        if kind in ("move", "copy") and "from" not in op:
+            raise JsonPatchError(f"'{kind}' operation requires 'from'")
+
+        if kind == "add":
+            result = _add(result, path, copy.deepcopy(op["value"]))
+        elif kind == "remove":
+            result = _remove(result, path)
+        elif kind == "replace":
+            _get(result, path)  # target must exist
+            if _parse_pointer(path):
+                result = _remove(result, path)
+            result = _add(result, path, copy.deepcopy(op["value"]))
+        elif kind == "move":
+            if path != op["from"] and path.startswith(op["from"] + "/"):
+                raise JsonPatchError("Cannot move a value into one of its children")
+            value = _get(result, op["from"])
+            result = _remove(result, op["from"])
+            result = _add(result, path, value)
+        elif kind == "copy":
+            result = _add(result, path, copy.deepcopy(_get(result, op["from"])))
+        elif kind == "test":
+            if not _json_equal(_get(result, path), op["value"]):
+                raise JsonPatchError(f"Test failed at {path}")
+        else:
+            raise JsonPatchError(f"Unknown patch operation: {kind!r}")
+    return result
+
+def make_patch(old: Any, new: Any, path: str = "") -> list[dict]:
+    """Compute a compact RFC 6902 patch turning `old` into `new`."""
+    if _json_equal(old, new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key in old:
+            if key not in new:
+                ops.append({"op": "remove", "path": f"{path}/{_escape(key)}"})
+        for key, value in new.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in old:
+                ops.append({"op": "add", "path": child, "value": value})
+            else:
+                ops.extend(make_patch(old[key], value, child))
+        return ops
+    if isinstance(old, list) and isinstance(new, list):
+        ops = []
+        common = min(len(old), len(new))
+        for i in range(common):
+            ops.extend(make_patch(old[i], new[i], f"{path}/{i}"))
+        # Remove from the end so earlier indices stay valid
+        for i in range(len(old) - 1, common - 1, -1):
+            ops.append({"op": "remove", "path": f"{path}/{i}"})
+        for i in range(common, len(new)):
+            ops.append({"op": "add", "path": f"{path}/{i}", "value": new[i]})
+        return ops
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+# ---- Version History ----
+def _encoded_size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+async def record_version(db, resume_id: str, version: int, old_content: Optional[dict], new_content: dict, patch: Optional[list] = None):
+    """Store `version` as a forward patch from version-1, or as a full snapshot on
+    the first version, every SNAPSHOT_INTERVAL versions, when the diff would be
+    larger than the document itself, or when version-1 isn't in the history (resumes
+    saved before versioning, or a failed write) and so can't serve as a base."""
+    if patch is None and old_content is not None:
+        patch = make_patch(old_content, new_content)
+    doc = {
+        "resume_id": resume_id,
+        "version": version,
+        "created_at": datetime.now(IST).isoformat()
+    }
+    try:
+        snapshot = (
+            old_content is None
+            or version <= 1
+            or version % SNAPSHOT_INTERVAL == 0
+            or _encoded_size(patch) >= _encoded_size(new_content)
+            or not await db.resume_versions.find_one({"resume_id": resume_id, "version": version - 1}, {"_id": 1})
+        )
+        if snapshot:
+            doc["snapshot"] = new_content
+        else:
+            doc["patch"] = patch
+        await db.resume_versions.insert_one(doc)
+    except Exception as e:
+        logger.error(f"Failed to record version {version} of resume {resume_id}: {e}")
+
+async def load_version(db, resume_id: str, version: int) -> Optional[dict]:
+    """Rebuild the content of a resume at `version` from the nearest snapshot."""
+    base = await db.resume_versions.find_one(
+        {"resume_id": resume_id, "version": {"$lte": version}, "snapshot": {"$exists": True}},
+        {"_id": 0},
+        sort=[("version", -1)]
+    )
+    if not base:
+        return None
+    content = base["snapshot"]
+    patches = await db.resume_versions.find(
+        {"resume_id": resume_id, "version": {"$gt": base["version"], "$lte": version}},
+        {"_id": 0, "version": 1, "patch": 1, "snapshot": 1}
+    ).sort("version", 1).to_list(SNAPSHOT_INTERVAL)
+
+    expected = base["version"] + 1
+    for entry in patches:
+        if entry["version"] != expected:
+            logger.error(f"Resume {resume_id} history has a gap at version {expected}")
+            return None
+        if "snapshot" in entry:
+            content = entry["snapshot"]
+        else:
+            content = apply_patch(content, entry.get("patch", []))
+        expected += 1
+    if expected - 1 != version:
+        return None
+    return content
@@ -1,16 +1,24 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Request, UploadFile, File, Form
-from fastapi.staticfiles import StaticFiles
-from fastapi.middleware.gzip import GZipMiddleware
+import time
+BOOT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, APIRouter, HTTPException, Request, UploadFile, File, Form, Response
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import UpdateOne
+from urllib.parse import quote
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
+import unicodedata
 import logging
 import asyncio
+import hashlib
+import secrets
 from pathlib import Path
+from collections import OrderedDict
 from pydantic import BaseModel
-from typing import Optional, Any
+from typing import Optional, Any, TYPE_CHECKING
 import uuid
 from datetime import datetime, timezone, timedelta
 from zoneinfo import ZoneInfo
@@ -18,25 +26,48 @@ from zoneinfo import ZoneInfo
 IST = ZoneInfo('Asia/Kolkata')
 import bcrypt
 import jwt
-import httpx
 import certifi
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from ai_engine import process_ai_request
+from leader_scheduler import LeasedScheduler
+from chat_hub import ChatHub, ChatHubFull, after_cursor, sse_event
+from metrics import (
+    MetricsMiddleware, MongoCommandMetrics, render_metrics,
+    TELEGRAM_LATENCY, TELEGRAM_RATE_LIMITED, TELEGRAM_RETRIES, SUBSCRIPTION_MATCH_LATENCY, WEBHOOK_DUPLICATES
+)
+from fast_json import FastJSONResponse, projection, stream_json_array
+from batch_loader import BatchLoader
+from profiler import ProfilerMiddleware, profiler, collapsed_stacks
+from subscriptions import SubscriptionIndex, normalize_filter
+from image_pipeline import SENDABLE_MIME_TYPES, normalize_image, sniff_mime
+from static_files import PrecompressedStaticFiles, SelectiveGZipMiddleware, precompress_directory
+from ai_scheduler import AIRequestScheduler, AISchedulerRejected
+from resume_versions import JsonPatchError, apply_patch, record_version, load_version
+from resume_renderer import TEMPLATES as RESUME_TEMPLATES, FORMATS as RESUME_FORMATS, UnsupportedTextError, render_key, render_cached
+from cpu_pool import shutdown_pool
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url, tlsCAFile=certifi.where())
+client = AsyncIOMotorClient(mongo_url, tlsCAFile=certifi.where(), tz_aware=True, event_listeners=[MongoCommandMetrics()])
 db = client[os.environ['DB_NAME']]
 
 # Config
 JWT_SECRET = os.environ.get('JWT_SECRET', 'fallback_secret')
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN', '')
-TELEGRAM_API = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}"
+# Point at a local fake (bench/fake_telegram.py) for load tests
+TELEGRAM_API_URL = os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_API = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}"
 
 
+# AI request scheduler (shared Groq/Mistral free-tier quota)
+ai_scheduler = AIRequestScheduler(
+    max_concurrency=int(os.environ.get('AI_MAX_CONCURRENCY', '4')),
+    max_pending_per_user=int(os.environ.get('AI_MAX_PENDING_PER_USER', '3')),
+    user_tokens_per_minute=int(os.environ.get('AI_USER_TOKENS_PER_MINUTE', '12000')),
+    queue_timeout=float(os.environ.get('AI_QUEUE_TIMEOUT', '20')),
+)
+
 api_router = APIRouter(prefix="/api")
 
 # Logging
@@ -60,8 +91,10 @@ class AIProcessRequest(BaseModel):
 
 class ResumeModel(BaseModel):
     id: Optional[str] = None
-    title: str
-    content: dict # This holds the JSON structure (name, email, summary, experience, etc.)
+    title: Optional[str] = None
+    content: Optional[dict] = None # This holds the JSON structure (name, email, summary, experience, etc.)
+    patch: Optional[list[dict]] = None # RFC 6902 operations against base_version (instead of content)
+    base_version: Optional[int] = None # Version the client last saw; enables optimistic concurrency
 
 class UserOut(BaseModel):
     id: str
@@ -97,7 +130,7 @@ class JobOut(BaseModel):
     job_type: str
     location: str
     apply_link: str
-    deadline: str
+    deadline: datetime
     posted_by: str
     posted_by_name: str
     created_at: str
@@ -130,6 +163,16 @@ class UserRoleUpdate(BaseModel):
 class TelegramLink(BaseModel):
     telegram_chat_id: str
 
+class NotificationSettings(BaseModel):
+    digest_minutes: int  # 0 = immediate, else one of DIGEST_WINDOWS
+
+class SubscriptionCreate(BaseModel):
+    # Each set field must match (any of its values); empty fields match everything
+    job_types: list[str] = []  # Job / Internship
+    locations: list[str] = []  # Remote / Onsite / Hybrid / city
+    keywords: list[str] = []  # matched against role and company name
+    companies: list[str] = []
+
 # ---- Helpers ----
 def hash_password(password: str) -> str:
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
@@ -137,6 +180,34 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def parse_deadline(value: Any) -> Optional[datetime]:
+    """Parse a stored deadline (ISO string with Z/offset/naive, or datetime) into an aware datetime.
+    Naive strings are treated as IST (what the UI means); naive datetimes come from Mongo and are UTC."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=IST)
+
+def format_deadline(value: Any) -> str:
+    """Deadline as an IST calendar date for messages (YYYY-MM-DD), or '' if unset."""
+    deadline = parse_deadline(value)
+    return deadline.astimezone(IST).strftime("%Y-%m-%d") if deadline else ""
+
+def normalize_deadline(value: Optional[str]) -> Optional[datetime]:
+    """Deadline as written to Mongo: a UTC datetime (stored as a BSON date) or None."""
+    deadline = parse_deadline(value)
+    return deadline.astimezone(timezone.utc) if deadline else None
+
+def active_deadline_filter() -> dict:
+    """Query for jobs whose deadline is still in the future. Matches the partial
+    `deadline_active` indexes, which only contain documents with a date deadline."""
+    return {"deadline": {"$gt": datetime.now(timezone.utc)}}
+
 def create_token(user_id: str, role: str) -> str:
     payload = {
         "user_id": user_id,
@@ -185,6 +256,53 @@ async def require_admin(request: Request) -> dict:
         raise HTTPException(status_code=403, detail="Admin access required")
     return user
 
+async def is_admin_authorization(auth_header: str) -> bool:
+    """Non-raising admin check for middleware (e.g. the request profiler)."""
+    if not auth_header.startswith("Bearer "):
+        return False
+    try:
+        payload = jwt.decode(auth_header.split(" ")[1], JWT_SECRET, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return False
+    user = await db.users.find_one({"id": payload.get("user_id")}, {"_id": 0, "role": 1})
+    return bool(user and user.get("role") == "admin")
+
+# ---- Collection Versions (ETags) ----
+# `collection_versions` holds a counter per collection, bumped by every write that
+# changes what the list endpoints return. Read endpoints turn it into a weak ETag and
+# answer If-None-Match with 304 before touching the data. The epoch (set when the
+# counter is first created) keeps ETags from colliding if the counters are reset.
+async def bump_version(*names: str):
+    for name in names:
+        await db.collection_versions.update_one(
+            {"_id": name},
+            {"$inc": {"version": 1}, "$setOnInsert": {"epoch": uuid.uuid4().hex[:8]}},
+            upsert=True
+        )
+
+async def collection_etag(*names: str, scope: str = "") -> str:
+    docs = await db.collection_versions.find({"_id": {"$in": list(names)}}).to_list(len(names))
+    versions = {d["_id"]: f"{d.get('epoch', '')}.{d.get('version', 0)}" for d in docs}
+    tag = "-".join(f"{name}{versions.get(name, '0')}" for name in names)
+    return f'W/"{tag}{"-" + scope if scope else ""}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on either side
+    bare = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == bare for t in if_none_match.split(","))
+
+def etag_headers(etag: str) -> dict:
+    # Clients may keep a copy but must revalidate every time
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
 # ---- Bot Event Logger ----
 async def log_bot_event(
     event_type: str,
@@ -214,12 +332,92 @@ async def log_bot_event(
     except Exception as e:
         logger.error(f"Failed to log bot event: {e}")
 
+# ---- Chat Storage ----
+chat_hub = ChatHub(max_connections=int(os.environ.get('CHAT_STREAM_MAX_CONNECTIONS', '20')))
+subscription_index = SubscriptionIndex()
+
+async def store_chat_message(doc: dict):
+    """Persist a chat message and push it to connected admin chat streams."""
+    await db.chat_messages.insert_one(doc)
+    doc.pop("_id", None)
+    chat_hub.publish(doc)
+
+# Chat photos are stored once per content hash in `chat_images` (normalized by
+# image_pipeline). Messages only embed the small thumbnail and link to the full image,
+# which is served by /api/chat-images/{id} on demand. That URL is unauthenticated (the
+# admin chat view opens it as a plain link), so the id is random: knowing or holding
+# an image gives no way to find or confirm it. The content hash is a separate field
+# used only for dedupe.
+CHAT_IMAGE_FIELDS = {"_id": 1, "mime": 1, "thumbnail": 1, "thumbnail_mime": 1}
+
+async def store_chat_image(image: dict) -> dict:
+    """Upsert a normalized image (see normalize_image); returns its id and thumbnail."""
+    digest = photo_digest(image["data"])
+    try:
+        stored = await db.chat_images.find_one_and_update(
+            {"digest": digest},
+            {"$setOnInsert": {
+                "_id": secrets.token_urlsafe(24),
+                "digest": digest,
+                "mime": image["mime"],
+                "data": image["data"],
+                "size": len(image["data"]),
+                "width": image.get("width"),
+                "height": image.get("height"),
+                "thumbnail": image.get("thumbnail"),
+                "thumbnail_mime": image.get("thumbnail_mime"),
+                "created_at": datetime.now(timezone.utc)
+            }},
+            projection=CHAT_IMAGE_FIELDS,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:  # a concurrent upsert of the same image won
+        stored = await db.chat_images.find_one({"digest": digest}, CHAT_IMAGE_FIELDS)
+    return stored
+
+async def chat_image_for(photo_bytes: bytes, digest: Optional[str] = None) -> dict:
+    """Stored image for these bytes, normalizing and storing them on first sight."""
+    stored = await db.chat_images.find_one({"digest": digest or photo_digest(photo_bytes)}, CHAT_IMAGE_FIELDS)
+    return stored or await store_chat_image(await normalize_image(photo_bytes))
+
+def chat_image_html(image: dict, alt: str, caption: str = "") -> str:
+    full = f"/api/chat-images/{image['_id']}"
+    if image.get("thumbnail"):
+        thumb = base64.b64encode(image["thumbnail"]).decode("utf-8")
+        img = f'<a href="{full}" target="_blank" rel="noopener"><img src="data:{image["thumbnail_mime"]};base64,{thumb}" alt="{alt}" /></a>'
+    else:
+        img = f'<img src="{full}" alt="{alt}" loading="lazy" />'
+    return f"{img}<br/>{caption}"
+
 # ---- Telegram Helpers ----
-async def send_telegram_message(chat_id: str, text: str, reply_markup: Optional[dict] = None, log_to_chat: bool = True):
-    """Send a Telegram message, optionally with inline keyboard buttons. Includes retry mechanism."""
+if TYPE_CHECKING:
+    import httpx
+
+def http_client(**kwargs) -> "httpx.AsyncClient":
+    """httpx is imported on first use; serving the first request doesn't need it."""
+    import httpx
+    return httpx.AsyncClient(**kwargs)
+
+async def telegram_request(client_http: "httpx.AsyncClient", api_method: str, http_method: str = "POST", **kwargs) -> "httpx.Response":
+    """Call a Bot API method, recording latency and 429s for /metrics."""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        resp = await client_http.request(http_method, f"{TELEGRAM_API}/{api_method}", **kwargs)
+        status = str(resp.status_code)
+        if resp.status_code == 429:
+            TELEGRAM_RATE_LIMITED.inc(method=api_method)
+        return resp
+    finally:
+        TELEGRAM_LATENCY.observe(time.perf_counter() - start, method=api_method, status=status)
+
+async def send_telegram_message(chat_id: str, text: str, reply_markup: Optional[dict] = None, log_to_chat: bool = True) -> bool:
+    """Send a Telegram message, optionally with inline keyboard buttons. Includes retry mechanism.
+    Returns whether Telegram accepted it."""
     if not TELEGRAM_BOT_TOKEN:
         logger.warning("No Telegram bot token configured")
-        return
+        return False
     
     payload: dict[str, Any] = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
     if reply_markup:
@@ -227,7 +425,7 @@ async def send_telegram_message(chat_id: str, text: str, reply_markup: Optional[
         
     if log_to_chat:
         user = await db.users.find_one({"telegram_chat_id": chat_id})
-        await db.chat_messages.insert_one({
+        await store_chat_message({
             "id": str(uuid.uuid4()),
             "chat_id": chat_id,
             "user_id": user["id"] if user else None,
@@ -238,81 +436,168 @@ async def send_telegram_message(chat_id: str, text: str, reply_markup: Optional[
         })
         
     for attempt in range(5): # Retry up to 5 times
+        if attempt:
+            TELEGRAM_RETRIES.inc(method="sendMessage")
         try:
-            async with httpx.AsyncClient() as client_http:
-                resp = await client_http.post(
-                    f"{TELEGRAM_API}/sendMessage",
-                    json=payload
-                )
+            async with http_client() as client_http:
+                resp = await telegram_request(client_http, "sendMessage", json=payload)
                 if resp.status_code == 200:
-                    return
+                    return True
                 elif resp.status_code == 429:
                     retry_after = int(resp.json().get("parameters", {}).get("retry_after", 5))
                     logger.warning(f"Rate limited. Sleeping for {retry_after}s...")
                     await asyncio.sleep(retry_after)
                 else:
                     logger.error(f"Telegram send failed: {resp.text}")
-                    return # Don't retry other errors for now
+                    return False # Don't retry other errors for now
         except Exception as e:
             logger.error(f"Telegram error: {e}")
             await asyncio.sleep(1) # Basic backoff
+    return False
+
+# Telegram redelivers an update until it gets a 2xx, so a slow or failed handler
+# sees the same update_id again. Each id is claimed once: first in a per-process
+# LRU, then by inserting it into `telegram_updates` (unique _id, TTL-expired after
+# Telegram's 24h retention) so redeliveries landing on another worker are caught too.
+WEBHOOK_SEEN_CACHE_SIZE = 4096
+WEBHOOK_UPDATE_TTL_SECONDS = 24 * 3600
+webhook_seen_updates: OrderedDict[int, None] = OrderedDict()
+
+async def claim_update(update_id) -> bool:
+    """True if this update hasn't been processed before (and is now ours)."""
+    if update_id in webhook_seen_updates:
+        webhook_seen_updates.move_to_end(update_id)
+        WEBHOOK_DUPLICATES.inc(layer="memory")
+        return False
+    try:
+        await db.telegram_updates.insert_one({"_id": update_id, "seen_at": datetime.now(timezone.utc)})
+    except DuplicateKeyError:
+        WEBHOOK_DUPLICATES.inc(layer="store")
+        return False
+    # Only remembered once claimed: if the insert raised, Telegram's retry must get through
+    webhook_seen_updates[update_id] = None
+    while len(webhook_seen_updates) > WEBHOOK_SEEN_CACHE_SIZE:
+        webhook_seen_updates.popitem(last=False)
+    return True
+
+async def release_update(update_id):
+    """Forget a claimed update whose processing failed, so Telegram's retry runs it."""
+    webhook_seen_updates.pop(update_id, None)
+    await db.telegram_updates.delete_one({"_id": update_id})
 
 import base64
 
-async def send_telegram_photo(chat_id: str, photo_bytes: bytes, caption: str = "", log_to_chat: bool = True):
-    """Send a photo to Telegram."""
-    if not TELEGRAM_BOT_TOKEN:
+# Telegram keeps every uploaded photo and returns a file_id that can be sent to any
+# chat. file_ids are cached by content hash, in memory and in `telegram_files`, so a
+# photo is uploaded once, and not again for later broadcasts of the same image.
+TELEGRAM_FILE_CACHE_SIZE = 256
+telegram_file_ids: OrderedDict[str, str] = OrderedDict()
+
+def photo_digest(photo_bytes: bytes) -> str:
+    return hashlib.sha256(photo_bytes).hexdigest()
+
+async def cached_file_id(digest: str) -> Optional[str]:
+    file_id = telegram_file_ids.get(digest)
+    if file_id is None:
+        doc = await db.telegram_files.find_one({"_id": digest})
+        if not doc:
+            return None
+        file_id = doc["file_id"]
+    telegram_file_ids[digest] = file_id
+    telegram_file_ids.move_to_end(digest)
+    while len(telegram_file_ids) > TELEGRAM_FILE_CACHE_SIZE:
+        telegram_file_ids.popitem(last=False)
+    return file_id
+
+async def remember_file_id(digest: str, file_id: Optional[str]):
+    if not file_id:
+        telegram_file_ids.pop(digest, None)
+        await db.telegram_files.delete_one({"_id": digest})
         return
+    telegram_file_ids[digest] = file_id
+    await db.telegram_files.update_one(
+        {"_id": digest},
+        {"$set": {"file_id": file_id, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+async def send_telegram_photo(chat_id: str, photo_bytes: bytes, caption: str = "", log_to_chat: bool = True,
+                              digest: Optional[str] = None) -> bool:
+    """Send a photo to Telegram, by cached file_id when this image was uploaded before.
+    Pass `digest` (photo_digest) to skip re-hashing when sending one photo to many chats.
+    Returns whether Telegram accepted it."""
+    if not TELEGRAM_BOT_TOKEN:
+        return False
+    digest = digest or photo_digest(photo_bytes)
     try:
         if log_to_chat:
             user = await db.users.find_one({"telegram_chat_id": chat_id})
-            base64_img = base64.b64encode(photo_bytes).decode('utf-8')
-            mime_type = "image/jpeg" # Assuming JPEG for simplicity
-            html_content = f'<img src="data:{mime_type};base64,{base64_img}" alt="photo" /><br/>{caption}'
-            await db.chat_messages.insert_one({
+            image = await chat_image_for(photo_bytes, digest)
+            await store_chat_message({
                 "id": str(uuid.uuid4()),
                 "chat_id": chat_id,
                 "user_id": user["id"] if user else None,
                 "sender": "bot",
                 "type": "image",
-                "content": html_content,
+                "image_id": image["_id"],
+                "content": chat_image_html(image, "photo", caption),
                 "created_at": datetime.now(IST).isoformat()
             })
             
-        async with httpx.AsyncClient() as client_http:
-            resp = await client_http.post(
-                f"{TELEGRAM_API}/sendPhoto",
-                data={"chat_id": chat_id, "caption": caption, "parse_mode": "HTML"},
-                files={"photo": ("image.jpg", photo_bytes, "image/jpeg")}
+        data = {"chat_id": chat_id, "caption": caption, "parse_mode": "HTML"}
+        async with http_client() as client_http:
+            file_id = await cached_file_id(digest)
+            if file_id:
+                resp = await telegram_request(client_http, "sendPhoto", json={**data, "photo": file_id})
+                if resp.status_code == 200:
+                    return True
+                if resp.status_code == 400:
+                    await remember_file_id(digest, None)  # file_id no longer valid: upload again
+                else:
+                    logger.error(f"Telegram photo send failed: {resp.text}")
+                    return False
+            mime_type = sniff_mime(photo_bytes) or "image/jpeg"
+            resp = await telegram_request(
+                client_http, "sendPhoto",
+                data=data,
+                files={"photo": (f"image.{mime_type.split('/')[1]}", photo_bytes, mime_type)}
             )
             if resp.status_code != 200:
                 logger.error(f"Telegram photo send failed: {resp.text}")
+                return False
+            sizes = resp.json().get("result", {}).get("photo") or []
+            if sizes:
+                # Largest size: resending it keeps the original quality
+                await remember_file_id(digest, sizes[-1].get("file_id"))
+            return True
     except Exception as e:
         logger.error(f"Telegram photo error: {e}")
+        return False
 
 async def answer_callback_query(callback_query_id: str, text: str = ""):
     """Acknowledge a callback query (removes loading spinner on button)."""
     if not TELEGRAM_BOT_TOKEN:
         return
     try:
-        async with httpx.AsyncClient() as client_http:
-            await client_http.post(
-                f"{TELEGRAM_API}/answerCallbackQuery",
+        async with http_client() as client_http:
+            await telegram_request(
+                client_http, "answerCallbackQuery",
                 json={"callback_query_id": callback_query_id, "text": text}
             )
     except Exception as e:
         logger.error(f"Callback query error: {e}")
 
-async def edit_telegram_message(chat_id: str, message_id: int, text: str):
-    """Edit an existing Telegram message (used to update after button click)."""
+async def edit_telegram_message(chat_id: str, message_id: int, text: str, reply_markup: Optional[dict] = None):
+    """Edit an existing Telegram message (used to update after button click).
+    The inline keyboard is removed unless `reply_markup` is given."""
     if not TELEGRAM_BOT_TOKEN:
         return
+    payload = {"chat_id": chat_id, "message_id": message_id, "text": text, "parse_mode": "HTML"}
+    if reply_markup:
+        payload["reply_markup"] = reply_markup
     try:
-        async with httpx.AsyncClient() as client_http:
-            await client_http.post(
-                f"{TELEGRAM_API}/editMessageText",
-                json={"chat_id": chat_id, "message_id": message_id, "text": text, "parse_mode": "HTML"}
-            )
+        async with http_client() as client_http:
+            await telegram_request(client_http, "editMessageText", json=payload)
     except Exception as e:
         logger.error(f"Edit message error: {e}")
 
@@ -330,12 +615,35 @@ def build_job_buttons(job_id: str) -> dict:
         ]
     }
 
-async def notify_all_users_new_job(text: str, job_id: str, job_title: str = ""):
-    """Send a new job notification with inline buttons to all linked users. Throttled."""
+async def subscribed_recipients(users: list[dict], job: dict) -> list[dict]:
+    """Users who should hear about `job`: those whose saved subscriptions match it,
+    plus everyone without subscriptions (they still get every job)."""
+    await subscription_index.ensure_current(db)
+    started = time.perf_counter()
+    matched = subscription_index.match(job)
+    SUBSCRIPTION_MATCH_LATENCY.observe(time.perf_counter() - started)
+    subscribed = subscription_index.subscribed_users
+    return [u for u in users if u.get("id") not in subscribed or u.get("id") in matched]
+
+async def notify_all_users_new_job(text: str, job_id: str, job_title: str = "", job: Optional[dict] = None):
+    """Send a new job notification with inline buttons to all linked users whose
+    subscriptions match `job` (everyone when it isn't given). Throttled."""
     users = await db.users.find(
         {"$and": [{"telegram_chat_id": {"$ne": None}}, {"telegram_chat_id": {"$ne": ""}}]},
-        {"_id": 0, "telegram_chat_id": 1, "email": 1, "name": 1}
+        {"_id": 0, "id": 1, "telegram_chat_id": 1, "email": 1, "name": 1, "digest_minutes": 1}
     ).to_list(1000)
+    if job is not None:
+        total = len(users)
+        users = await subscribed_recipients(users, job)
+        logger.info(f"Job {job_id}: notifying {len(users)} of {total} linked users")
+    
+    # Digest subscribers get it with the next digest instead
+    now = datetime.now(timezone.utc)
+    await queue_digest_jobs([
+        (u["telegram_chat_id"], job_id, now + timedelta(minutes=u["digest_minutes"]))
+        for u in users if u.get("digest_minutes") and u.get("telegram_chat_id")
+    ])
+    users = [u for u in users if not u.get("digest_minutes")]
     buttons = build_job_buttons(job_id)
     
     for user in users:
@@ -356,6 +664,251 @@ async def notify_all_users_new_job(text: str, job_id: str, job_title: str = ""):
                 await asyncio.sleep(0.05) 
             except Exception as e:
                 logger.error(f"Failed to notify {chat_id}: {e}")
+
+# ---- Job Digests ----
+# Users with `digest_minutes` set get new jobs batched: the first job opens a window
+# (one `digest_queue` document per chat, due `digest_minutes` later), later jobs join
+# it, and when it's due the whole batch goes out as one message per DIGEST_MAX_JOBS
+# jobs, with a row of Applied / Not Interested / Remind buttons per job.
+DIGEST_WINDOWS = (0, 15, 60, 180)  # minutes; 0 = every job immediately
+DIGEST_MAX_JOBS = 10  # per message: 3 buttons per job stays well under Telegram's keyboard limit
+
+async def queue_digest_jobs(entries: list[tuple[str, str, datetime]]):
+    """Add (chat_id, job_id, due_at) to the chats' pending digests. An open digest
+    keeps its due time unless `due_at` is earlier."""
+    if not entries:
+        return
+    await db.digest_queue.bulk_write([
+        UpdateOne(
+            {"chat_id": chat_id},
+            {"$addToSet": {"job_ids": job_id}, "$min": {"due_at": due_at}},
+            upsert=True
+        )
+        for chat_id, job_id, due_at in entries
+    ], ordered=False)
+
+def build_digest_message(jobs: list[dict], start: int = 1) -> tuple[str, dict]:
+    lines = [f"\U0001f5de <b>{len(jobs)} new job{'s' if len(jobs) != 1 else ''} for you</b>"]
+    keyboard = []
+    for n, job in enumerate(jobs, start=start):
+        lines.append(
+            f"\n<b>{n}. {job['role']}</b> at <b>{job['company_name']}</b>\n"
+            f"{job['job_type']} | {job['location']} | Deadline: {format_deadline(job['deadline'])}\n"
+            f"Apply: {job['apply_link']}"
+        )
+        keyboard.append([
+            {"text": f"\u2705 {n}", "callback_data": f"applied:{job['id']}"},
+            {"text": f"\u274c {n}", "callback_data": f"not_interested:{job['id']}"},
+            {"text": f"\U0001f514 {n}", "callback_data": f"remind:{job['id']}"}
+        ])
+    return "\n".join(lines), {"inline_keyboard": keyboard}
+
+async def send_digest(digest: dict) -> tuple[int, list[str]]:
+    """Send one claimed digest. Jobs that expired, were deleted or already got a
+    response in the meantime are dropped. Returns the number of messages sent and
+    the ids of jobs whose message Telegram did not accept."""
+    chat_id = digest["chat_id"]
+    job_ids = digest.get("job_ids", [])
+    handled = await db.job_responses.distinct("job_id", {"chat_id": chat_id, "job_id": {"$in": job_ids}})
+    jobs = await db.jobs.find(
+        {"$and": [active_deadline_filter(), {"id": {"$in": [j for j in job_ids if j not in handled]}}]},
+        {"_id": 0}
+    ).sort("created_at", -1).to_list(len(job_ids))
+    sent = 0
+    failed_job_ids = []
+    for i in range(0, len(jobs), DIGEST_MAX_JOBS):
+        batch = jobs[i:i + DIGEST_MAX_JOBS]
+        text, buttons = build_digest_message(batch, start=i + 1)
+        if not await send_telegram_message(chat_id, text, reply_markup=buttons):
+            failed_job_ids.extend(job["id"] for job in batch)
+            continue
+        sent += 1
+        for job in batch:
+            await log_bot_event(
+                event_type="job_notification_sent",
+                chat_id=chat_id,
+                job_id=job["id"],
+                job_title=f"{job['role']} at {job['company_name']}",
+                action="digest_sent"
+            )
+        await asyncio.sleep(0.05)
+    return sent, failed_job_ids
+
+async def send_due_digests():
+    """Claim and send every digest whose window has closed. Each document is
+    removed as it's claimed, so jobs arriving meanwhile open a new digest. Jobs
+    whose message failed are re-queued with the digest's original due time after
+    this pass, so the next run retries them."""
+    sent = 0
+    retry = []
+    while True:
+        digest = await db.digest_queue.find_one_and_delete(
+            {"due_at": {"$lte": datetime.now(timezone.utc)}}, sort=[("due_at", 1)]
+        )
+        if not digest:
+            break
+        try:
+            digest_sent, failed_job_ids = await send_digest(digest)
+            sent += digest_sent
+        except Exception as e:
+            logger.error(f"Digest for {digest.get('chat_id')} failed: {e}")
+            failed_job_ids = digest.get("job_ids", [])
+        retry.extend((digest["chat_id"], job_id, digest["due_at"]) for job_id in failed_job_ids)
+    if retry:
+        await queue_digest_jobs(retry)
+        logger.warning(f"Re-queued {len(retry)} digest jobs after failed sends")
+    if sent:
+        logger.info(f"Sent {sent} digest messages")
+
+# ---- Campaigns ----
+# Broadcasts and force pushes are campaign records processed by the process holding
+# the 'campaigns' lease. A campaign is one `campaigns` document (status, counters,
+# payload) plus one `campaign_recipients` document per chat. Recipients are sent in
+# seq order and marked per batch, so a campaign survives restarts and resumes where
+# it stopped; a crash mid-batch re-sends at most that batch.
+CAMPAIGN_BATCH_SIZE = 20  # status (pause/cancel) is re-read between batches
+CAMPAIGN_SEND_INTERVAL = 0.05  # ~20 messages per second, as elsewhere
+CAMPAIGN_POLL_SECONDS = 30  # picks up campaigns created by other workers
+CAMPAIGN_ACTIVE = ["queued", "running"]
+CAMPAIGN_FINAL = ["completed", "cancelled"]
+campaign_wakeup = asyncio.Event()
+
+async def create_campaign(kind: str, recipients: list[dict], payload: dict, created_by: str,
+                          photo: Optional[bytes] = None) -> dict:
+    """Store a campaign and its recipients and wake the worker. `recipients` are
+    dicts with at least a chat_id; anything else is kept for delivery."""
+    now = datetime.now(timezone.utc)
+    campaign = {
+        "id": str(uuid.uuid4()),
+        "kind": kind,
+        "status": "queued",
+        "payload": payload,
+        "total": len(recipients),
+        "sent": 0,
+        "failed": 0,
+        "rate_per_s": None,
+        "created_by": created_by,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": None,
+    }
+    if photo:
+        campaign["payload"]["photo_sha256"] = photo_digest(photo)
+    await db.campaigns.insert_one({**campaign, **({"photo": photo} if photo else {})})
+    if recipients:
+        await db.campaign_recipients.insert_many([
+            {"campaign_id": campaign["id"], "seq": seq, "status": "pending", **r}
+            for seq, r in enumerate(recipients)
+        ])
+    campaign_wakeup.set()
+    return campaign
+
+def campaign_progress(campaign: dict) -> dict:
+    done = campaign.get("sent", 0) + campaign.get("failed", 0)
+    remaining = max(0, campaign.get("total", 0) - done)
+    rate = campaign.get("rate_per_s")
+    eta = round(remaining / rate) if rate and campaign["status"] in CAMPAIGN_ACTIVE else None
+    return {
+        "id": campaign["id"],
+        "kind": campaign["kind"],
+        "status": campaign["status"],
+        "total": campaign.get("total", 0),
+        "sent": campaign.get("sent", 0),
+        "failed": campaign.get("failed", 0),
+        "remaining": remaining,
+        "rate_per_s": rate,
+        "eta_seconds": eta,
+        "preview": campaign.get("payload", {}).get("message", "")[:100],
+        "created_at": campaign.get("created_at"),
+        "started_at": campaign.get("started_at"),
+        "finished_at": campaign.get("finished_at"),
+    }
+
+async def deliver_campaign_recipient(campaign: dict, recipient: dict):
+    """Send one recipient's message. Raises on failure."""
+    payload = campaign["payload"]
+    chat_id = recipient["chat_id"]
+    if campaign["kind"] == "force_push":
+        _, failed_job_ids = await send_digest({"chat_id": chat_id, "job_ids": recipient.get("job_ids", [])})
+        if failed_job_ids:
+            raise RuntimeError(f"Telegram did not accept the message for {len(failed_job_ids)} jobs")
+        return
+    message = payload.get("message", "")
+    if campaign.get("photo"):
+        ok = await send_telegram_photo(chat_id, campaign["photo"], caption=message, digest=payload.get("photo_sha256"))
+    else:
+        ok = await send_telegram_message(chat_id, message)
+    if not ok:
+        raise RuntimeError("Telegram did not accept the message")
+    await log_bot_event(
+        event_type="broadcast_sent",
+        chat_id=chat_id,
+        user_email=recipient.get("email", ""),
+        user_name=recipient.get("name", ""),
+        metadata={"message_preview": message[:100], "has_photo": bool(campaign.get("photo")), "campaign_id": campaign["id"]}
+    )
+
+async def run_campaign(campaign_id: str):
+    """Send a campaign's pending recipients until done, paused or cancelled."""
+    await db.campaigns.update_one({"id": campaign_id, "status": "queued"}, {"$set": {"status": "running"}})
+    await db.campaigns.update_one({"id": campaign_id, "started_at": None}, {"$set": {"started_at": datetime.now(timezone.utc)}})
+    campaign = await db.campaigns.find_one({"id": campaign_id}, {"_id": 0})
+    while campaign:
+        state = await db.campaigns.find_one({"id": campaign_id}, {"_id": 0, "status": 1, "sent": 1, "failed": 1})
+        if not state or state["status"] != "running":
+            return
+        batch = await db.campaign_recipients.find(
+            {"campaign_id": campaign_id, "status": "pending"}
+        ).sort("seq", 1).limit(CAMPAIGN_BATCH_SIZE).to_list(CAMPAIGN_BATCH_SIZE)
+        if not batch:
+            await db.campaigns.update_one(
+                {"id": campaign_id, "status": "running"},
+                {"$set": {"status": "completed", "finished_at": datetime.now(timezone.utc)}}
+            )
+            logger.info(f"Campaign {campaign_id} completed: {state['sent']} sent, {state['failed']} failed")
+            return
+        
+        started = time.perf_counter()
+        results = []
+        failed = 0
+        for recipient in batch:
+            try:
+                await deliver_campaign_recipient(campaign, recipient)
+                results.append(UpdateOne({"_id": recipient["_id"]}, {"$set": {"status": "sent"}}))
+            except Exception as e:
+                logger.error(f"Campaign {campaign_id}: failed to send to {recipient['chat_id']}: {e}")
+                results.append(UpdateOne({"_id": recipient["_id"]}, {"$set": {"status": "failed", "error": str(e)[:200]}}))
+                failed += 1
+            await asyncio.sleep(CAMPAIGN_SEND_INTERVAL)
+        
+        await db.campaign_recipients.bulk_write(results, ordered=False)
+        rate = len(batch) / (time.perf_counter() - started)
+        await db.campaigns.update_one(
+            {"id": campaign_id},
+            {"$inc": {"sent": len(batch) - failed, "failed": failed}, "$set": {"rate_per_s": round(rate, 2)}}
+        )
+
+async def campaign_worker():
+    """Run queued/running campaigns oldest first; sleep until woken or the next poll."""
+    while True:
+        try:
+            campaign_wakeup.clear()
+            campaign = await db.campaigns.find_one(
+                {"status": {"$in": CAMPAIGN_ACTIVE}}, {"_id": 0, "id": 1}, sort=[("created_at", 1)]
+            )
+            if campaign:
+                await run_campaign(campaign["id"])
+                continue
+            try:
+                await asyncio.wait_for(campaign_wakeup.wait(), timeout=CAMPAIGN_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Campaign worker error: {e}")
+            await asyncio.sleep(30)
+
 async def check_deadlines():
     """Check for jobs with upcoming deadlines and notify all users except those who opted out."""
     now = datetime.now(IST)
@@ -370,20 +923,18 @@ async def check_deadlines():
     if not all_chat_ids:
         return
     
-    jobs = await db.jobs.find({}, {"_id": 0}).to_list(1000)
+    jobs = await db.jobs.find(active_deadline_filter(), {"_id": 0}).to_list(1000)
     for job in jobs:
         try:
-            deadline = datetime.fromisoformat(job["deadline"].replace("Z", "+00:00"))
-            if deadline.tzinfo is None:
-                deadline = deadline.replace(tzinfo=IST)
-            if deadline <= now:
+            deadline = parse_deadline(job["deadline"])
+            if not deadline or deadline <= now:
                 continue  # Skip expired jobs
             
             hours_left = (deadline - now).total_seconds() / 3600
             job_id = job["id"]
             
             # Find users who clicked "Applied" or "Not Interested", AND those who clicked "Remind Me"
-            # users with "remind" response are handled by check_reminders
+            # users with "remind" response are handled by the reminder queue
             opted_out = await db.job_responses.find(
                 {"job_id": job_id, "response": {"$in": ["applied", "not_interested", "remind"]}}
             ).to_list(1000)
@@ -407,6 +958,20 @@ async def check_deadlines():
                 if already_sent:
                     continue  # Already reminded recently
                 
+                # Claim the send before making it: the unique (chat, job, window) index
+                # lets only one of two overlapping runs (e.g. an old leader that hasn't
+                # noticed its lease expired) through
+                window = int(now.timestamp() // (cooldown_hours * 3600))
+                try:
+                    claim = await db.reminder_log.insert_one({
+                        "chat_id": chat_id,
+                        "job_id": job_id,
+                        "window": window,
+                        "sent_at": now.isoformat()
+                    })
+                except DuplicateKeyError:
+                    continue  # Another run has this one
+                
                 # Determine urgency label
                 if hours_left <= 6:
                     urgency = "\U0001f6a8 URGENT"
@@ -419,17 +984,19 @@ async def check_deadlines():
                 msg = (
                     f"<b>{urgency}</b>\n\n"
                     f"<b>{job['role']}</b> at <b>{job['company_name']}</b>\n"
-                    f"Deadline: {job['deadline']}\n"
+                    f"Deadline: {format_deadline(job['deadline'])}\n"
                     f"Apply: {job['apply_link']}"
                 )
-                await send_telegram_message(chat_id, msg)
+                sent = False
+                try:
+                    sent = await send_telegram_message(chat_id, msg)
+                finally:
+                    if not sent:
+                        # Release the claim so the next run retries
+                        await db.reminder_log.delete_one({"_id": claim.inserted_id})
+                if not sent:
+                    continue
                 
-                # Log that we sent this reminder
-                await db.reminder_log.insert_one({
-                    "chat_id": chat_id,
-                    "job_id": job_id,
-                    "sent_at": now.isoformat()
-                })
                 # Log bot event for analytics
                 await log_bot_event(
                     event_type="reminder_sent",
@@ -440,67 +1007,355 @@ async def check_deadlines():
         except Exception as e:
             logger.error(f"Deadline check error for job {job.get('id', '?')}: {e}")
 
+# ---- Reminder Scheduler ----
+# "Remind Me Later" reminders live in `reminder_queue`, one document per (chat, job)
+# with the next fire time in `due_at`. The worker sleeps until the earliest due_at,
+# or until woken by a newly scheduled, earlier reminder. That wakeup only reaches the
+# worker if the button click landed on the process holding the 'reminders' lease, so
+# the sleep is also capped at REMINDER_MAX_SLEEP: a reminder queued on another replica
+# is picked up within that long (one indexed find_one per poll).
+REMINDER_INTERVAL = timedelta(hours=24)
+REMINDER_INTERVAL_LAST_DAY = timedelta(hours=6)
+REMINDER_FINAL_LEAD = timedelta(hours=1)  # last reminder goes out 1h before the deadline
+REMINDER_MAX_SLEEP = 60  # seconds; bounds lateness for reminders queued by other processes
+reminder_wakeup = asyncio.Event()
+reminder_next_due: Optional[datetime] = None
+
+def next_reminder_at(deadline: datetime, now: datetime) -> Optional[datetime]:
+    """Every 24h, every 6h inside the last day, final one REMINDER_FINAL_LEAD before the deadline."""
+    remaining = deadline - now
+    if remaining <= REMINDER_FINAL_LEAD:
+        return None
+    step = REMINDER_INTERVAL_LAST_DAY if remaining <= timedelta(hours=24) else REMINDER_INTERVAL
+    return min(now + step, deadline - REMINDER_FINAL_LEAD)
+
+async def schedule_reminder(chat_id: str, job_id: str, deadline: Any = None):
+    """Queue (or re-queue) the next reminder for a (chat, job) pair."""
+    if deadline is None:
+        job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "deadline": 1})
+        deadline = job.get("deadline") if job else None
+    deadline_dt = parse_deadline(deadline)
+    now = datetime.now(timezone.utc)
+    due_at = next_reminder_at(deadline_dt, now) if deadline_dt else None
+    if not due_at:
+        await cancel_reminder(chat_id, job_id)
+        return
+    await db.reminder_queue.update_one(
+        {"chat_id": chat_id, "job_id": job_id},
+        {"$set": {"due_at": due_at, "deadline": deadline_dt},
+         "$setOnInsert": {"created_at": now}},
+        upsert=True
+    )
+    if reminder_next_due is None or due_at < reminder_next_due:
+        reminder_wakeup.set()
+
+async def cancel_reminder(chat_id: str, job_id: str):
+    await db.reminder_queue.delete_one({"chat_id": chat_id, "job_id": job_id})
+
+async def backfill_reminder_queue():
+    """Queue reminders for 'remind' responses recorded before the queue existed."""
+    responses = await db.job_responses.find({"response": "remind"}, {"_id": 0, "chat_id": 1, "job_id": 1}).to_list(None)
+    queued = {
+        (r["chat_id"], r["job_id"])
+        for r in await db.reminder_queue.find({}, {"_id": 0, "chat_id": 1, "job_id": 1}).to_list(None)
+    }
+    missing = [r for r in responses if (r["chat_id"], r["job_id"]) not in queued]
+    for r in missing:
+        await schedule_reminder(r["chat_id"], r["job_id"])
+    if missing:
+        logger.info(f"Backfilled {len(missing)} reminders into reminder_queue")
+
+async def send_due_reminder(entry: dict, job: Optional[dict]):
+    """Send one reminder and, if the job is still open, re-queue the next one."""
+    now = datetime.now(timezone.utc)
+    deadline = parse_deadline(job.get("deadline")) if job else None
+    next_due = next_reminder_at(deadline, now) if deadline else None
+    
+    # Claim the entry with compare-and-set on due_at so it is sent exactly once
+    claim = {"_id": entry["_id"], "due_at": entry["due_at"]}
+    if next_due:
+        result = await db.reminder_queue.update_one(claim, {"$set": {"due_at": next_due}})
+        claimed = result.modified_count == 1
+    else:
+        result = await db.reminder_queue.delete_one(claim)
+        claimed = result.deleted_count == 1
+    if not claimed or not job or not deadline or deadline <= now:
+        return False
+    
+    hours_left = (deadline - now).total_seconds() / 3600
+    left = f"{int(hours_left)}h left" if hours_left < 24 else f"{int(hours_left / 24)} day{'s' if int(hours_left / 24) != 1 else ''} left"
+    msg = (
+        f"\u23f0 <b>Reminder: You asked to be reminded about this job!</b> ({left})\n\n"
+        f"<b>{job.get('role')}</b> at <b>{job.get('company_name')}</b>\n"
+        f"Deadline: {format_deadline(deadline)}\n"
+        f"Apply: {job.get('apply_link')}"
+    )
+    try:
+        # Re-send with buttons (Applied/Not Interested) to allow them to update status
+        await send_telegram_message(entry["chat_id"], msg, reply_markup=build_job_buttons(job["id"]))
+        await log_bot_event(
+            event_type="reminder_sent",
+            chat_id=entry["chat_id"],
+            job_id=job["id"],
+            job_title=f"{job.get('role')} at {job.get('company_name')}",
+            action="reminder_sent",
+            metadata={"next_due": next_due.isoformat() if next_due else None}
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to send reminder to {entry['chat_id']}: {e}")
+        return False
+
+async def process_due_reminders() -> int:
+    """Send every reminder whose due_at has passed. Returns the number sent."""
+    now = datetime.now(timezone.utc)
+    due = await db.reminder_queue.find({"due_at": {"$lte": now}}).sort("due_at", 1).to_list(200)
+    jobs = await BatchLoader(db.jobs, "id").load_many(entry["job_id"] for entry in due)
+    sent = 0
+    for entry, job in zip(due, jobs):
+        if await send_due_reminder(entry, job):
+            sent += 1
+    if sent:
+        logger.info(f"Sent {sent} reminders")
+    return sent
+
+async def run_reminder_worker():
+    """Entry point for the process that holds the 'reminders' lease."""
+    await backfill_reminder_queue()
+    await reminder_worker()
+
+async def reminder_worker():
+    """Sleep until the earliest queued reminder is due, send, repeat."""
+    global reminder_next_due
+    while True:
+        try:
+            reminder_wakeup.clear()
+            head = await db.reminder_queue.find_one({}, {"_id": 0, "due_at": 1}, sort=[("due_at", 1)])
+            now = datetime.now(timezone.utc)
+            reminder_next_due = parse_deadline(head["due_at"]) if head else None
+            if reminder_next_due and reminder_next_due <= now:
+                await process_due_reminders()
+                continue
+            delay = (reminder_next_due - now).total_seconds() if reminder_next_due else REMINDER_MAX_SLEEP
+            try:
+                await asyncio.wait_for(reminder_wakeup.wait(), timeout=min(delay, REMINDER_MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Reminder worker error: {e}")
+            await asyncio.sleep(30)
+
+# ---- Deadline Migration ----
+DEADLINE_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+async def migrate_deadlines(batch_size: int = 500):
+    """Online backfill: rewrite string deadlines (Z / +05:30 / naive / '') as UTC dates.
+    Runs in small batches so it can happen while the app is serving traffic.
+    Strings that don't parse are moved to `deadline_raw` for manual repair rather
+    than dropped."""
+    for coll in (db.jobs, db.rcjo_jobs):
+        converted = 0
+        unparseable = []
+        while True:
+            docs = await coll.find(
+                {"deadline": {"$type": "string"}}, {"_id": 1, "deadline": 1}
+            ).to_list(batch_size)
+            if not docs:
+                break
+            ops = []
+            for d in docs:
+                deadline = normalize_deadline(d["deadline"])
+                update = {"deadline": deadline}
+                if deadline is None and d["deadline"].strip():
+                    update["deadline_raw"] = d["deadline"]
+                    unparseable.append(d["_id"])
+                # Guard on the old value so a concurrent write is never overwritten
+                ops.append(UpdateOne({"_id": d["_id"], "deadline": d["deadline"]}, {"$set": update}))
+            await coll.bulk_write(ops, ordered=False)
+            converted += len(ops)
+            await asyncio.sleep(0.1)
+        if converted:
+            await bump_version(coll.name)
+            logger.info(f"Migrated {converted} string deadlines in {coll.name}")
+        if unparseable:
+            logger.warning(
+                f"{len(unparseable)} deadlines in {coll.name} could not be parsed and were kept in "
+                f"deadline_raw (e.g. _id {', '.join(map(str, unparseable[:5]))})"
+            )
+
 # ---- Startup ----
 from contextlib import asynccontextmanager
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Startup
-    # Create indexes
-    await db.users.create_index("email", unique=True)
-    await db.users.create_index("id", unique=True)
-    await db.jobs.create_index("id", unique=True)
-    await db.resumes.create_index("id", unique=True)
-    await db.job_responses.create_index([("chat_id", 1), ("job_id", 1)], unique=True)
-    await db.reminder_log.create_index([("chat_id", 1), ("job_id", 1), ("sent_at", 1)])
-    await db.bot_events.create_index("created_at")
-    await db.bot_events.create_index("event_type")
-    await db.bot_events.create_index("chat_id")
-    
-    await db.bot_events.create_index("chat_id")
-    
-    # Performance Indexes
-    await db.jobs.create_index("created_at")
-    await db.jobs.create_index("deadline")
-    await db.jobs.create_index("posted_by")
-    # Seed admin
+scheduler = LeasedScheduler(db)
+
+# Every index the app relies on, declared once. On boot they are created
+# concurrently, and skipped entirely when `schema_meta` already records this set.
+INDEXES = [
+    ("users", "email", {"unique": True}),
+    ("users", "id", {"unique": True}),
+    ("jobs", "id", {"unique": True}),
+    # Newest-first listing and the feed's (created_at, id) keyset pagination
+    ("jobs", [("created_at", -1), ("id", -1)], {}),
+    ("jobs", "posted_by", {}),
+    # Partial indexes: only documents with a real (date) deadline, i.e. jobs that can be active
+    ("jobs", [("deadline", 1)], {"name": "deadline_active", "partialFilterExpression": {"deadline": {"$gte": DEADLINE_EPOCH}}}),
+    ("rcjo_jobs", [("deadline", 1)], {"name": "deadline_active", "partialFilterExpression": {"deadline": {"$gte": DEADLINE_EPOCH}}}),
+    ("subscriptions", "id", {"unique": True}),
+    ("subscriptions", "user_id", {}),
+    ("resumes", "id", {"unique": True}),
+    ("resume_versions", [("resume_id", 1), ("version", 1)], {"unique": True}),
+    ("job_responses", [("chat_id", 1), ("job_id", 1)], {"unique": True}),
+    ("reminder_log", [("chat_id", 1), ("job_id", 1), ("sent_at", 1)], {}),
+    ("reminder_log", [("chat_id", 1), ("job_id", 1), ("window", 1)], {"unique": True, "partialFilterExpression": {"window": {"$exists": True}}}),
+    ("reminder_queue", [("chat_id", 1), ("job_id", 1)], {"unique": True}),
+    ("reminder_queue", "due_at", {}),
+    ("digest_queue", "chat_id", {"unique": True}),
+    ("digest_queue", "due_at", {}),
+    ("scheduler_leases", "expires_at", {}),
+    ("telegram_updates", "seen_at", {"expireAfterSeconds": WEBHOOK_UPDATE_TTL_SECONDS}),
+    ("campaigns", "id", {"unique": True}),
+    ("campaigns", [("status", 1), ("created_at", 1)], {}),
+    ("campaign_recipients", [("campaign_id", 1), ("status", 1), ("seq", 1)], {}),
+    ("bot_events", "created_at", {}),
+    ("bot_events", "event_type", {}),
+    ("bot_events", "chat_id", {}),
+    ("chat_messages", [("chat_id", 1), ("created_at", 1)], {}),
+    ("chat_messages", [("created_at", 1), ("id", 1)], {}),
+    ("chat_images", "digest", {"unique": True, "partialFilterExpression": {"digest": {"$exists": True}}}),
+]
+# Superseded indexes to remove: (collection, index name)
+DROPPED_INDEXES = [
+    ("jobs", "deadline_1"),  # replaced by deadline_active
+    ("jobs", "created_at_1"),  # prefix of created_at_-1_id_-1
+    ("chat_messages", "created_at_1"),  # prefix of created_at_1_id_1
+]
+INDEX_SCHEMA_VERSION = hashlib.sha1(repr((INDEXES, DROPPED_INDEXES)).encode()).hexdigest()[:12]
+
+async def ensure_indexes() -> bool:
+    """Apply INDEXES / DROPPED_INDEXES unless this version is already recorded.
+    Returns False when skipped."""
+    meta = await db.schema_meta.find_one({"_id": "indexes"})
+    if meta and meta.get("version") == INDEX_SCHEMA_VERSION:
+        return False
+
+    results = await asyncio.gather(
+        *(db[coll].create_index(keys, **options) for coll, keys, options in INDEXES),
+        return_exceptions=True
+    )
+    failed = [(spec, r) for spec, r in zip(INDEXES, results) if isinstance(r, Exception)]
+    for (coll, keys, _), error in failed:
+        logger.error(f"Index {coll} {keys} failed: {error}")
+
+    for coll, name in DROPPED_INDEXES:
+        try:
+            await db[coll].drop_index(name)
+        except Exception:
+            pass  # already gone
+
+    if not failed:
+        # Only record a fully applied set, so a partial failure is retried next boot
+        await db.schema_meta.update_one(
+            {"_id": "indexes"},
+            {"$set": {"version": INDEX_SCHEMA_VERSION, "applied_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+    return True
+
+async def seed_admin():
     admin_email = os.environ.get('ADMIN_EMAIL', 'admin@friendboard.com')
     admin_password = os.environ.get('ADMIN_PASSWORD', 'admin123')
     desired_name = "GUNDAM HARSHA VARDHAN REDDY"
     
-    existing = await db.users.find_one({"email": admin_email})
+    existing = await db.users.find_one({"email": admin_email}, {"_id": 0, "name": 1})
     if not existing:
         admin_doc = {
             "id": str(uuid.uuid4()),
             "email": admin_email,
             "name": desired_name,
-            "password_hash": hash_password(admin_password),
+            # bcrypt is deliberately slow; keep it off the event loop during boot
+            "password_hash": await asyncio.to_thread(hash_password, admin_password),
             "role": "admin",
             "telegram_chat_id": None,
             "created_at": datetime.now(IST).isoformat()
         }
         await db.users.insert_one(admin_doc)
+        await bump_version("users")
         logger.info(f"Admin account created: {admin_email}")
     elif existing.get("name") != desired_name:
         await db.users.update_one(
             {"email": admin_email},
             {"$set": {"name": desired_name}}
         )
+        await bump_version("users")
         logger.info(f"Admin name updated to {desired_name}")
+
+async def timed(timings: dict, name: str, coro):
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[name] = (time.perf_counter() - started) * 1000
+
+async def start_scheduler():
+    """Started after the app is serving: lease acquisition and APScheduler's import
+    don't need to delay the first request."""
+    started = time.perf_counter()
+    try:
+        await scheduler.start()
+        logger.info(f"Scheduler ready in {(time.perf_counter() - started) * 1000:.0f}ms")
+    except Exception as e:
+        logger.error(f"Scheduler failed to start: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup
+    timings = {"imports": (time.perf_counter() - BOOT_STARTED) * 1000}
+    lifespan_started = time.perf_counter()
+    indexes_applied, _ = await asyncio.gather(
+        timed(timings, "indexes", ensure_indexes()),
+        timed(timings, "admin_seed", seed_admin()),
+    )
     
-    # Start scheduler for deadline reminders (every 6 hours)
-    scheduler = AsyncIOScheduler()
-    scheduler.add_job(check_deadlines, 'interval', hours=6)
+    # Convert legacy string deadlines to dates in the background
+    asyncio.create_task(migrate_deadlines())
     
-    scheduler.start()
-    logger.info("Deadline reminder scheduler started")
+    # Periodic jobs. Every worker process registers them, but each one only runs
+    # in the process holding its Mongo lease.
+    # Deadline reminders every 6 hours
+    scheduler.add_interval_job(check_deadlines, hours=6)
+    # Check for expired jobs every hour
+    scheduler.add_interval_job(cleanup_expired_jobs, hours=1)
+    # Write .br/.gz variants the build step didn't: once at startup, then hourly
+    # (a stat walk when they're current)
+    scheduler.add_interval_job(precompress_static_assets, hours=1, next_run_time=datetime.now(timezone.utc))
+    # Self-ping every 13 minutes to keep free-tier servers awake
+    scheduler.add_interval_job(self_ping, minutes=13)
+    # Close due job digests every minute
+    scheduler.add_interval_job(send_due_digests, minutes=1)
+    # Event-driven "Remind Me Later" worker
+    scheduler.add_leased_task("reminders", run_reminder_worker)
+    # Broadcast / force-push campaigns
+    scheduler.add_leased_task("campaigns", campaign_worker)
+    scheduler_task = asyncio.create_task(start_scheduler())
+    
+    timings["lifespan"] = (time.perf_counter() - lifespan_started) * 1000
+    breakdown = ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items())
+    logger.info(
+        f"Startup: {breakdown} (indexes {'applied' if indexes_applied else 'up to date'}); "
+        f"ready in {(time.perf_counter() - BOOT_STARTED) * 1000:.0f}ms"
+    )
     
     yield
     
     # Shutdown
+    scheduler_task.cancel()
+    await scheduler.shutdown()
+    shutdown_pool()
     client.close()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # ---- Auth Routes ----
 @api_router.post("/auth/login")
@@ -542,6 +1397,7 @@ async def toggle_visibility(request: Request):
         {"id": user["id"]},
         {"$set": {"is_hidden": new_status}}
     )
+    await bump_version("users")
     return {"message": "Visibility updated", "is_hidden": new_status}
 
 # ---- Admin Routes ----
@@ -563,6 +1419,7 @@ async def create_user(data: UserCreate, request: Request):
         "created_at": datetime.now(IST).isoformat()
     }
     await db.users.insert_one(user_doc)
+    await bump_version("users")
     return {
         "id": user_doc["id"],
         "email": user_doc["email"],
@@ -589,6 +1446,8 @@ async def delete_user(user_id: str, request: Request):
         raise HTTPException(status_code=400, detail="Cannot delete admin")
     
     await db.users.delete_one({"id": user_id})
+    result = await db.subscriptions.delete_many({"user_id": user_id})
+    await bump_version("users", *(["subscriptions"] if result.deleted_count else []))
     return {"message": "User deleted"}
 
 @api_router.put("/admin/users/{user_id}/visibility")
@@ -605,6 +1464,7 @@ async def toggle_user_visibility(user_id: str, request: Request):
         {"id": user_id},
         {"$set": {"is_hidden": new_status}}
     )
+    await bump_version("users")
     return {"message": f"User visibility updated to {'Hidden' if new_status else 'Visible'}", "is_hidden": new_status}
 
 
@@ -642,6 +1502,9 @@ async def update_user_role(user_id: str, data: UserRoleUpdate, request: Request)
 @api_router.post("/jobs")
 async def create_job(data: JobCreate, request: Request):
     user = await get_current_user(request)
+    deadline = normalize_deadline(data.deadline)
+    if not deadline:
+        raise HTTPException(status_code=400, detail="Invalid deadline. Use an ISO 8601 date.")
     
     job_doc = {
         "id": str(uuid.uuid4()),
@@ -650,14 +1513,14 @@ async def create_job(data: JobCreate, request: Request):
         "job_type": data.job_type,
         "location": data.location,
         "apply_link": data.apply_link,
-        "deadline": data.deadline,
-        "deadline": data.deadline,
+        "deadline": deadline,
         "posted_by": user["id"],
         "posted_by_name": "Anonymous" if user.get("is_hidden") else user["name"],
         "created_at": datetime.now(IST).isoformat(),
         "source": data.source
     }
     await db.jobs.insert_one(job_doc)
+    await bump_version("jobs")
     
     # Send Telegram notification
     msg = (
@@ -665,12 +1528,12 @@ async def create_job(data: JobCreate, request: Request):
         f"<b>{data.role}</b> at <b>{data.company_name}</b>\n"
         f"Source: {data.source.replace('_', ' ').title()}\n"
         f"Type: {data.job_type} | Location: {data.location}\n"
-        f"Deadline: {data.deadline[:10]}\n"
+        f"Deadline: {format_deadline(deadline)}\n"
         f"Posted by: {'Anonymous' if user.get('is_hidden') else user['name']}\n"
         f"Apply: {data.apply_link}"
     )
     # Fire and forget — send with inline buttons
-    asyncio.create_task(notify_all_users_new_job(msg, job_doc["id"], job_title=f"{data.role} at {data.company_name}"))
+    asyncio.create_task(notify_all_users_new_job(msg, job_doc["id"], job_title=f"{data.role} at {data.company_name}", job=job_doc))
     
     return {
         "id": job_doc["id"],
@@ -699,6 +1562,10 @@ async def update_job(job_id: str, data: JobUpdate, request: Request):
         raise HTTPException(status_code=403, detail="You can only edit your own jobs")
     
     update_data = {k: v for k, v in data.dict(exclude_unset=True).items()}
+    if "deadline" in update_data:
+        update_data["deadline"] = normalize_deadline(update_data["deadline"])
+        if not update_data["deadline"]:
+            raise HTTPException(status_code=400, detail="Invalid deadline. Use an ISO 8601 date.")
     
     if not update_data:
         # Return job without _id
@@ -709,6 +1576,7 @@ async def update_job(job_id: str, data: JobUpdate, request: Request):
         {"id": job_id},
         {"$set": update_data}
     )
+    await bump_version("jobs")
     
     updated_job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
     return updated_job
@@ -716,10 +1584,79 @@ async def update_job(job_id: str, data: JobUpdate, request: Request):
 @api_router.get("/jobs")
 async def list_jobs(request: Request):
     await get_current_user(request)
+    # Expiry changes the list without a write, so the ETag also rolls over hourly
+    etag = await collection_etag("jobs", scope=datetime.now(timezone.utc).strftime("%Y%m%d%H"))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     # Filter out expired jobs from the list view as well, just in case
-    now = datetime.now(IST).isoformat()
-    jobs = await db.jobs.find({"deadline": {"$gte": now}}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return jobs
+    return stream_json_array(
+        db.jobs.find(active_deadline_filter(), projection(JobOut)).sort("created_at", -1).limit(1000),
+        headers=etag_headers(etag)
+    )
+
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 200
+FEED_HANDLED = ["applied", "not_interested"]
+
+def encode_feed_cursor(job: dict) -> str:
+    return base64.urlsafe_b64encode(f"{job['created_at']}|{job['id']}".encode()).decode()
+
+def decode_feed_cursor(cursor: str) -> dict:
+    """Keyset condition for the page after `cursor` in (created_at, id) descending order."""
+    try:
+        created_at, job_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "id": {"$lt": job_id}},
+    ]}
+
+@api_router.get("/jobs/feed")
+async def get_job_feed(request: Request, cursor: Optional[str] = None, limit: int = FEED_PAGE_SIZE):
+    """Active jobs the caller hasn't handled in Telegram yet, newest first.
+
+    Each job carries `status`: "unseen" (no response) or "remind". Jobs answered
+    Applied / Not Interested are anti-joined away in the same aggregation, via the
+    unique (chat_id, job_id) index on job_responses. Pass `next_cursor` back as
+    `cursor` for the next page."""
+    user = await get_current_user(request)
+    limit = max(1, min(limit, FEED_MAX_PAGE_SIZE))
+    match = active_deadline_filter()
+    if cursor:
+        match = {"$and": [match, decode_feed_cursor(cursor)]}
+
+    pipeline = [{"$match": match}, {"$sort": {"created_at": -1, "id": -1}}]
+    chat_id = user.get("telegram_chat_id")
+    if chat_id:
+        pipeline += [
+            {"$lookup": {
+                "from": "job_responses",
+                "let": {"job_id": "$id"},
+                "pipeline": [
+                    {"$match": {"chat_id": chat_id, "$expr": {"$eq": ["$job_id", "$$job_id"]}}},
+                    {"$project": {"_id": 0, "response": 1, "responded_at": 1}},
+                ],
+                "as": "responses",
+            }},
+            {"$match": {"responses.response": {"$nin": FEED_HANDLED}}},
+        ]
+    pipeline += [
+        {"$limit": limit + 1},
+        {"$project": {
+            **projection(JobOut),
+            "status": {"$ifNull": [{"$arrayElemAt": ["$responses.response", 0]}, "unseen"]},
+            "responded_at": {"$arrayElemAt": ["$responses.responded_at", 0]},
+        }},
+    ]
+
+    jobs = await db.jobs.aggregate(pipeline).to_list(limit + 1)
+    has_more = len(jobs) > limit
+    jobs = jobs[:limit]
+    return FastJSONResponse({
+        "jobs": jobs,
+        "next_cursor": encode_feed_cursor(jobs[-1]) if has_more else None,
+    })
 
 @api_router.delete("/jobs/{job_id}")
 async def delete_job(job_id: str, request: Request):
@@ -734,9 +1671,11 @@ async def delete_job(job_id: str, request: Request):
         raise HTTPException(status_code=403, detail="Not authorized")
     
     await db.jobs.delete_one({"id": job_id})
+    await bump_version("jobs")
     # Cascade: clean up related responses and bot events
     await db.job_responses.delete_many({"job_id": job_id})
     await db.bot_events.delete_many({"job_id": job_id})
+    await db.reminder_queue.delete_many({"job_id": job_id})
     return {"message": "Job deleted"}
 
 # ---- RCJO Models ----
@@ -756,7 +1695,7 @@ class RCJOJobOut(BaseModel):
     job_type: str
     location: str
     apply_link: str
-    deadline: Optional[str] = None
+    deadline: Optional[datetime] = None
     source: str
     created_at: str
 
@@ -791,9 +1730,17 @@ async def bulk_create_rcjo_jobs(jobs: list[RCJOJobCreate], request: Request):
         return {"message": "No jobs to insert", "count": 0}
 
     operations = []
+    skipped = []
     now = datetime.now(IST).isoformat()
     
     for job in jobs:
+        # An unparseable deadline would otherwise be stored as "no deadline" (and
+        # overwrite a good one on update), so leave that job alone and report it
+        deadline = normalize_deadline(job.deadline)
+        if deadline is None and job.deadline and job.deadline.strip():
+            skipped.append({"apply_link": job.apply_link, "deadline": job.deadline})
+            continue
+        
         # Use apply_link as the unique identifier
         # If it exists, update the details (in case deadline or something changed)
         # If not, insert it (upsert=True)
@@ -812,7 +1759,7 @@ async def bulk_create_rcjo_jobs(jobs: list[RCJOJobCreate], request: Request):
                 "role": job.role,
                 "job_type": job.job_type,
                 "location": job.location,
-                "deadline": job.deadline,
+                "deadline": deadline,
                 "source": job.source,
                 "updated_at": now
             },
@@ -824,31 +1771,44 @@ async def bulk_create_rcjo_jobs(jobs: list[RCJOJobCreate], request: Request):
         
         operations.append(UpdateOne(filter_criteria, update_doc, upsert=True))
     
+    if skipped:
+        logger.warning(f"RCJO bulk upsert skipped {len(skipped)} jobs with unparseable deadlines: {skipped[:5]}")
+    
     if operations:
         result = await db.rcjo_jobs.bulk_write(operations)
+        if result.upserted_count or result.modified_count:
+            await bump_version("rcjo_jobs")
         count = result.upserted_count + result.modified_count
         return {
             "message": "Bulk operation completed", 
             "inserted": result.upserted_count, 
             "updated": result.modified_count,
-            "matched": result.matched_count
+            "matched": result.matched_count,
+            "skipped": skipped
         }
     
-    return {"message": "No operations performed", "count": 0}
+    return {"message": "No operations performed", "count": 0, "skipped": skipped}
 
 @api_router.get("/rcjo-jobs")
 async def list_rcjo_jobs(request: Request):
     # Public or authenticated? Let's make it authenticated like other job lists
     await get_current_user(request)
     
-    jobs = await db.rcjo_jobs.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return jobs
+    etag = await collection_etag("rcjo_jobs")
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return stream_json_array(
+        db.rcjo_jobs.find({}, projection(RCJOJobOut)).sort("created_at", -1).limit(1000),
+        headers=etag_headers(etag)
+    )
 
 @api_router.delete("/rcjo-jobs/all")
 async def delete_all_rcjo_jobs(request: Request):
     user = await require_admin(request)
     
     result = await db.rcjo_jobs.delete_many({})
+    if result.deleted_count:
+        await bump_version("rcjo_jobs")
     return {"message": "All RCJO jobs deleted", "deleted_count": result.deleted_count}
 
 
@@ -856,6 +1816,9 @@ async def delete_all_rcjo_jobs(request: Request):
 @api_router.get("/rankings")
 async def get_rankings(request: Request):
     await get_current_user(request)
+    etag = await collection_etag("jobs", "users")
+    if etag_matches(request, etag):
+        return not_modified(etag)
     
     # 1. Get job counts per user
     job_counts = {}
@@ -885,7 +1848,7 @@ async def get_rankings(request: Request):
     # 4. Sort by job_count (desc), then name (asc)
     rankings.sort(key=lambda x: (-x["job_count"], x["name"]))
     
-    return rankings
+    return FastJSONResponse(rankings, headers=etag_headers(etag))
 
 # ---- User Profile / Telegram ----
 @api_router.put("/users/telegram")
@@ -897,6 +1860,70 @@ async def link_telegram(data: TelegramLink, request: Request):
     )
     return {"message": "Telegram linked", "telegram_chat_id": data.telegram_chat_id}
 
+# ---- Notification Settings ----
+@api_router.get("/users/me/notifications")
+async def get_notification_settings(request: Request):
+    user = await get_current_user(request)
+    return {"digest_minutes": user.get("digest_minutes", 0), "options": DIGEST_WINDOWS}
+
+@api_router.put("/users/me/notifications")
+async def update_notification_settings(data: NotificationSettings, request: Request):
+    user = await get_current_user(request)
+    if data.digest_minutes not in DIGEST_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"digest_minutes must be one of {list(DIGEST_WINDOWS)}")
+    await db.users.update_one({"id": user["id"]}, {"$set": {"digest_minutes": data.digest_minutes}})
+    if user.get("telegram_chat_id"):
+        # Apply the new window to what's already pending (switching to immediate flushes it)
+        due_at = datetime.now(timezone.utc) + timedelta(minutes=data.digest_minutes)
+        await db.digest_queue.update_one({"chat_id": user["telegram_chat_id"]}, {"$min": {"due_at": due_at}})
+        if not data.digest_minutes:
+            asyncio.create_task(send_due_digests())
+    return {"digest_minutes": data.digest_minutes}
+
+# ---- Notification Subscriptions ----
+MAX_SUBSCRIPTIONS_PER_USER = 20
+
+@api_router.get("/users/me/subscriptions")
+async def list_subscriptions(request: Request):
+    user = await get_current_user(request)
+    return await db.subscriptions.find({"user_id": user["id"]}, {"_id": 0}).sort("created_at", 1).to_list(MAX_SUBSCRIPTIONS_PER_USER)
+
+@api_router.post("/users/me/subscriptions")
+async def create_subscription(data: SubscriptionCreate, request: Request):
+    """Save a filter for new-job notifications. With at least one saved filter, the user
+    only gets jobs matching one of them; with none, every job."""
+    user = await get_current_user(request)
+    filters = {
+        "job_types": normalize_filter(data.job_types, phrase=False),
+        "locations": normalize_filter(data.locations, phrase=True),
+        "keywords": normalize_filter(data.keywords, phrase=True),
+        "companies": normalize_filter(data.companies, phrase=False),
+    }
+    if not any(filters.values()):
+        raise HTTPException(status_code=400, detail="Set at least one of job_types, locations, keywords or companies")
+    if await db.subscriptions.count_documents({"user_id": user["id"]}) >= MAX_SUBSCRIPTIONS_PER_USER:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SUBSCRIPTIONS_PER_USER} subscriptions per user")
+    
+    sub_doc = {
+        "id": str(uuid.uuid4()),
+        "user_id": user["id"],
+        **filters,
+        "created_at": datetime.now(IST).isoformat()
+    }
+    await db.subscriptions.insert_one(sub_doc)
+    await bump_version("subscriptions")
+    sub_doc.pop("_id", None)
+    return sub_doc
+
+@api_router.delete("/users/me/subscriptions/{subscription_id}")
+async def delete_subscription(subscription_id: str, request: Request):
+    user = await get_current_user(request)
+    result = await db.subscriptions.delete_one({"id": subscription_id, "user_id": user["id"]})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Subscription not found")
+    await bump_version("subscriptions")
+    return {"message": "Subscription deleted"}
+
 # ---- Admin Broadcast ----
 @api_router.post("/admin/broadcast")
 async def broadcast_message(
@@ -905,7 +1932,8 @@ async def broadcast_message(
     photo: Optional[UploadFile] = File(None),
     target_chat_id: Optional[str] = Form(None)
 ):
-    await require_admin(request)
+    """Queue a broadcast campaign and return at once; follow it via /admin/campaigns/{id}."""
+    admin = await require_admin(request)
     
     if not message.strip() and not photo:
         raise HTTPException(status_code=400, detail="Message or photo must be provided")
@@ -921,42 +1949,169 @@ async def broadcast_message(
             {"_id": 0, "telegram_chat_id": 1, "email": 1, "name": 1}
         ).to_list(1000)
     
-    sent_count: int = 0
-    failed_count: int = 0
-    
-    # Read photo bytes once if present
+    # Read and normalize the photo once: metadata stripped, downscaled and recompressed
     photo_bytes = None
     if photo:
-        photo_bytes = await photo.read()
-    
-    for user in users:
-        chat_id = user.get("telegram_chat_id")
-        if chat_id:
-            try:
-                if photo_bytes:
-                    await send_telegram_photo(chat_id, photo_bytes, caption=message)
-                else:
-                    await send_telegram_message(chat_id, message)
-                
-                sent_count += 1
-                await log_bot_event(
-                    event_type="broadcast_sent",
-                    chat_id=chat_id,
-                    user_email=user.get("email", ""),
-                    user_name=user.get("name", ""),
-                    metadata={"message_preview": message[:100], "has_photo": bool(photo)}
-                )
-            except Exception as e:
-                logger.error(f"Failed to send to chat_id {chat_id}: {e}")
-                failed_count += 1
+        image = await normalize_image(await photo.read())
+        if image["mime"] not in SENDABLE_MIME_TYPES:
+            raise HTTPException(status_code=400, detail="Photo must be a JPEG, PNG, GIF or WebP image")
+        await store_chat_image(image)
+        photo_bytes = image["data"]
+    
+    campaign = await create_campaign(
+        "broadcast",
+        [{"chat_id": u["telegram_chat_id"], "email": u.get("email", ""), "name": u.get("name", "")}
+         for u in users if u.get("telegram_chat_id")],
+        {"message": message, "target_chat_id": target_chat_id or "all"},
+        admin["id"],
+        photo=photo_bytes
+    )
     
-    return {"message": "Broadcast sent", "sent_count": sent_count, "failed_count": failed_count}
+    return {"message": "Broadcast queued", "campaign_id": campaign["id"], "total": campaign["total"]}
+
+# ---- Campaigns ----
+@api_router.get("/admin/campaigns")
+async def list_campaigns(request: Request):
+    await require_admin(request)
+    campaigns = await db.campaigns.find({}, {"_id": 0, "photo": 0}).sort("created_at", -1).to_list(50)
+    return [campaign_progress(c) for c in campaigns]
+
+@api_router.get("/admin/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, request: Request):
+    await require_admin(request)
+    campaign = await db.campaigns.find_one({"id": campaign_id}, {"_id": 0, "photo": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign_progress(campaign)
+
+# action -> (statuses it applies to, new status)
+CAMPAIGN_ACTIONS = {
+    "pause": (CAMPAIGN_ACTIVE, "paused"),
+    "resume": (["paused"], "queued"),
+    "cancel": (CAMPAIGN_ACTIVE + ["paused"], "cancelled"),
+}
+
+@api_router.post("/admin/campaigns/{campaign_id}/{action}")
+async def control_campaign(campaign_id: str, action: str, request: Request):
+    """Pause, resume or cancel a campaign. The worker checks between batches, so a
+    pause or cancel takes effect within CAMPAIGN_BATCH_SIZE sends."""
+    await require_admin(request)
+    if action not in CAMPAIGN_ACTIONS:
+        raise HTTPException(status_code=404, detail="Unknown action")
+    from_statuses, new_status = CAMPAIGN_ACTIONS[action]
+    update = {"status": new_status}
+    if new_status == "cancelled":
+        update["finished_at"] = datetime.now(timezone.utc)
+    result = await db.campaigns.update_one({"id": campaign_id, "status": {"$in": from_statuses}}, {"$set": update})
+    campaign = await db.campaigns.find_one({"id": campaign_id}, {"_id": 0, "photo": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if result.modified_count == 0:
+        raise HTTPException(status_code=409, detail=f"Cannot {action} a {campaign['status']} campaign")
+    if new_status == "queued":
+        campaign_wakeup.set()
+    return campaign_progress(campaign)
 
 # ---- Telegram Webhook ----
 @api_router.post("/telegram/webhook")
 async def telegram_webhook(request: Request):
     data = await request.json()
-    
+    update_id = data.get("update_id")
+    if update_id is not None:
+        if not await claim_update(update_id):
+            return {"ok": True, "duplicate": True}
+        try:
+            return await handle_telegram_update(data)
+        except Exception:
+            await release_update(update_id)
+            raise
+    return await handle_telegram_update(data)
+
+# Inline button actions: (popup, status line appended to the message)
+CALLBACK_ACTIONS = {
+    "applied": ("Marked as Applied!", "\u2705 <i>You marked this as Applied. No more reminders for this job.</i>"),
+    "not_interested": ("Marked as Not Interested.", "\u274c <i>You marked this as Not Interested. No more reminders for this job.</i>"),
+    "remind": ("Reminder set! \U0001f514", "\U0001f514 <i>Reminder set! You'll be reminded every 24h, and every 6h in the last day.</i>"),
+}
+
+def remaining_keyboard(reply_markup: Optional[dict], job_id: str) -> Optional[dict]:
+    """The message's keyboard without the rows for `job_id`: digests keep the
+    buttons of their other jobs. None when nothing is left."""
+    suffix = f":{job_id}"
+    rows = [
+        row for row in (reply_markup or {}).get("inline_keyboard", [])
+        if not any(button.get("callback_data", "").endswith(suffix) for button in row)
+    ]
+    return {"inline_keyboard": rows} if rows else None
+
+async def record_button_click(chat_id: str, job_id: str, action: str, job: Optional[dict], user: Optional[dict]):
+    """Save the response, sync the reminder queue and log the click, concurrently."""
+    job_title = f"{job['role']} at {job['company_name']}" if job else ""
+    if action == "remind":
+        reminder = schedule_reminder(chat_id, job_id, job.get("deadline") if job else None)
+    else:
+        reminder = cancel_reminder(chat_id, job_id)
+    await asyncio.gather(
+        # Upsert: one response per user per job
+        db.job_responses.update_one(
+            {"chat_id": chat_id, "job_id": job_id},
+            {"$set": {
+                "response": action,
+                "job_title": job_title,
+                "responded_at": datetime.now(IST).isoformat()
+            }},
+            upsert=True
+        ),
+        reminder,
+        log_bot_event(
+            event_type="button_click",
+            chat_id=chat_id,
+            user_email=user.get("email", "") if user else "",
+            user_name=user.get("name", "") if user else "",
+            job_id=job_id,
+            job_title=job_title,
+            action=action
+        )
+    )
+
+async def handle_callback_query(callback: dict):
+    """Inline button click. The spinner is cleared first (answerCallbackQuery), then
+    the lookups, response upsert, event log and message edit run concurrently."""
+    callback_id = callback["id"]
+    # Parse callback: "applied:JOB_ID", "not_interested:JOB_ID", "remind:JOB_ID"
+    action, _, job_id = callback.get("data", "").partition(":")
+    if not job_id:
+        await answer_callback_query(callback_id, "Invalid data")
+        return
+    if action not in CALLBACK_ACTIONS:
+        await answer_callback_query(callback_id, "Unknown action")
+        return
+    popup, status_line = CALLBACK_ACTIONS[action]
+    await answer_callback_query(callback_id, popup)
+
+    message = callback.get("message") or {}
+    chat_id = str(message.get("chat", {}).get("id") or callback.get("from", {}).get("id", ""))
+    job, user = await asyncio.gather(
+        db.jobs.find_one({"id": job_id}, {"_id": 0, "role": 1, "company_name": 1, "deadline": 1}),
+        db.users.find_one({"telegram_chat_id": chat_id}, {"_id": 0, "email": 1, "name": 1})
+    )
+    tasks = [record_button_click(chat_id, job_id, action, job, user)]
+    if message.get("message_id"):
+        keyboard = remaining_keyboard(message.get("reply_markup"), job_id)
+        if keyboard and job:
+            # Digest: say which job the choice was for, keep the other jobs' buttons
+            status_line = f"<b>{job['role']}</b> at <b>{job['company_name']}</b>: {status_line}"
+        tasks.append(edit_telegram_message(
+            chat_id, message["message_id"], message.get("text", "") + "\n\n" + status_line, reply_markup=keyboard
+        ))
+    await asyncio.gather(*tasks)
+
+async def handle_telegram_update(data: dict):
+    # Handle inline button clicks (callback queries)
+    if "callback_query" in data:
+        await handle_callback_query(data["callback_query"])
+        return {"ok": True}
+
     # Handle regular messages (e.g. /start command)
     if "message" in data:
         message = data["message"]
@@ -1039,7 +2194,7 @@ async def telegram_webhook(request: Request):
         else:
             # Re-fetch user in case we didn't have it (for logging chat text correctly)
             user = await db.users.find_one({"telegram_chat_id": chat_id})
-            await db.chat_messages.insert_one({
+            await store_chat_message({
                 "id": str(uuid.uuid4()),
                 "chat_id": chat_id,
                 "user_id": user["id"] if user else None,
@@ -1062,29 +2217,26 @@ async def telegram_webhook(request: Request):
         
         # Download the photo
         try:
-            async with httpx.AsyncClient() as client_http:
+            async with http_client() as client_http:
                 # 1. Get file path
-                file_info_resp = await client_http.get(f"{TELEGRAM_API}/getFile?file_id={file_id}")
+                file_info_resp = await telegram_request(client_http, "getFile", "GET", params={"file_id": file_id})
                 file_info = file_info_resp.json()
                 if file_info.get("ok"):
                     file_path = file_info["result"]["file_path"]
                     # 2. Download file
-                    download_url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}"
+                    download_url = f"{TELEGRAM_API_URL}/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}"
                     img_resp = await client_http.get(download_url)
                     
                     if img_resp.status_code == 200:
-                        import base64
-                        base64_img = base64.b64encode(img_resp.content).decode('utf-8')
-                        mime_type = "image/jpeg" # Adjust based on file_path extension if needed
-                        html_content = f'<img src="data:{mime_type};base64,{base64_img}" alt="User Photo" /><br/>{caption}'
-                        
-                        await db.chat_messages.insert_one({
+                        image = await store_chat_image(await normalize_image(img_resp.content))
+                        await store_chat_message({
                             "id": str(uuid.uuid4()),
                             "chat_id": chat_id,
                             "user_id": user["id"] if user else None,
                             "sender": "user",
                             "type": "image",
-                            "content": html_content,
+                            "image_id": image["_id"],
+                            "content": chat_image_html(image, "User Photo", caption),
                             "created_at": datetime.now(IST).isoformat()
                         })
                     else:
@@ -1109,14 +2261,16 @@ async def get_chat_users(request: Request):
     ]
     latest_chats_raw = await db.chat_messages.aggregate(pipeline).to_list(1000)
     
+    # Resolve user info for every chat in one query
+    users = await BatchLoader(db.users, "telegram_chat_id", {"_id": 0, "name": 1, "email": 1, "id": 1}).load_many(
+        chat["_id"] for chat in latest_chats_raw
+    )
+    
     result = []
-    for chat in latest_chats_raw:
+    for chat, user in zip(latest_chats_raw, users):
         chat_id = chat["_id"]
         last_msg = chat["last_message"]
         
-        # Resolve user info
-        user = await db.users.find_one({"telegram_chat_id": chat_id}, {"_id": 0, "name": 1, "email": 1, "id": 1})
-        
         result.append({
             "chat_id": chat_id,
             "user_id": user["id"] if user else None,
@@ -1129,6 +2283,66 @@ async def get_chat_users(request: Request):
     result.sort(key=lambda x: x["last_active"], reverse=True)
     return result
 
+@api_router.get("/chat-images/{image_id}")
+async def get_chat_image(image_id: str, request: Request):
+    """Full-size chat photo. The id is random (see store_chat_image), so the URL is
+    only known to whoever saw the message; content never changes for an id."""
+    etag = f'"{image_id}"'
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    image = await db.chat_images.find_one({"_id": image_id}, {"mime": 1, "data": 1})
+    if not image:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return Response(
+        content=bytes(image["data"]),
+        media_type=image["mime"],
+        headers={"ETag": etag, "Cache-Control": "private, max-age=31536000, immutable"}
+    )
+
+CHAT_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+
+@api_router.get("/admin/chats/stream")
+async def stream_chat_messages(request: Request, chat_id: Optional[str] = None, cursor: Optional[str] = None):
+    """Server-Sent Events stream of newly stored chat messages (all chats, or one chat_id).
+
+    Each event id is the message's "created_at|id"; reconnect with `cursor` (or the
+    Last-Event-ID header) to first replay anything missed while disconnected."""
+    await require_admin(request)
+    cursor = cursor or request.headers.get("last-event-id")
+    try:
+        sub = chat_hub.subscribe(db, chat_id)
+    except ChatHubFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            if cursor:
+                query = after_cursor(cursor)
+                if chat_id:
+                    query["chat_id"] = chat_id
+                missed = await db.chat_messages.find(query, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).to_list(500)
+                for message in missed:
+                    sub.replayed.add(message.get("id"))
+                    yield sse_event(message)
+            while not sub.lagged:
+                try:
+                    message = await asyncio.wait_for(sub.queue.get(), timeout=CHAT_STREAM_HEARTBEAT)
+                    if not sub.is_replayed(message):
+                        yield sse_event(message)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+        finally:
+            chat_hub.unsubscribe(sub)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @api_router.get("/admin/chats/{chat_id}")
 async def get_chat_history(chat_id: str, request: Request):
     await require_admin(request)
@@ -1157,75 +2371,17 @@ async def reply_to_chat(chat_id: str, payload: ChatReplyIn, request: Request):
         
     await send_telegram_message(chat_id, payload.message, log_to_chat=True)
     return {"status": "success", "message": "Reply sent"}
-    
-    # Handle inline button clicks (callback queries)
-    if "callback_query" in data:
-        callback = data["callback_query"]
-        callback_id = callback["id"]
-        chat_id = str(callback["message"]["chat"]["id"])
-        message_id = callback["message"]["message_id"]
-        original_text = callback["message"].get("text", "")
-        callback_data = callback.get("data", "")
-        
-        # Parse callback: "applied:JOB_ID", "not_interested:JOB_ID", "remind:JOB_ID"
-        parts = callback_data.split(":", 1)
-        if len(parts) == 2:
-            action, job_id = parts
-            
-            if action in ("applied", "not_interested", "remind"):
-                # Look up job info first
-                btn_job = await db.jobs.find_one({"id": job_id}, {"_id": 0, "role": 1, "company_name": 1})
-                job_title_str = f"{btn_job['role']} at {btn_job['company_name']}" if btn_job else ""
-                
-                # Save response (upsert — one response per user per job)
-                await db.job_responses.update_one(
-                    {"chat_id": chat_id, "job_id": job_id},
-                    {"$set": {
-                        "response": action,
-                        "job_title": job_title_str,
-                        "responded_at": datetime.now(IST).isoformat()
-                    }},
-                    upsert=True
-                )
-                
-                # Resolve user info for the event log
-                btn_user = await db.users.find_one({"telegram_chat_id": chat_id}, {"_id": 0, "email": 1, "name": 1})
-                await log_bot_event(
-                    event_type="button_click",
-                    chat_id=chat_id,
-                    user_email=btn_user.get("email", "") if btn_user else "",
-                    user_name=btn_user.get("name", "") if btn_user else "",
-                    job_id=job_id,
-                    job_title=job_title_str,
-                    action=action
-                )
-                
-                # Build confirmation and edit the original message
-                if action == "applied":
-                    status_line = "\n\n\u2705 <i>You marked this as Applied. No more reminders for this job.</i>"
-                    popup = "Marked as Applied!"
-                elif action == "not_interested":
-                    status_line = "\n\n\u274c <i>You marked this as Not Interested. No more reminders for this job.</i>"
-                    popup = "Marked as Not Interested."
-                else:  # remind
-                    status_line = "\n\n\U0001f514 <i>Reminder set! You'll be reminded every 24h, and every 6h in the last day.</i>"
-                    popup = "Reminder set! \U0001f514"
-                
-                # Edit the message to show the choice and remove buttons
-                await edit_telegram_message(chat_id, message_id, original_text + status_line)
-                await answer_callback_query(callback_id, popup)
-            else:
-                await answer_callback_query(callback_id, "Unknown action")
-        else:
-            await answer_callback_query(callback_id, "Invalid data")
-    
-    return {"ok": True}
 
 @api_router.get("/users/me/jobs")
 async def get_my_jobs(request: Request):
     user = await get_current_user(request)
-    jobs = await db.jobs.find({"posted_by": user["id"]}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    return jobs
+    etag = await collection_etag("jobs", scope=user["id"])
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return stream_json_array(
+        db.jobs.find({"posted_by": user["id"]}, projection(JobOut)).sort("created_at", -1).limit(1000),
+        headers=etag_headers(etag)
+    )
 
 # ---- Get Jobs (Public) ----
 @api_router.get("/admin/stats")
@@ -1270,6 +2426,7 @@ async def get_infrastructure_stats(request: Request):
     hours_this_month = ((days_in_month - 1) * 24) + now.hour
     
     return {
+        "scheduler": scheduler.status(),
         "mongodb": {
             "used_mb": round(mb_used, 2),
             "total_mb": 512,
@@ -1295,8 +2452,7 @@ async def get_bot_analytics(request: Request):
     )
     
     # Active jobs (deadline > now)
-    now_iso = now.isoformat()
-    total_active_jobs = await db.jobs.count_documents({"deadline": {"$gt": now_iso}})
+    total_active_jobs = await db.jobs.count_documents(active_deadline_filter())
 
     # Total jobs ever posted
     # Since we no longer delete jobs, we can precisely count db.jobs
@@ -1318,7 +2474,7 @@ async def get_bot_analytics(request: Request):
     # --- Per-job responses (Top 10 active/recent) ---
     # We prioritize active jobs first by filtering out expired ones
     # This ensures the table only shows jobs that are currently live
-    jobs = await db.jobs.find({"deadline": {"$gt": now_iso}}, {"_id": 0}).sort("created_at", -1).to_list(10)
+    jobs = await db.jobs.find(active_deadline_filter(), {"_id": 0}).sort("created_at", -1).to_list(10)
     per_job_responses = []
     
     for job in jobs:
@@ -1373,10 +2529,12 @@ async def get_bot_analytics(request: Request):
         }}
     ]
     user_agg = await db.job_responses.aggregate(user_pipeline).to_list(100)
+    user_docs = await BatchLoader(db.users, "telegram_chat_id", {"_id": 0, "name": 1, "email": 1}).load_many(
+        u["_id"] for u in user_agg
+    )
     per_user_activity = []
-    for u in user_agg:
+    for u, user_doc in zip(user_agg, user_docs):
         chat_id = u["_id"]
-        user_doc = await db.users.find_one({"telegram_chat_id": chat_id}, {"_id": 0, "name": 1, "email": 1})
         per_user_activity.append({
             "user_name": user_doc.get("name", "Unknown") if user_doc else "Unknown",
             "user_email": user_doc.get("email", "") if user_doc else "",
@@ -1430,7 +2588,8 @@ async def get_bot_analytics(request: Request):
             "total": d["total"]
         })
 
-    return {
+    # Plain documents: skip jsonable_encoder and encode directly
+    return FastJSONResponse({
         "overview": {
             "total_linked_users": total_linked,
             "total_users": total_users,
@@ -1447,7 +2606,7 @@ async def get_bot_analytics(request: Request):
         "per_user_activity": per_user_activity,
         "recent_events": recent_events,
         "daily_activity": daily_activity
-    }
+    })
 
 @api_router.get("/admin/bot-analytics/user/{chat_id}")
 async def get_user_bot_detail(chat_id: str, request: Request):
@@ -1458,12 +2617,15 @@ async def get_user_bot_detail(chat_id: str, request: Request):
         {"chat_id": chat_id}, {"_id": 0}
     ).sort("responded_at", -1).to_list(100)
     
-    # Enrich with job titles
+    # Enrich with job titles (older responses didn't store one)
+    jobs = BatchLoader(db.jobs, "id", {"_id": 0, "role": 1, "company_name": 1})
+    untitled = [r["job_id"] for r in responses if not r.get("job_title") and r.get("job_id")]
+    await jobs.load_many(untitled)
     detailed = []
     for r in responses:
         job_title = r.get("job_title", "")
         if not job_title and r.get("job_id"):
-            job = await db.jobs.find_one({"id": r["job_id"]}, {"_id": 0, "role": 1, "company_name": 1})
+            job = await jobs.load(r["job_id"])
             if job:
                 job_title = f"{job.get('role', 'Unknown')} at {job.get('company_name', 'Unknown')}"
         detailed.append({
@@ -1496,73 +2658,16 @@ async def get_user_bot_detail(chat_id: str, request: Request):
 
 
 async def cleanup_expired_jobs():
-    """No longer deletes jobs. Expiration is handled gracefully by queries filter: {'deadline': {'$gte': now}}."""
+    """No longer deletes jobs. Expiration is handled gracefully by queries filter: active_deadline_filter()."""
     pass
 
-async def check_reminders():
-    """Send reminders to users who clicked 'Remind Me Later'."""
-    # Logic: Find bot events of type 'button_click' with action 'remind' 
-    # where created_at is older than X hours (e.g., 24 hours) and no reminder sent yet.
-    # For simplicity/demo: querying job_responses with response='remind'
-    
-    # 1. Find all 'remind' responses
-    reminders = await db.job_responses.find({"response": "remind"}).to_list(1000)
-    
-    count = 0
-    for r in reminders:
-        # Check if we already sent a reminder for this specific user+job combo
-        # We can check bot_events for event_type='reminder_sent'
-        already_sent = await db.bot_events.find_one({
-            "event_type": "reminder_sent",
-            "chat_id": r["chat_id"],
-            "job_id": r["job_id"]
-        })
-        
-        if not already_sent:
-            # Check if enough time has passed (e.g., 4 hours for testing/demo, or user defined)
-            # responded_at is ISO string
-            responded_at = datetime.fromisoformat(r["responded_at"].replace("Z", "+00:00"))
-            if responded_at.tzinfo is None:
-                responded_at = responded_at.replace(tzinfo=IST)
-            if datetime.now(IST) > responded_at + timedelta(hours=4):
-                # Send reminder
-                job = await db.jobs.find_one({"id": r["job_id"]})
-                if job:
-                    msg = (
-                        f"⏰ <b>Reminder: You asked to be reminded about this job!</b>\n\n"
-                        f"<b>{job.get('role')}</b> at <b>{job.get('company_name')}</b>\n"
-                        f"Deadline: {job.get('deadline', '')[:10]}\n"
-                        f"Apply: {job.get('apply_link')}"
-                    )
-                    try:
-                        # Re-send with buttons (Applied/Not Interested) to allow them to update status
-                        await send_telegram_message(r["chat_id"], msg, reply_markup=build_job_buttons(job["id"]))
-                        
-                        # Log the event so we don't send again
-                        await log_bot_event(
-                            event_type="reminder_sent",
-                            chat_id=r["chat_id"],
-                            user_email="", # Could fetch user if needed
-                            user_name="",
-                            job_id=job["id"],
-                            job_title=f"{job.get('role')} at {job.get('company_name')}",
-                            action="reminder_sent"
-                        )
-                        count += 1
-                    except Exception as e:
-                        logger.error(f"Failed to send reminder to {r['chat_id']}: {e}")
-
-    if count > 0:
-        logger.info(f"Sent {count} reminders")
-
 # ---- Force Push Endpoint ----
 @api_router.post("/admin/force-push-jobs")
 async def force_push_jobs(request: Request):
-    await require_admin(request)
+    admin = await require_admin(request)
     
     # 1. Get all active active jobs (deadline > now)
-    now = datetime.now(IST).isoformat()
-    jobs = await db.jobs.find({"deadline": {"$gt": now}}).sort("created_at", -1).to_list(50) # Limit to 50 to avoid spamming too much
+    jobs = await db.jobs.find(active_deadline_filter()).sort("created_at", -1).to_list(50) # Limit to 50 to avoid spamming too much
     
     if not jobs:
         return {"message": "No active jobs to push", "count": 0}
@@ -1575,29 +2680,31 @@ async def force_push_jobs(request: Request):
     if user_count == 0:
         return {"message": "No linked users found", "count": 0}
         
-    async def push_sequence(jobs_to_push):
-        """Sequential push to respect rate limits"""
-        logger.info(f"Starting force push of {len(jobs_to_push)} jobs to {user_count} users")
-        for job in jobs_to_push:
-            msg = (
-                f"📢 <b>Job Alert!</b>\n\n"
-                f"<b>{job['role']}</b> at <b>{job['company_name']}</b>\n"
-                f"Location: {job['location']}\n"
-                f"Deadline: {job['deadline'][:10]}\n"
-                f"Apply: {job['apply_link']}"
-            )
-            # This function now has internal throttling (0.05s per user)
-            # We await it to ensure we don't start the next job loop until this one is done/throttled
-            await notify_all_users_new_job(msg, job["id"], job_title=f"{job['role']} at {job['company_name']}")
-            
-            # Extra pause between jobs to be safe
-            await asyncio.sleep(1.0) 
-        logger.info("Force push sequence completed")
-
-    # Start the sequence in background
-    asyncio.create_task(push_sequence(jobs))
-        
-    return {"message": f"Queued {len(jobs)} jobs to be sent to all users sequentially.", "jobs_count": len(jobs), "users_count": user_count}
+    # 3. One campaign recipient per user, carrying the jobs that match their subscriptions.
+    # Each gets them as digest messages (DIGEST_MAX_JOBS jobs per message).
+    users = await db.users.find(
+        {"$and": [{"telegram_chat_id": {"$ne": None}}, {"telegram_chat_id": {"$ne": ""}}]},
+        {"_id": 0, "id": 1, "telegram_chat_id": 1}
+    ).to_list(1000)
+    user_jobs: dict[str, list[str]] = {}
+    for job in jobs:
+        for u in await subscribed_recipients(users, job):
+            user_jobs.setdefault(u["telegram_chat_id"], []).append(job["id"])
+    campaign = await create_campaign(
+        "force_push",
+        [{"chat_id": chat_id, "job_ids": job_ids} for chat_id, job_ids in user_jobs.items()],
+        {"message": f"Force push of {len(jobs)} active jobs", "job_count": len(jobs)},
+        admin["id"]
+    )
+    
+    messages_per_user = -(-len(jobs) // DIGEST_MAX_JOBS)
+    return {
+        "message": f"Queued {len(jobs)} jobs to be sent to all users as {messages_per_user} digest message(s) each.",
+        "campaign_id": campaign["id"],
+        "jobs_count": len(jobs),
+        "users_count": user_count,
+        "messages_per_user": messages_per_user
+    }
 
 
 # ---- AI Resume Builder Endpoint (Stateless) ----
@@ -1605,11 +2712,18 @@ async def force_push_jobs(request: Request):
 @api_router.post("/ai/process-block")
 async def process_ai_block(req: AIProcessRequest, request: Request):
     """Securely pass the user's raw interview response to the AI engine for ATS-optimized JSON."""
-    await get_current_user(request) # Ensure authenticated
+    user = await get_current_user(request) # Ensure authenticated
+    from ai_engine import process_ai_request  # loaded on first use (httpx, prompt tables)
     
     try:
-        response_data = await process_ai_request(req.block_type, req.raw_text)
+        response_data = await ai_scheduler.run(
+            user["id"], req.raw_text,
+            lambda: process_ai_request(req.block_type, req.raw_text),
+            block_type=req.block_type
+        )
         return response_data
+    except AISchedulerRejected as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         logger.error(f"AI Router Exception: {e}")
         raise HTTPException(status_code=500, detail="Failed to process text via AI engines.")
@@ -1618,27 +2732,74 @@ async def process_ai_block(req: AIProcessRequest, request: Request):
 
 @api_router.post("/resumes")
 async def save_resume(data: ResumeModel, request: Request):
-    """Save or update a resume JSON in MongoDB."""
+    """Save or update a resume JSON in MongoDB.
+
+    Accepts either the full `content` or an RFC 6902 `patch` against `base_version`.
+    When `base_version` is given the write only succeeds if it is still the stored
+    version (409 otherwise). Every save is recorded in `resume_versions`."""
     user = await get_current_user(request)
     
+    if data.content is None and data.patch is None:
+        raise HTTPException(status_code=400, detail="Either content or patch must be provided")
+    if data.content is not None and data.patch is not None:
+        raise HTTPException(status_code=400, detail="Provide content or patch, not both")
+    
     resume_id = data.id if data.id else str(uuid.uuid4())
+    existing = None
+    if data.id:
+        existing = await db.resumes.find_one({"id": resume_id, "user_id": user["id"]}, {"_id": 0})
+    current_version = existing.get("version", 0) if existing else 0
+    
+    if data.patch is not None:
+        if not existing:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        if data.base_version is None:
+            raise HTTPException(status_code=400, detail="base_version is required for patch saves")
+    if data.base_version is not None and data.base_version != current_version:
+        raise HTTPException(status_code=409, detail={"message": "Resume was modified elsewhere", "current_version": current_version})
+    
+    old_content = existing.get("content") if existing else None
+    if data.patch is not None:
+        try:
+            content = apply_patch(old_content or {}, data.patch)
+        except JsonPatchError as e:
+            raise HTTPException(status_code=422, detail=f"Invalid patch: {e}")
+        if not isinstance(content, dict):
+            raise HTTPException(status_code=422, detail="Patched resume content must be an object")
+    else:
+        content = data.content
     
+    new_version = current_version + 1
     doc = {
         "id": resume_id,
         "user_id": user["id"],
-        "title": data.title,
-        "content": data.content,
+        "title": data.title or (existing.get("title") if existing else None) or "Untitled Resume",
+        "content": content,
+        "version": new_version,
         "updated_at": datetime.now(IST).isoformat()
     }
     
-    # Upsert the document
-    await db.resumes.update_one(
-        {"id": resume_id, "user_id": user["id"]},
-        {"$set": doc},
-        upsert=True
-    )
+    if existing:
+        # Compare-and-set on the version we read; legacy documents have no version field
+        version_filter = current_version if current_version else {"$in": [None, 0]}
+        result = await db.resumes.update_one(
+            {"id": resume_id, "user_id": user["id"], "version": version_filter},
+            {"$set": doc}
+        )
+        if result.matched_count == 0:
+            latest = await db.resumes.find_one({"id": resume_id}, {"_id": 0, "version": 1})
+            raise HTTPException(status_code=409, detail={"message": "Resume was modified elsewhere", "current_version": (latest or {}).get("version", 0)})
+    else:
+        # Upsert the document
+        await db.resumes.update_one(
+            {"id": resume_id, "user_id": user["id"]},
+            {"$set": doc},
+            upsert=True
+        )
+    
+    await record_version(db, resume_id, new_version, old_content, content, patch=data.patch)
     
-    return {"message": "Resume saved successfully", "id": resume_id}
+    return {"message": "Resume saved successfully", "id": resume_id, "version": new_version}
 
 @api_router.get("/resumes")
 async def get_resumes(request: Request):
@@ -1660,6 +2821,46 @@ async def get_resume_by_id(resume_id: str, request: Request):
         raise HTTPException(status_code=404, detail="Resume not found")
     return resume
 
+@api_router.get("/resumes/{resume_id}/render")
+async def render_resume_file(resume_id: str, request: Request, format: str = "pdf", template: str = "classic"):
+    """Render a resume to PDF or HTML on the server. Output is cached by a hash of
+    content+template+format, which doubles as the ETag."""
+    user = await get_current_user(request)
+    if format not in RESUME_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format. Use one of: {', '.join(RESUME_FORMATS)}")
+    if template not in RESUME_TEMPLATES:
+        raise HTTPException(status_code=400, detail=f"Unknown template. Use one of: {', '.join(RESUME_TEMPLATES)}")
+    
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": user["id"]}, {"_id": 0, "title": 1, "content": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    content = resume.get("content") or {}
+    etag = f'"{render_key(content, template, format)}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        _, body = await render_cached(content, template, format)
+    except UnsupportedTextError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if format == "pdf":
+        headers["Content-Disposition"] = pdf_disposition(resume.get("title") or "resume")
+    return Response(content=body, media_type=RESUME_FORMATS[format], headers=headers)
+
+def pdf_disposition(title: str) -> str:
+    """Attachment header for `title`.pdf. Headers are latin-1, so `filename` is an
+    ASCII fallback and the real (e.g. Devanagari, Telugu, CJK) name goes in the
+    RFC 5987 `filename*` parameter."""
+    # Drop path separators, quotes and control characters but keep combining marks,
+    # which Indic scripts need (isalnum() would strip their vowel signs)
+    name = " ".join("".join(c for c in title if c.isprintable() and c not in '\\/:*?"<>|;').split()) or "resume"
+    ascii_name = " ".join("".join(
+        c for c in unicodedata.normalize("NFKD", name) if c.isascii() and (c.isalnum() or c in " -_")
+    ).split()) or "resume"
+    return f"attachment; filename=\"{ascii_name}.pdf\"; filename*=UTF-8''{quote(name + '.pdf')}"
+
 @api_router.delete("/resumes/{resume_id}")
 async def delete_resume(resume_id: str, request: Request):
     """Delete a resume from history."""
@@ -1667,15 +2868,52 @@ async def delete_resume(resume_id: str, request: Request):
     result = await db.resumes.delete_one({"id": resume_id, "user_id": user["id"]})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Resume not found")
+    await db.resume_versions.delete_many({"resume_id": resume_id})
     return {"message": "Resume deleted"}
 
+@api_router.get("/resumes/{resume_id}/versions")
+async def list_resume_versions(resume_id: str, request: Request):
+    """List the saved versions of a resume (newest first), without their content."""
+    user = await get_current_user(request)
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": user["id"]}, {"_id": 0, "id": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    versions = await db.resume_versions.find(
+        {"resume_id": resume_id}, {"_id": 0, "version": 1, "created_at": 1, "snapshot": 1, "patch": 1}
+    ).sort("version", -1).to_list(200)
+    return [
+        {
+            "version": v["version"],
+            "created_at": v["created_at"],
+            "is_snapshot": "snapshot" in v,
+            "operations": len(v.get("patch", []))
+        }
+        for v in versions
+    ]
+
+@api_router.get("/resumes/{resume_id}/versions/{version}")
+async def get_resume_version(resume_id: str, version: int, request: Request):
+    """Reconstruct a resume as it was at a given version."""
+    user = await get_current_user(request)
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": user["id"]}, {"_id": 0, "id": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    try:
+        content = await load_version(db, resume_id, version)
+    except JsonPatchError as e:
+        logger.error(f"Corrupt history for resume {resume_id}: {e}")
+        content = None
+    if content is None:
+        raise HTTPException(status_code=404, detail="Version not found")
+    return {"id": resume_id, "version": version, "content": content}
+
 
 async def self_ping():
     """Ping own health endpoint to prevent free tier platforms (like Render) from sleeping."""
     # Read the host URL if defined in env, otherwise fallback to localhost (for testing/safety)
     app_url = os.environ.get("RENDER_EXTERNAL_URL", "http://localhost:8000")
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client_http:
+        async with http_client(timeout=10.0) as client_http:
             resp = await client_http.get(f"{app_url}/api/health")
             if resp.status_code == 200:
                 logger.info(f"Self-ping successful: {app_url} is awake")
@@ -1684,26 +2922,37 @@ async def self_ping():
     except Exception as e:
         logger.error(f"Self-ping failed: {e}")
 
-# ---- App Startup ----
-@app.on_event("startup")
-async def startup_event():
-    scheduler = AsyncIOScheduler()
-    # Check for expired jobs every hour
-    scheduler.add_job(cleanup_expired_jobs, 'interval', hours=1)
-    
-    # Check for reminders every 15 minutes
-    scheduler.add_job(check_reminders, 'interval', minutes=15)
-    
-    # Self-ping every 13 minutes to keep free-tier servers awake
-    scheduler.add_job(self_ping, 'interval', minutes=13)
-    
-    scheduler.start()
-    logger.info("Scheduler started for cleanup, reminders, and self-ping")
-    
-    # Run cleanup immediately on startup to ensure clean state
-    # Use create_task to not block startup if it takes time
-    asyncio.create_task(cleanup_expired_jobs())
+async def precompress_static_assets():
+    """Leased so only one worker spends CPU on brotli/gzip after a deploy."""
+    if os.path.isdir("frontend/build"):
+        written = await asyncio.to_thread(precompress_directory, "frontend/build")
+        if written:
+            logger.info(f"Precompressed {written} static files")
+
+# ---- Request Profiles ----
+@api_router.get("/admin/profiles")
+async def list_request_profiles(request: Request):
+    """Most recent profiled requests. Send `X-Profile: 1` as an admin to profile one."""
+    await require_admin(request)
+    return profiler.summaries()
 
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_request_profile(profile_id: str, request: Request):
+    """Collapsed stacks for flamegraph.pl / speedscope."""
+    await require_admin(request)
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(collapsed_stacks(profile))
+
+# ---- Metrics ----
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Prometheus text exposition. Set METRICS_TOKEN to require a bearer token."""
+    metrics_token = os.environ.get("METRICS_TOKEN")
+    if metrics_token and request.headers.get("Authorization", "") != f"Bearer {metrics_token}":
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Include router and middleware
 app.include_router(api_router)
@@ -1716,11 +2965,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Static files are served precompressed, so only dynamic responses go through gzip
+app.add_middleware(SelectiveGZipMiddleware, prefixes=("/api/", "/metrics"), minimum_size=1000)
+app.add_middleware(ProfilerMiddleware, authorize=is_admin_authorization)
+# Added last so it wraps everything, including compression time
+app.add_middleware(MetricsMiddleware)
 
 # Serve React static files (should be last)
 # Ensure the build directory exists before mounting
 if os.path.isdir("frontend/build"):
-    app.mount("/", StaticFiles(directory="frontend/build", html=True), name="static")
+    app.mount("/", PrecompressedStaticFiles(directory="frontend/build", html=True), name="static")
 else:
     logger.warning("Frontend build directory not found. Run 'npm run build' in frontend directory.")
@@ -0,0 +1,186 @@
+import errno
+import gzip
+import logging
+import mimetypes
+import os
+import re
+import sys
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # optional: gzip variants only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_EXTENSIONS = {".js", ".css", ".html", ".json", ".map", ".svg", ".txt", ".xml", ".ico", ".webmanifest"}
+MIN_COMPRESS_BYTES = 1024
+# CRA build output: main.1a2b3c4d.js, 787.5e6f7a8b.chunk.css, logo.9c0d1e2f.svg
+HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+# Never worth compressing on the fly: already compressed, or streamed
+PRECOMPRESSED_CONTENT_TYPES = (
+    "image/png", "image/jpeg", "image/gif", "image/webp", "image/avif",
+    "font/woff", "font/woff2", "application/pdf", "application/zip", "application/gzip",
+    "audio/*", "video/*", "text/event-stream",
+)
+
+
+def _encoders() -> list[tuple[str, str, callable]]:
+    encoders = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, ("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    return encoders
+
+
+def precompress_directory(directory: str) -> int:
+    """Write .br/.gz siblings for text assets that lack an up-to-date one.
+
+    Run at build time (`python static_files.py frontend/build`) or by the process
+    holding the server's 'precompress_static_assets' lease; concurrent runs are
+    safe but waste CPU. Returns the number of files written.
+    """
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            source = os.stat(path)
+            if source.st_size < MIN_COMPRESS_BYTES:
+                continue
+            data = None
+            for _, suffix, compress in _encoders():
+                target = path + suffix
+                try:
+                    if os.stat(target).st_mtime >= source.st_mtime:
+                        continue
+                except FileNotFoundError:
+                    pass
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                encoded = compress(data)
+                if len(encoded) >= len(data):
+                    continue
+                # Per-process temp name: two writers never share a partial file, and
+                # os.replace makes whichever finishes last win atomically
+                tmp = f"{target}.{os.getpid()}.tmp"
+                try:
+                    with open(tmp, "wb") as f:
+                        f.write(encoded)
+                    os.replace(tmp, target)
+                    written += 1
+                except OSError as e:
+                    try:
+                        os.remove(tmp)
+                    except OSError:
+                        pass
+                    if e.errno in (errno.EROFS, errno.EACCES, errno.EPERM):
+                        logger.warning(f"Cannot write {target}: {e}; serving uncompressed")
+                        return written  # read-only build dir
+                    logger.warning(f"Cannot write {target}: {e}")
+    return written
+
+
+def _accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed .br/.gz siblings when the client accepts
+    them, with immutable caching for content-hashed build assets.
+
+    ETag / If-None-Match and Range support come from Starlette's FileResponse; range
+    requests are always answered from the uncompressed file.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+        name = os.path.basename(full_path)
+        compressible = os.path.splitext(name)[1] in COMPRESSIBLE_EXTENSIONS
+
+        response = None
+        if compressible and status_code == 200 and "range" not in request_headers:
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            for encoding, suffix, _ in _encoders():
+                if encoding not in accepted:
+                    continue
+                try:
+                    variant_stat = os.stat(full_path + suffix)
+                except FileNotFoundError:
+                    continue
+                if variant_stat.st_mtime < stat_result.st_mtime:
+                    continue  # stale: the source was rebuilt
+                response = FileResponse(
+                    full_path + suffix, stat_result=variant_stat,
+                    media_type=mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    headers={"Content-Encoding": encoding}
+                )
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response.headers["Cache-Control"] = IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE
+        if compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+class SelectiveGZipMiddleware:
+    """GZip for dynamic responses only. Paths outside `prefixes` (the static mount)
+    are served precompressed and pass straight through, as do responses whose
+    content type is already compressed or streamed (PRECOMPRESSED_CONTENT_TYPES).
+
+    The content-type check is done here rather than with GZipMiddleware's
+    exclude_content_types, which only exists in recent Starlette releases.
+    """
+
+    def __init__(self, app, prefixes: tuple[str, ...] = ("/api/",), minimum_size: int = 500, compresslevel: int = 9):
+        self.app = app
+        self.prefixes = prefixes
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        async def app(scope, receive, gzip_send):
+            excluded = False
+
+            async def route(message):
+                # Excluded responses bypass the gzip responder and go straight out
+                nonlocal excluded
+                if message["type"] == "http.response.start":
+                    excluded = _is_precompressed(Headers(raw=message["headers"]).get("content-type", ""))
+                await (send if excluded else gzip_send)(message)
+
+            await self.app(scope, receive, route)
+
+        await GZipMiddleware(app, minimum_size=self.minimum_size, compresslevel=self.compresslevel)(scope, receive, send)
+
+
+def _is_precompressed(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in PRECOMPRESSED_CONTENT_TYPES or f"{media_type.partition('/')[0]}/*" in PRECOMPRESSED_CONTENT_TYPES
+
+if __name__ == "__main__":
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else "frontend/build"
+    print(f"Precompressed {precompress_directory(target_dir)} files in {target_dir}")
@@ -0,0 +1,116 @@
+import logging
+import re
+import time
+from collections import defaultdict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("job_types", "locations", "keywords", "companies")
+_TOKEN = re.compile(r"[a-z0-9+#.]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return [t.strip(".") for t in _TOKEN.findall((text or "").lower()) if t.strip(".")]
+
+
+def normalize_filter(values: Optional[list[str]], phrase: bool) -> list[str]:
+    """Lower-cased, de-duplicated filter values. Phrases (keywords, locations) are
+    reduced to their tokens so "Full-Stack" matches a role titled "Full Stack"."""
+    out = []
+    for value in values or []:
+        value = " ".join(tokenize(value)) if phrase else value.strip().lower()
+        if value and value not in out:
+            out.append(value)
+    return out
+
+
+class SubscriptionIndex:
+    """In-memory inverted index over saved subscription filters.
+
+    A subscription matches a job when every field it sets matches (any one of its
+    values will do). Each field has a posting list per value, and subscriptions are
+    grouped by which fields they constrain. Matching a job unions the postings for
+    its values per field, then intersects each group with the hits of exactly the
+    fields that group constrains. It is all C-level set operations over the postings
+    the job touches. Multi-word phrases are posted under their first token and
+    confirmed against the job's token set.
+
+    The index is per process. `ensure_current` rebuilds it whenever the
+    `subscriptions` collection version (see bump_version) has moved, so writes made
+    by other workers are picked up before the next fan-out.
+    """
+
+    def __init__(self):
+        self.version = None
+        self.subscribed_users: set[str] = set()
+        self._owner: dict[str, str] = {}  # subscription id -> user id
+        self._groups: dict[tuple[str, ...], set[str]] = defaultdict(set)  # constrained fields -> subscription ids
+        self._postings: dict[str, dict[str, set[str]]] = {f: defaultdict(set) for f in FIELDS}
+        # Only subscriptions with a multi-word phrase, which need confirming
+        self._phrases: dict[str, dict[str, list[tuple[str, ...]]]] = {"keywords": {}, "locations": {}}
+
+    def build(self, subscriptions: list[dict], version=None):
+        self.__init__()
+        self.version = version
+        for sub in subscriptions:
+            self._add(sub)
+
+    def _add(self, sub: dict):
+        sub_id = sub["id"]
+        self._owner[sub_id] = sub["user_id"]
+        self.subscribed_users.add(sub["user_id"])
+        constrained = tuple(f for f in FIELDS if sub.get(f))
+        self._groups[constrained].add(sub_id)
+        for field in constrained:
+            values = sub[field]
+            if field in self._phrases:
+                phrases = [tuple(v.split()) for v in values]
+                if any(len(p) > 1 for p in phrases):
+                    self._phrases[field][sub_id] = phrases
+                for phrase in phrases:
+                    self._postings[field][phrase[0]].add(sub_id)
+            else:
+                for value in values:
+                    self._postings[field][value].add(sub_id)
+
+    async def ensure_current(self, db, version_key: str = "subscriptions"):
+        doc = await db.collection_versions.find_one({"_id": version_key}) or {}
+        version = (doc.get("epoch"), doc.get("version", 0))
+        if version == self.version:
+            return
+        started = time.perf_counter()
+        subscriptions = await db.subscriptions.find({}, {"_id": 0}).to_list(None)
+        self.build(subscriptions, version)
+        logger.info(f"Subscription index rebuilt: {len(subscriptions)} filters in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    def _field_hits(self, field: str, keys: set[str], tokens: Optional[set[str]] = None) -> set[str]:
+        postings = self._postings[field]
+        hits = set().union(*(postings[k] for k in keys if k in postings))
+        phrases = self._phrases.get(field)
+        if phrases:
+            unconfirmed = {s for s in hits & phrases.keys() if not any(set(p) <= tokens for p in phrases[s])}
+            hits -= unconfirmed
+        return hits
+
+    def match(self, job: dict) -> set[str]:
+        """User ids with at least one subscription matching `job`."""
+        if not self._owner:
+            return set()
+        keyword_tokens = set(tokenize(f"{job.get('role', '')} {job.get('company_name', '')}"))
+        location_tokens = set(tokenize(job.get("location", "")))
+        hits = {
+            "job_types": self._field_hits("job_types", {(job.get("job_type") or "").strip().lower()}),
+            "locations": self._field_hits("locations", location_tokens, location_tokens),
+            "keywords": self._field_hits("keywords", keyword_tokens, keyword_tokens),
+            "companies": self._field_hits("companies", {(job.get("company_name") or "").strip().lower()}),
+        }
+        matched = set()
+        for fields, members in self._groups.items():
+            group = members
+            for field in sorted(fields, key=lambda f: len(hits[f])):
+                group = group & hits[field]
+                if not group:
+                    break
+            matched |= group
+        return {self._owner[s] for s in matched}
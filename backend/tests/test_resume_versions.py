@@ -0,0 +1,131 @@
+import copy
+
+import pytest
+
+from resume_versions import JsonPatchError, apply_patch, make_patch
+
+
+# ---- RFC 6902 Appendix A ----
+RFC_EXAMPLES = [
+    # A.1 Adding an Object Member
+    ({"foo": "bar"}, [{"op": "add", "path": "/baz", "value": "qux"}], {"baz": "qux", "foo": "bar"}),
+    # A.2 Adding an Array Element
+    ({"foo": ["bar", "baz"]}, [{"op": "add", "path": "/foo/1", "value": "qux"}], {"foo": ["bar", "qux", "baz"]}),
+    # A.3 Removing an Object Member
+    ({"baz": "qux", "foo": "bar"}, [{"op": "remove", "path": "/baz"}], {"foo": "bar"}),
+    # A.4 Removing an Array Element
+    ({"foo": ["bar", "qux", "baz"]}, [{"op": "remove", "path": "/foo/1"}], {"foo": ["bar", "baz"]}),
+    # A.5 Replacing a Value
+    ({"baz": "qux", "foo": "bar"}, [{"op": "replace", "path": "/baz", "value": "boo"}], {"baz": "boo", "foo": "bar"}),
+    # A.6 Moving a Value
+    (
+        {"foo": {"bar": "baz", "waldo": "fred"}, "qux": {"corge": "grault"}},
+        [{"op": "move", "from": "/foo/waldo", "path": "/qux/thud"}],
+        {"foo": {"bar": "baz"}, "qux": {"corge": "grault", "thud": "fred"}},
+    ),
+    # A.7 Moving an Array Element
+    (
+        {"foo": ["all", "grass", "cows", "eat"]},
+        [{"op": "move", "from": "/foo/1", "path": "/foo/3"}],
+        {"foo": ["all", "cows", "eat", "grass"]},
+    ),
+    # A.8 Testing a Value: Success
+    (
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+        [{"op": "test", "path": "/baz", "value": "qux"}, {"op": "test", "path": "/foo/1", "value": 2}],
+        {"baz": "qux", "foo": ["a", 2, "c"]},
+    ),
+    # A.10 Adding a Nested Member Object
+    ({"foo": "bar"}, [{"op": "add", "path": "/child", "value": {"grandchild": {}}}], {"foo": "bar", "child": {"grandchild": {}}}),
+    # A.11 Ignoring Unrecognized Elements
+    ({"foo": "bar"}, [{"op": "add", "path": "/baz", "value": "qux", "xyz": 123}], {"foo": "bar", "baz": "qux"}),
+    # A.14 ~ Escape Ordering
+    ({"/": 9, "~1": 10}, [{"op": "test", "path": "/~01", "value": 10}], {"/": 9, "~1": 10}),
+    # A.16 Adding an Array Value
+    ({"foo": ["bar"]}, [{"op": "add", "path": "/foo/-", "value": ["abc", "def"]}], {"foo": ["bar", ["abc", "def"]]}),
+]
+
+RFC_ERRORS = [
+    # A.9 Testing a Value: Error
+    ({"baz": "qux"}, [{"op": "test", "path": "/baz", "value": "bar"}]),
+    # A.12 Adding to a Nonexistent Target
+    ({"foo": "bar"}, [{"op": "add", "path": "/baz/bat", "value": "qux"}]),
+    # A.15 Comparing Strings and Numbers
+    ({"/": 9, "~1": 10}, [{"op": "test", "path": "/~01", "value": "10"}]),
+]
+
+
+@pytest.mark.parametrize("doc, patch, expected", RFC_EXAMPLES)
+def test_rfc6902_examples(doc, patch, expected):
+    original = copy.deepcopy(doc)
+    assert apply_patch(doc, patch) == expected
+    assert doc == original  # input is not mutated
+
+
+@pytest.mark.parametrize("doc, patch", RFC_ERRORS)
+def test_rfc6902_errors(doc, patch):
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, patch)
+
+
+@pytest.mark.parametrize("actual, expected", [(True, 1), (1, True), (False, 0), (0, False), ([1], [True]), ({"a": 1}, {"a": True})])
+def test_test_op_does_not_equate_booleans_and_numbers(actual, expected):
+    with pytest.raises(JsonPatchError):
+        apply_patch({"v": actual}, [{"op": "test", "path": "/v", "value": expected}])
+
+
+def test_test_op_compares_numbers_by_value():
+    assert apply_patch({"v": 1}, [{"op": "test", "path": "/v", "value": 1.0}]) == {"v": 1}
+
+
+def test_failed_patch_is_rejected_whole():
+    doc = {"a": 1}
+    with pytest.raises(JsonPatchError):
+        apply_patch(doc, [{"op": "replace", "path": "/a", "value": 2}, {"op": "remove", "path": "/missing"}])
+    assert doc == {"a": 1}
+
+
+# ---- make_patch / apply_patch round trip ----
+RESUME = {
+    "name": "Asha Rao",
+    "summary": "Backend engineer",
+    "experience": [
+        {"title": "Engineer", "company": "Acme", "dates": "2021-2024", "bullets": ["Built APIs", "Cut latency 40%"]},
+        {"title": "Intern", "company": "Initech", "dates": "2020", "bullets": []},
+    ],
+    "skills": ["Python", "MongoDB"],
+    "visible": True,
+}
+
+ROUND_TRIPS = [
+    (RESUME, RESUME),
+    (RESUME, {**RESUME, "summary": "Senior backend engineer"}),
+    (RESUME, {k: v for k, v in RESUME.items() if k != "summary"}),
+    (RESUME, {**RESUME, "experience": RESUME["experience"][:1]}),
+    (RESUME, {**RESUME, "experience": [*RESUME["experience"], {"title": "TA", "company": "Uni", "dates": "2019", "bullets": ["Graded"]}]}),
+    (RESUME, {**RESUME, "skills": ["Go"]}),
+    (RESUME, {**RESUME, "skills": "Python, MongoDB"}),
+    (RESUME, {**RESUME, "visible": 1}),
+    ({"a/b": 1, "c~d": [1, 2]}, {"a/b": 2, "c~d": [2], "e": None}),
+    ({}, {"name": "हर्ष", "skills": ["తెలుగు"]}),
+    ([1, 2, 3], [3]),
+    ("old", {"new": True}),
+]
+
+
+@pytest.mark.parametrize("old, new", ROUND_TRIPS)
+def test_make_patch_round_trip(old, new):
+    patch = make_patch(old, new)
+    result = apply_patch(old, patch)
+    assert result == new
+    assert type(result) is type(new)
+    if isinstance(new, dict):
+        assert {k: type(v) for k, v in result.items()} == {k: type(v) for k, v in new.items()}
+
+
+def test_make_patch_is_empty_for_equal_documents():
+    assert make_patch(RESUME, copy.deepcopy(RESUME)) == []
+
+
+def test_make_patch_sees_boolean_to_number_change():
+    assert make_patch({"v": True}, {"v": 1}) == [{"op": "replace", "path": "/v", "value": 1}]
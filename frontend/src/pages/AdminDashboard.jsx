@@ -96,8 +96,7 @@ export default function AdminDashboard() {
   const [replying, setReplying] = useState(false);
   const [activeTab, setActiveTab] = useState("users");
   const [deletingChat, setDeletingChat] = useState(false);
-  const chatPollRef = useRef(null);
-  const usersPollRef = useRef(null);
+  const selectedChatIdRef = useRef(null);
 
   const fetchData = useCallback(async () => {
     setLoading(true);
@@ -228,31 +227,79 @@ export default function AdminDashboard() {
     fetchData();
   }, [fetchData]);
 
-  // Auto-poll chat messages when a chat is selected and chats tab is active
   useEffect(() => {
-    if (chatPollRef.current) clearInterval(chatPollRef.current);
-    if (activeTab === "chats" && selectedChatUser) {
-      chatPollRef.current = setInterval(() => {
-        const headers = { Authorization: `Bearer ${token}` };
-        axios.get(`${API}/admin/chats/${selectedChatUser.chat_id}`, { headers })
-          .then(res => setChatHistory(res.data))
-          .catch(() => { });
-      }, 5000);
-    }
-    return () => { if (chatPollRef.current) clearInterval(chatPollRef.current); };
-  }, [activeTab, selectedChatUser, token]);
+    selectedChatIdRef.current = selectedChatUser?.chat_id || null;
+  }, [selectedChatUser]);
 
-  // Auto-poll chat user list when chats tab is active
+  // Live chat updates over Server-Sent Events while the chats tab is open.
+  // Uses fetch (not EventSource) so the Authorization header can be sent.
   useEffect(() => {
-    if (usersPollRef.current) clearInterval(usersPollRef.current);
-    if (activeTab === "chats") {
-      fetchChatUsers();
-      usersPollRef.current = setInterval(() => {
-        fetchChatUsers();
-      }, 10000);
-    }
-    return () => { if (usersPollRef.current) clearInterval(usersPollRef.current); };
-  }, [activeTab, fetchChatUsers]);
+    if (activeTab !== "chats") return;
+    fetchChatUsers();
+
+    const controller = new AbortController();
+    let cursor = null;
+    let retryTimer = null;
+
+    const handleMessage = (msg) => {
+      setChatUsers(prev => {
+        const idx = prev.findIndex(u => u.chat_id === msg.chat_id);
+        if (idx === -1) {
+          fetchChatUsers(); // new conversation: pick up its user info
+          return prev;
+        }
+        const updated = { ...prev[idx], last_message: msg.content, last_active: msg.created_at };
+        return [updated, ...prev.filter((_, i) => i !== idx)];
+      });
+      if (selectedChatIdRef.current === msg.chat_id) {
+        setChatHistory(prev => prev.some(m => m.id === msg.id) ? prev : [...prev, msg]);
+      }
+    };
+
+    const connect = async () => {
+      try {
+        const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : "";
+        const res = await fetch(`${API}/admin/chats/stream${query}`, {
+          headers: { Authorization: `Bearer ${token}` },
+          signal: controller.signal,
+        });
+        if (!res.ok) throw new Error(`Chat stream failed: ${res.status}`);
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        for (;;) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let sep;
+          while ((sep = buffer.indexOf("\n\n")) !== -1) {
+            const raw = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            let id = null;
+            let data = "";
+            raw.split("\n").forEach(line => {
+              if (line.startsWith("id: ")) id = line.slice(4);
+              else if (line.startsWith("data: ")) data += line.slice(6);
+            });
+            if (!data) continue; // heartbeat / retry hint
+            if (id) cursor = id;
+            handleMessage(JSON.parse(data));
+          }
+        }
+      } catch (err) {
+        if (controller.signal.aborted) return;
+        console.error(err);
+      }
+      // Reconnect and resume from the last event we saw
+      if (!controller.signal.aborted) retryTimer = setTimeout(connect, 3000);
+    };
+    connect();
+
+    return () => {
+      controller.abort();
+      clearTimeout(retryTimer);
+    };
+  }, [activeTab, token, fetchChatUsers]);
 
   const handleCreateUser = async (e) => {
     e.preventDefault();
@@ -352,7 +399,7 @@ export default function AdminDashboard() {
       }
 
       const res = await axios.post(`${API}/admin/broadcast`, formData, { headers });
-      toast.success(`Broadcast sent to ${res.data.sent_count} user(s)!`);
+      toast.success(`Broadcast queued for ${res.data.total} user(s)!`);
       setBroadcastMsg("");
       setBroadcastFile(null);
       // Reset file input manually if needed, or rely on key change/re-render
@@ -789,7 +836,7 @@ export default function AdminDashboard() {
                                   <span>{isBot ? "Bot" : "User"}</span>
                                   <span>{new Date(msg.created_at).toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })}</span>
                                 </div>
-                                <div className="text-sm render-html break-words whitespace-pre-wrap" dangerouslySetInnerHTML={{ __html: msg.content }} />
+                                <div className="text-sm render-html break-words whitespace-pre-wrap" dangerouslySetInnerHTML={{ __html: msg.content.replaceAll('href="/api/', `href="${API}/`).replaceAll('src="/api/', `src="${API}/`) }} />
                               </div>
                             </div>
                           );
@@ -14,6 +14,13 @@ import { Badge } from "@/components/ui/badge";
 import { Briefcase, MapPin, ExternalLink, Calendar, Search } from "lucide-react";
 import { Input } from "@/components/ui/input";
 
+// Deadlines arrive as UTC datetimes; show the IST calendar date (YYYY-MM-DD)
+const formatDeadline = (deadline) => {
+    const date = new Date(deadline);
+    if (isNaN(date)) return deadline;
+    return date.toLocaleDateString("en-CA", { timeZone: "Asia/Kolkata" });
+};
+
 export default function RCJOPage() {
     const [jobs, setJobs] = useState([]);
     const [loading, setLoading] = useState(true);
@@ -111,7 +118,7 @@ export default function RCJOPage() {
                                 {job.deadline && (
                                     <div className="flex items-center gap-2 text-muted-foreground">
                                         <Calendar className="h-3.5 w-3.5" />
-                                        <span>Deadline: {job.deadline.split("T")[0]}</span>
+                                        <span>Deadline: {formatDeadline(job.deadline)}</span>
                                     </div>
                                 )}
                             </CardContent>